@@ -1,11 +1,11 @@
 import { NextRequest, NextResponse } from 'next/server';
 
 // Importar dados diretamente
-import ipcaData from '../../../../public/data/ipca.json';
-import ipca15Data from '../../../../public/data/ipca15.json';
-import pmcData from '../../../../public/data/pmc.json';
-import pmsData from '../../../../public/data/pms.json';
-import pimData from '../../../../public/data/pim.json';
+import ipcaData from '../../../../public/data/compact/ipca_latest.json';
+import ipca15Data from '../../../../public/data/compact/ipca15_latest.json';
+import pmcData from '../../../../public/data/compact/pmc_latest.json';
+import pmsData from '../../../../public/data/compact/pms_latest.json';
+import pimData from '../../../../public/data/compact/pim_latest.json';
 
 const GROQ_API_KEY = process.env.GROQ_API_KEY;
 
@@ -1,7 +1,20 @@
 import Link from "next/link";
 import { InflationChart, MetricCard, InflationTable, DiffusionChart, HeatmapTable } from "@/components/InflationChart";
 import FlashReportBanner from "@/components/FlashReportBanner";
-import ipcaData from "../../../../public/data/ipca.json";
+import { indicatorData } from "@/lib/indicator-data";
+import ipcaMom from "../../../../public/data/compact/ipca/mom.json";
+import ipcaA12 from "../../../../public/data/compact/ipca/a12.json";
+import ipcaPesos from "../../../../public/data/compact/ipca/pesos.json";
+import ipcaDifusaoBruta from "../../../../public/data/compact/ipca/difusao_bruta.json";
+import ipcaDifusaoDessaz from "../../../../public/data/compact/ipca/difusao_dessaz.json";
+
+const ipcaData = indicatorData("ipca", {
+  mom: ipcaMom,
+  a12: ipcaA12,
+  pesos: ipcaPesos,
+  difusao_bruta: ipcaDifusaoBruta,
+  difusao_dessaz: ipcaDifusaoDessaz,
+});
 
 // Helper: parse date without timezone issues
 function parseDate(isoDate: string): Date {
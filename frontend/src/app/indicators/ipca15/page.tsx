@@ -1,6 +1,17 @@
 import Link from "next/link";
 import { InflationChart, MetricCard, InflationTable, DiffusionChart, HeatmapTable } from "@/components/InflationChart";
-import ipca15Data from "../../../../public/data/ipca15.json";
+import { indicatorData } from "@/lib/indicator-data";
+import ipca15Mom from "../../../../public/data/compact/ipca15/mom.json";
+import ipca15A12 from "../../../../public/data/compact/ipca15/a12.json";
+import ipca15Pesos from "../../../../public/data/compact/ipca15/pesos.json";
+import ipca15Difusao from "../../../../public/data/compact/ipca15/difusao.json";
+
+const ipca15Data = indicatorData("ipca15", {
+  mom: ipca15Mom,
+  a12: ipca15A12,
+  pesos: ipca15Pesos,
+  difusao: ipca15Difusao,
+});
 
 // Helper: parse date without timezone issues
 function parseDate(isoDate: string): Date {
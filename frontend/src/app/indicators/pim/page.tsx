@@ -1,7 +1,12 @@
 import Link from "next/link";
 import { InflationChart, HeatmapTable } from "@/components/InflationChart";
 import FlashReportBanner from "@/components/FlashReportBanner";
-import pimData from "../../../../public/data/pim.json";
+import { indicatorData } from "@/lib/indicator-data";
+import pimMom from "../../../../public/data/compact/pim/mom.json";
+import pimYoy from "../../../../public/data/compact/pim/yoy.json";
+import pimSaIndex from "../../../../public/data/compact/pim/sa_index.json";
+
+const pimData = indicatorData("pim", { mom: pimMom, yoy: pimYoy, sa_index: pimSaIndex });
 
 // Helper: parse date
 function parseDate(isoDate: string): Date {
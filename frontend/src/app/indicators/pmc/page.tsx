@@ -1,7 +1,12 @@
 import Link from "next/link";
 import { InflationChart, HeatmapTable } from "@/components/InflationChart";
 import FlashReportBanner from "@/components/FlashReportBanner";
-import pmcData from "../../../../public/data/pmc.json";
+import { indicatorData } from "@/lib/indicator-data";
+import pmcMom from "../../../../public/data/compact/pmc/mom.json";
+import pmcYoy from "../../../../public/data/compact/pmc/yoy.json";
+import pmcSaIndex from "../../../../public/data/compact/pmc/sa_index.json";
+
+const pmcData = indicatorData("pmc", { mom: pmcMom, yoy: pmcYoy, sa_index: pmcSaIndex });
 
 function parseDate(isoDate: string): Date {
     return new Date(isoDate + "T12:00:00");
@@ -1,7 +1,12 @@
 import Link from "next/link";
 import { InflationChart, HeatmapTable } from "@/components/InflationChart";
 import FlashReportBanner from "@/components/FlashReportBanner";
-import pmsData from "../../../../public/data/pms.json";
+import { indicatorData } from "@/lib/indicator-data";
+import pmsMom from "../../../../public/data/compact/pms/mom.json";
+import pmsYoy from "../../../../public/data/compact/pms/yoy.json";
+import pmsSaIndex from "../../../../public/data/compact/pms/sa_index.json";
+
+const pmsData = indicatorData("pms", { mom: pmsMom, yoy: pmsYoy, sa_index: pmsSaIndex });
 
 function parseDate(isoDate: string): Date {
     return new Date(isoDate + "T12:00:00");
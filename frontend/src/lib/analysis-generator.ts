@@ -3,11 +3,11 @@
  * Merges official IBGE news text with PX data using Groq
  */
 
-import ipcaData from '../../public/data/ipca.json';
-import ipca15Data from '../../public/data/ipca15.json';
-import pmcData from '../../public/data/pmc.json';
-import pmsData from '../../public/data/pms.json';
-import pimData from '../../public/data/pim.json';
+import ipcaData from '../../public/data/compact/ipca_latest.json';
+import ipca15Data from '../../public/data/compact/ipca15_latest.json';
+import pmcData from '../../public/data/compact/pmc_latest.json';
+import pmsData from '../../public/data/compact/pms_latest.json';
+import pimData from '../../public/data/compact/pim_latest.json';
 import {
     getSystemPromptForIndicator,
     formatDataContextForIndicator,
@@ -0,0 +1,51 @@
+/**
+ * Indicator series from the compact export (scripts/export_indicator_json.py).
+ *
+ * Each view is stored column-wise in public/data/compact/<indicator>/<view>.json
+ * ({ dates, series: { name: values } }); toRows() turns it back into the row
+ * layout the pages were written against ({ data_date, <series>: value }).
+ * Code that only needs recent periods should import
+ * public/data/compact/<indicator>_latest.json instead, which is already in rows.
+ */
+
+import manifest from "../../public/data/compact/manifest.json";
+
+export interface CompactView {
+  dates: string[];
+  series: Record<string, (number | string | null)[]>;
+}
+
+export type IndicatorRow = { data_date: string } & Record<string, number | string | null>;
+
+export interface IndicatorMetadata {
+  indicator: string;
+  description?: string;
+  source?: string;
+  last_updated: string;
+  frequency?: string;
+}
+
+export type IndicatorName = keyof typeof manifest.indicators;
+
+export function toRows(view: CompactView): IndicatorRow[] {
+  const names = Object.keys(view.series);
+  return view.dates.map((date, i) => {
+    const row: IndicatorRow = { data_date: date };
+    for (const name of names) {
+      row[name] = view.series[name][i] ?? null;
+    }
+    return row;
+  });
+}
+
+/** Metadata from the export manifest plus the given compact views, as rows. */
+export function indicatorData<V extends string>(
+  name: IndicatorName,
+  views: Record<V, CompactView>
+): { metadata: IndicatorMetadata } & Record<V, IndicatorRow[]> {
+  const data: Record<string, unknown> = { metadata: manifest.indicators[name].metadata };
+  for (const view of Object.keys(views) as V[]) {
+    data[view] = toRows(views[view]);
+  }
+  return data as { metadata: IndicatorMetadata } & Record<V, IndicatorRow[]>;
+}
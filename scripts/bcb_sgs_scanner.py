@@ -0,0 +1,218 @@
+"""
+Resumable, rate-adaptive scanner for BCB SGS series IDs.
+
+Pinging 100k IDs with a fixed concurrency either underuses the API or gets
+throttled. SGSScanner adjusts its concurrency AIMD-style (additive increase
+while latency is healthy, halve on 429/5xx or slow responses) and appends the
+outcome of every checked ID to a log file, so an interrupted scan resumes
+exactly where it stopped, without re-pinging IDs that were already found
+missing.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import aiohttp
+
+# --- Scanner Configuration ---
+API_BASE_URL = "https://api.bcb.gov.br/dados/serie/bcdata.sgs.{}/dados"
+PING_TIMEOUT = 5
+MAX_RETRIES = 4
+# Seconds before the first retry, doubled on each further one (capped at 30)
+RETRY_BACKOFF = 1.0
+# Besides these, every 5xx counts as throttling: an overloaded API often
+# answers 500/502/504 before it starts sending 429s.
+THROTTLE_STATUSES = {429, 503}
+# Outcomes that settle an ID. Anything else (timeouts, throttling that
+# outlasted the retries) is checked again on the next run.
+FINAL_STATUSES = {'standard', 'daily', 'not_found'}
+VALID_STATUSES = {'standard', 'daily'}
+LOG_FLUSH_EVERY = 200
+
+
+@dataclass
+class AIMDController:
+    """
+    Additive-increase / multiplicative-decrease concurrency limit.
+
+    The limit grows by one after every `limit` healthy responses (roughly
+    once per round trip of the whole window) and is halved on throttling or
+    when latency exceeds `target_latency`. After a decrease, further bad
+    signals are ignored until the requests already in flight have drained,
+    so one congested window only halves the limit once.
+    """
+    initial: int = 20
+    minimum: int = 2
+    maximum: int = 200
+    target_latency: float = 2.0
+    decrease_factor: float = 0.5
+
+    def __post_init__(self):
+        self.limit = float(self.initial)
+        self._healthy = 0
+        self._cooldown = 0
+
+    @property
+    def concurrency(self) -> int:
+        return max(self.minimum, int(self.limit))
+
+    def on_response(self, latency: float, throttled: bool) -> None:
+        if self._cooldown > 0:
+            self._cooldown -= 1
+        if throttled or latency > self.target_latency:
+            if self._cooldown == 0:
+                self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                self._healthy = 0
+                self._cooldown = self.concurrency
+            return
+        self._healthy += 1
+        if self._healthy >= self.concurrency:
+            self.limit = min(self.maximum, self.limit + 1)
+            self._healthy = 0
+
+
+def _throttled(http_status: int) -> bool:
+    return http_status in THROTTLE_STATUSES or http_status >= 500
+
+
+class ScanLog:
+    """Append-only `series_id<TAB>status` log of every checked ID."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = None
+        self._pending = 0
+
+    def load(self) -> Dict[int, str]:
+        """Latest status per ID. A truncated last line (crash mid-write) is ignored."""
+        statuses: Dict[int, str] = {}
+        if not self.path.exists():
+            return statuses
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.rstrip('\n').split('\t')
+                if len(parts) == 2 and parts[0].isdigit() and parts[1]:
+                    statuses[int(parts[0])] = parts[1]
+        return statuses
+
+    def append(self, series_id: int, status: str) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(f"{series_id}\t{status}\n")
+        self._pending += 1
+        if self._pending >= LOG_FLUSH_EVERY:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+            self._pending = 0
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SGSScanner:
+    """Pings SGS series IDs with adaptive concurrency and a resumable log."""
+
+    def __init__(self, log_path: Path, controller: Optional[AIMDController] = None,
+                 base_url: str = API_BASE_URL):
+        self.log = ScanLog(log_path)
+        self.controller = controller or AIMDController()
+        self.base_url = base_url
+        self._in_flight = 0
+        self._slot_freed: Optional[asyncio.Condition] = None
+
+    async def _probe(self, session: aiohttp.ClientSession, series_id: int) -> Tuple[str, Optional[int]]:
+        """One request; returns (status, http_status). http_status is None on timeouts."""
+        url = self.base_url.format(series_id) + "/ultimos/1?formato=json"
+        started = time.monotonic()
+        try:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=PING_TIMEOUT)) as response:
+                if response.status == 200:
+                    status = 'standard'
+                elif response.status == 404:
+                    status = 'not_found'
+                elif response.status == 400 and "periodicidade diária" in await response.text():
+                    # This error indicates a daily series which requires a date range
+                    status = 'daily'
+                else:
+                    # Anything else (403, other 400s, 5xx) is retried and, if it
+                    # persists, left unsettled for the next run
+                    status = f'error_{response.status}'
+                latency = time.monotonic() - started
+                self.controller.on_response(latency, _throttled(response.status))
+                return status, response.status
+        except (asyncio.TimeoutError, aiohttp.ClientError):
+            self.controller.on_response(time.monotonic() - started, throttled=True)
+            return 'error_timeout', None
+
+    async def check(self, session: aiohttp.ClientSession, series_id: int) -> str:
+        """Checks one ID, backing off and retrying until it settles (found, daily or 404)."""
+        status = 'error_timeout'
+        for attempt in range(MAX_RETRIES + 1):
+            status, _ = await self._probe(session, series_id)
+            if status in FINAL_STATUSES or attempt == MAX_RETRIES:
+                break
+            await asyncio.sleep(min(30, RETRY_BACKOFF * 2 ** attempt))
+        return status
+
+    async def _acquire_slot(self) -> None:
+        async with self._slot_freed:
+            while self._in_flight >= self.controller.concurrency:
+                await self._slot_freed.wait()
+            self._in_flight += 1
+
+    async def _release_slot(self) -> None:
+        async with self._slot_freed:
+            self._in_flight -= 1
+            self._slot_freed.notify_all()
+
+    async def _check_and_log(self, session, series_id: int, results: Dict[int, str]) -> None:
+        try:
+            status = await self.check(session, series_id)
+            results[series_id] = status
+            self.log.append(series_id, status)
+        finally:
+            await self._release_slot()
+
+    async def scan(self, series_ids: Iterable[int], progress_every: int = 5000) -> Dict[int, str]:
+        """
+        Checks every ID not already settled in the log and returns the status
+        of all requested IDs (previous runs included).
+        """
+        series_ids = list(series_ids)
+        previous = self.log.load()
+        results = {i: previous[i] for i in series_ids if previous.get(i) in FINAL_STATUSES}
+        to_check = [i for i in series_ids if i not in results]
+        logging.info(f"Scan log has {len(results)} settled IDs; {len(to_check)} left to check.")
+
+        self._slot_freed = asyncio.Condition()
+        tasks = set()
+        connector = aiohttp.TCPConnector(limit=self.controller.maximum)
+        try:
+            async with aiohttp.ClientSession(connector=connector) as session:
+                for n, series_id in enumerate(to_check, 1):
+                    await self._acquire_slot()
+                    task = asyncio.create_task(self._check_and_log(session, series_id, results))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    if n % progress_every == 0:
+                        logging.info(f"Checked {n}/{len(to_check)} IDs (concurrency {self.controller.concurrency}).")
+                if tasks:
+                    await asyncio.gather(*tasks)
+        finally:
+            self.log.close()
+        return results
+
+
+def valid_series(results: Dict[int, str]) -> list:
+    """[{'id': ..., 'type': 'standard'|'daily'}] for the IDs that exist, in ID order."""
+    return [{'id': i, 'type': s} for i, s in sorted(results.items()) if s in VALID_STATUSES]
@@ -0,0 +1,104 @@
+"""
+Benchmark for the shared catalog matchers (scripts/catalog_matcher.py).
+
+Runs the previous per-pattern scans and the automaton-based versions of the
+three alias scripts over semantic_aliased_catalog.parquet, checks that both
+give the same answer for every row and prints the timings.
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+
+import polars as pl
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts import classify_ibge_series, create_semantic_aliases, generate_aliases
+
+CATALOG_FILE = PROJECT_ROOT / "data" / "processed" / "semantic_aliased_catalog.parquet"
+
+
+# --- Previous implementations (one scan per pattern), kept here as the reference ---
+
+def legacy_economic_alias(normalized_text: str) -> str:
+    found_keywords = []
+    for alias_part, patterns in classify_ibge_series.ECONOMIC_KEYWORDS.items():
+        for pattern in patterns:
+            if re.search(pattern, normalized_text, re.IGNORECASE):
+                found_keywords.append(alias_part)
+                break
+    if not found_keywords:
+        return "UNCATEGORIZED"
+    return "_".join(sorted(set(found_keywords)))
+
+def legacy_longest(names: list, text: str):
+    for name in sorted(names, key=len, reverse=True):
+        if name in text:
+            return name
+    return None
+
+
+# --- New implementations ---
+
+def economic_alias(normalized_text: str) -> str:
+    found_keywords = classify_ibge_series.KEYWORD_MATCHER.families(normalized_text)
+    if not found_keywords:
+        return "UNCATEGORIZED"
+    return "_".join(sorted(found_keywords))
+
+
+def timed(label: str, fn, texts: list) -> list:
+    start = time.perf_counter()
+    results = [fn(text) for text in texts]
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<45} {elapsed:8.3f}s")
+    return results
+
+def compare(title: str, legacy_fn, new_fn, texts: list, new_label: str) -> None:
+    print(f"\n{title} ({len(texts)} texts)")
+    legacy = timed("per-pattern scans (previous)", legacy_fn, texts)
+    new = timed(new_label, new_fn, texts)
+    mismatches = sum(1 for a, b in zip(legacy, new) if a != b)
+    print(f"  Mismatches: {mismatches}")
+    if mismatches:
+        raise SystemExit(f"{title}: results differ from the previous implementation")
+
+
+def main():
+    df = pl.read_parquet(CATALOG_FILE)
+    print(f"Loaded {df.height} series from {CATALOG_FILE.name}")
+    rows = df.to_dicts()
+
+    classify_texts = [
+        classify_ibge_series.normalize_text(" ".join([
+            str(row.get('label', '')), str(row.get('general_name', '')), str(row.get('dataset', ''))
+        ]))
+        for row in rows
+    ]
+    compare("classify_ibge_series: ECONOMIC_KEYWORDS", legacy_economic_alias, economic_alias, classify_texts,
+            "KeywordMatcher (Aho-Corasick)")
+
+    alias_texts = [
+        generate_aliases.normalize_text(f"{row.get('label', '')} {row.get('general_name', '')}")
+        for row in rows
+    ]
+    for family in ["indicator", "location"]:
+        names = generate_aliases.ALIAS_RULES[family]
+        matcher = getattr(generate_aliases, f"{family.upper()}_MATCHER")
+        compare(f"generate_aliases: {family}", lambda t: legacy_longest(names, t), matcher.longest, alias_texts,
+                "LongestMatcher (pre-sorted)")
+
+    semantic_texts = [row['general_name'] for row in rows if isinstance(row['general_name'], str)]
+    for family in ["indicator", "location"]:
+        names = create_semantic_aliases.SEMANTIC_RULES[family]
+        matcher = getattr(create_semantic_aliases, f"{family.upper()}_MATCHER")
+        compare(f"create_semantic_aliases: {family}", lambda t: legacy_longest(names, t), matcher.longest, semantic_texts,
+                "LongestMatcher (pre-sorted)")
+
+
+if __name__ == "__main__":
+    main()
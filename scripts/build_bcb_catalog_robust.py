@@ -5,21 +5,38 @@ import polars as pl
 from pathlib import Path
 from datetime import datetime, timedelta
 from tqdm import tqdm
-import logging
+import argparse
 import json
+import logging
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.bcb_sgs_scanner import AIMDController, SGSScanner, valid_series
 
 # --- Basic Configuration ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # --- Script Configuration ---
 SERIES_RANGE = range(1, 100001)
-CONCURRENT_REQUESTS = 50
+CONCURRENT_REQUESTS = 50  # Phase 2 (metadata); Phase 1 adapts its own concurrency
+INITIAL_PING_CONCURRENCY = 20
+MAX_PING_CONCURRENCY = 200
 REQUEST_TIMEOUT = 15
-BATCH_SIZE = 2000  # Process in smaller chunks
-MAX_RETRIES = 2
 OUTPUT_DIR = Path(__file__).parent.parent / "data" / "processed"
 OUTPUT_FILE = OUTPUT_DIR / "bcb_series_catalog.parquet"
-PROGRESS_FILE = OUTPUT_DIR / "temp_bcb_discovery_progress.json"
+# Append-only log of every checked ID; lets an interrupted discovery resume.
+DISCOVERY_LOG = OUTPUT_DIR / "temp_bcb_discovery_log.tsv"
+INCREMENTAL_LOG = OUTPUT_DIR / "temp_bcb_incremental_log.tsv"
+
+# --- Incremental Refresh Configuration ---
+# Known live series come from the last catalog build plus the curated metadata catalog.
+KNOWN_IDS_CATALOG = OUTPUT_DIR / "bcb_metadata_catalog.parquet"
+STATE_FILE = OUTPUT_DIR / "bcb_catalog_state.json"
+FRONTIER_SIZE = 2000      # New IDs probed above the highest known ID on every refresh
+FULL_RESCAN_DAYS = 30     # Rescan the whole ID range at most this often
 
 # --- BCB URL Configuration ---
 API_BASE_URL = "https://api.bcb.gov.br/dados/serie/bcdata.sgs.{}/dados"
@@ -35,34 +52,6 @@ DEFAULT_THRESHOLD = 365 * 2
 def generate_px_code(series_id):
     return f"PX_BCB_{series_id}"
 
-async def ping_series_with_retry(session, series_id):
-    """Robustly checks if a series ID is valid with retries."""
-    url = API_BASE_URL.format(series_id) + "/ultimos/1?formato=json"
-    for attempt in range(MAX_RETRIES + 1):
-        try:
-            async with session.get(url, timeout=5) as response:
-                if response.status == 200:
-                    return series_id, 'standard'
-                if response.status == 404:
-                    return series_id, 'not_found'
-                if response.status == 400:
-                    error_text = await response.text()
-                    if "periodicidade diária" in error_text:
-                        return series_id, 'daily'
-                # For other statuses (e.g., 503 Service Unavailable), we retry
-                if attempt < MAX_RETRIES:
-                    await asyncio.sleep(1 + attempt) # Exponential backoff
-                    continue
-                return series_id, f'error_{response.status}'
-
-        except (asyncio.TimeoutError, aiohttp.ClientError):
-            if attempt < MAX_RETRIES:
-                await asyncio.sleep(1 + attempt)
-                continue
-            return series_id, 'error_timeout'
-    return series_id, 'not_found' # Default after all retries fail
-
-
 async def process_series(session, series_id, series_type):
     """
     Scrapes metadata using a two-step iframe-aware process, 
@@ -138,48 +127,91 @@ async def process_series(session, series_id, series_type):
     }
 
 
-def load_progress():
-    if PROGRESS_FILE.exists():
-        with open(PROGRESS_FILE, 'r') as f:
+def load_existing_catalog():
+    if OUTPUT_FILE.exists():
+        return pl.read_parquet(OUTPUT_FILE)
+    return None
+
+def load_known_ids(existing):
+    """IDs of series already known to exist: the previous catalog plus the metadata catalog."""
+    known = set()
+    if existing is not None and 'series_id' in existing.columns:
+        known.update(existing['series_id'].cast(pl.Int64).to_list())
+    if KNOWN_IDS_CATALOG.exists():
+        known.update(pl.read_parquet(KNOWN_IDS_CATALOG, columns=['series_number'])['series_number'].to_list())
+    return known
+
+def load_state():
+    if STATE_FILE.exists():
+        with open(STATE_FILE, 'r') as f:
             return json.load(f)
-    return []
+    return {}
+
+def save_state(state):
+    with open(STATE_FILE, 'w') as f:
+        json.dump(state, f, indent=2)
+
+def full_rescan_due(state):
+    last_full_scan = state.get('last_full_scan')
+    if not last_full_scan:
+        return True
+    return (datetime.now() - datetime.fromisoformat(last_full_scan)).days >= FULL_RESCAN_DAYS
+
+def merge_catalog(existing, records, missing_ids, checked_ids=()):
+    """
+    Upserts freshly processed records into the existing catalog.
 
-def save_progress(data):
-    with open(PROGRESS_FILE, 'w') as f:
-        json.dump(data, f)
+    Rows are replaced when the series was re-processed and dropped when the
+    scan confirmed the ID no longer exists. On a full rescan `checked_ids`
+    holds every ID that was processed: those not returned active (inactive
+    or failed) are dropped too, so the full rescan leaves active series only.
+    On incremental runs series whose refresh failed or came back empty keep
+    their previous row until the next full rescan.
+    """
+    fresh = pl.DataFrame(records) if records else None
+    if existing is None:
+        return fresh
+    replaced = set(missing_ids) | set(checked_ids) | ({r['series_id'] for r in records})
+    kept = existing.filter(~pl.col('series_id').is_in(list(replaced)))
+    if fresh is None:
+        return kept
+    return pl.concat([kept, fresh], how='diagonal_relaxed').sort('series_id')
+
+async def main(mode='auto'):
+    """
+    Builds or refreshes the catalog.
 
-async def main():
+    mode='full' scans the whole ID range, 'incremental' only re-checks known
+    IDs plus a frontier above the highest one, and 'auto' (default) runs a
+    full scan when the last one is older than FULL_RESCAN_DAYS.
+    """
     OUTPUT_DIR.mkdir(exist_ok=True)
-    
-    # --- Phase 1: Robust Discovery in Batches ---
-    all_valid_series = load_progress()
-    found_ids = {s['id'] for s in all_valid_series}
-    logging.info(f"Loaded {len(all_valid_series)} valid series from previous run.")
-
-    series_to_check = [i for i in SERIES_RANGE if i not in found_ids]
-    
-    if not series_to_check:
-        logging.info("All series have been checked previously.")
+
+    existing = load_existing_catalog()
+    known_ids = load_known_ids(existing)
+    state = load_state()
+    full_scan = mode == 'full' or not known_ids or (mode == 'auto' and full_rescan_due(state))
+
+    if full_scan:
+        series_ids = list(SERIES_RANGE)
+        scan_log = DISCOVERY_LOG
+        logging.info(f"--- Starting Phase 1: Discovering valid series IDs in range {SERIES_RANGE.start}-{SERIES_RANGE.stop-1} ---")
     else:
-        logging.info(f"--- Starting Phase 1: Discovering {len(series_to_check)} new series IDs ---")
-        
-        connector = aiohttp.TCPConnector(limit=CONCURRENT_REQUESTS)
-        async with aiohttp.ClientSession(connector=connector) as session:
-            for i in tqdm(range(0, len(series_to_check), BATCH_SIZE), desc="Pinging Batches"):
-                batch_ids = series_to_check[i:i+BATCH_SIZE]
-                tasks = [ping_series_with_retry(session, series_id) for series_id in batch_ids]
-                results = await asyncio.gather(*tasks)
-                
-                for series_id, status in results:
-                    if status in ['standard', 'daily']:
-                        all_valid_series.append({'id': series_id, 'type': status})
-                
-                save_progress(all_valid_series)
-                logging.info(f"Batch complete. Total valid series found so far: {len(all_valid_series)}")
-
-    if not all_valid_series:
-        logging.error("No valid series found after robust discovery. Exiting.")
-        return
+        frontier_start = max(known_ids) + 1
+        series_ids = sorted(known_ids) + list(range(frontier_start, frontier_start + FRONTIER_SIZE))
+        scan_log = INCREMENTAL_LOG
+        logging.info(f"--- Starting Phase 1 (incremental): {len(known_ids)} known IDs + frontier {frontier_start}-{frontier_start + FRONTIER_SIZE - 1} ---")
+
+    # --- Phase 1: Adaptive, resumable discovery ---
+    scanner = SGSScanner(
+        scan_log,
+        AIMDController(initial=INITIAL_PING_CONCURRENCY, maximum=MAX_PING_CONCURRENCY),
+        base_url=API_BASE_URL,
+    )
+    scan_results = await scanner.scan(series_ids)
+    all_valid_series = valid_series(scan_results)
+    missing_ids = [i for i, status in scan_results.items() if status == 'not_found']
+    logging.info(f"--- Phase 1 Complete: Found {len(all_valid_series)} valid series IDs. ---")
 
     # --- Phase 2: Process Metadata ---
     logging.info(f"--- Starting Phase 2: Processing metadata for {len(all_valid_series)} series ---")
@@ -191,22 +223,35 @@ async def main():
             results.append(await task)
         
         active_series_records = [r for r in results if r is not None]
+    logging.info(f"--- Phase 2 Complete: Found {len(active_series_records)} active series. ---")
 
-    if not active_series_records:
+    checked_ids = [s['id'] for s in all_valid_series] if full_scan else []
+    final_df = merge_catalog(existing, active_series_records, missing_ids, checked_ids)
+    if final_df is None or final_df.is_empty():
         logging.error("No active series found after processing. Exiting.")
     else:
-        logging.info(f"--- Phase 2 Complete: Found {len(active_series_records)} active series. ---")
-        logging.info(f"Saving {len(active_series_records)} active series records to {OUTPUT_FILE}")
-        final_df = pl.DataFrame(active_series_records)
+        logging.info(f"Saving {final_df.height} series records to {OUTPUT_FILE}")
         final_df.write_parquet(OUTPUT_FILE)
         logging.info("--- BCB Catalog Build Complete! ---")
-    
-    # Clean up progress file
-    if PROGRESS_FILE.exists():
-        PROGRESS_FILE.unlink()
 
-if __name__ == "__main__":
+    if full_scan:
+        state['last_full_scan'] = datetime.now().isoformat(timespec='seconds')
+    state['last_refresh'] = datetime.now().isoformat(timespec='seconds')
+    save_state(state)
+
+    # Clean up the scan log so the next run starts from scratch
+    if scan_log.exists():
+        scan_log.unlink()
+
+def run(mode='auto'):
+    """Synchronous entry point (used by run_etl.py)."""
     try:
-        asyncio.run(main())
+        asyncio.run(main(mode))
     except KeyboardInterrupt:
         logging.info("Script interrupted by user. Progress has been saved.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or refresh the BCB SGS series catalog.")
+    parser.add_argument("--mode", choices=["auto", "incremental", "full"], default="auto",
+                        help="'incremental' re-checks known IDs and a frontier; 'full' scans the whole range.")
+    run(parser.parse_args().mode)
@@ -0,0 +1,342 @@
+"""
+Query layer over data/processed/master_series_catalog.parquet.
+
+Tools used to pl.read_parquet() the whole catalog (~124k series) and filter
+it per question. build_index() writes, next to the parquet, a directory
+master_series_catalog.index/ with:
+
+- catalog.arrow: the catalog (plus the derived facet columns) as an
+  uncompressed Arrow IPC file, memory-mapped by readers, so fetching a
+  handful of rows only touches their pages;
+- postings.npy + terms.json: an inverted index (field -> term -> sorted row
+  ids) over alias tokens, branch, indicator, location, periodicity, SIDRA
+  table and which optional columns are filled (has=api_url, ...);
+- aliases.bin + alias_offsets.npy + alias_rows.npy: the aliases in sorted
+  order, for prefix search by binary search.
+
+    index = CatalogIndex.open()
+    index.query(branch="CNT", has="api_url")          # DataFrame of matches
+    index.lookup(indicator="ipca", location="recife")  # row ids only
+    index.query(alias_prefix="ipca_12m_cerveja")
+
+Location and periodicity are not columns of the catalog. Location comes from
+the territorial level of the SIDRA URL (n1 is Brasil) or the location names
+of generate_aliases.ALIAS_RULES found in the series name; periodicity from
+the dataset (PERIODICITY_BY_DATASET).
+
+The index is rebuilt when the parquet changes (mtime/size, then SHA-256,
+like excel_cache).
+"""
+
+import bisect
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import polars as pl
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.etl_manifest import file_digest
+from scripts.generate_aliases import ALIAS_RULES, _first_match, normalize_text, normalize_text_expr
+
+# --- Configuration ---
+MASTER_CATALOG_FILE = PROJECT_ROOT / "data" / "processed" / "master_series_catalog.parquet"
+INDEX_FORMAT = 1
+
+# Fields of the inverted index (lookup keyword arguments).
+FIELDS = ["branch", "indicator", "periodicity", "location", "table", "has", "alias_token"]
+# Optional columns indexed under has=<column> when filled.
+FLAG_COLUMNS = ["api_url", "px_code"]
+
+PERIODICITY_BY_DATASET = {
+    "cnt": "quarterly",
+    "pnadct": "quarterly",
+    "pnadcm": "monthly",
+    "ipca": "monthly",
+    "ipca15": "monthly",
+    "inpc": "monthly",
+    "ipp": "monthly",
+    "pimpf": "monthly",
+    "pmc": "monthly",
+    "pms": "monthly",
+    "lspa": "monthly",
+}
+
+# National-level SIDRA queries (n1) carry no location in the series name.
+NATIONAL_LEVEL = "n1"
+LOCATION_NAMES = sorted({normalize_text(name) for name in ALIAS_RULES["location"]}, key=len, reverse=True)
+
+
+def index_dir(source: Path) -> Path:
+    return source.with_name(f"{source.stem}.index")
+
+
+# --- Build ---
+
+def location_expr(name: pl.Expr) -> pl.Expr:
+    """
+    Location of each series: "brasil" for national queries, else the longest
+    location name in `name` (the normalized general_name).
+    """
+    # Whole words only: "para" (the state) must not match "Produto para pele".
+    named = _first_match([
+        (name.str.contains(r"\b" + location.replace(" ", r"\s+") + r"\b"), location)
+        for location in LOCATION_NAMES
+    ])
+    national = pl.col("api_url").str.extract(r"/(n\d+)/") == NATIONAL_LEVEL
+    return pl.when(national.fill_null(False)).then(pl.lit("brasil")).otherwise(named)
+
+
+def with_facets(df: pl.DataFrame) -> pl.DataFrame:
+    """The catalog plus the derived indicator, periodicity, location and table columns."""
+    indicator = pl.col("dataset").str.to_lowercase().str.replace(r"_\d+$", "")
+    # Normalized once up front; every branch of the location chain reads it.
+    name = normalize_text_expr(pl.col("general_name").fill_null("")).alias("_name")
+    return (
+        df.with_columns(name)
+        .with_columns(
+            indicator.alias("indicator"),
+            indicator.replace_strict(PERIODICITY_BY_DATASET, default="").alias("periodicity"),
+            location_expr(pl.col("_name")).alias("location"),
+            pl.col("api_url").str.extract(r"/t/(\d+)/").fill_null("").alias("table"),
+        )
+        .drop("_name")
+    )
+
+
+def _postings_frame(df: pl.DataFrame) -> pl.DataFrame:
+    """One (field, term, row) triple per indexed value."""
+    rows = pl.int_range(pl.len(), dtype=pl.UInt32).alias("row")
+    frames = []
+    for field in ["branch", "indicator", "periodicity", "location", "table"]:
+        frames.append(df.select(pl.lit(field).alias("field"), pl.col(field).str.to_lowercase().alias("term"), rows))
+    for column in FLAG_COLUMNS:
+        frames.append(df.select(pl.lit("has").alias("field"),
+                                pl.when(pl.col(column).is_not_null()).then(pl.lit(column)).alias("term"), rows))
+    frames.append(df.select(pl.lit("alias_token").alias("field"),
+                            pl.col("alias").str.to_lowercase().str.split("_").alias("term"), rows).explode("term"))
+    return (
+        pl.concat(frames)
+        .filter(pl.col("term").is_not_null() & (pl.col("term") != ""))
+        .unique()
+        .sort(["field", "term", "row"])
+    )
+
+
+def write_atomic(path: Path, write) -> None:
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def save_array(path: Path, values: np.ndarray) -> None:
+    def write(tmp_path: Path) -> None:
+        # Through a file object: np.save(path) would append ".npy" to the tmp name
+        with open(tmp_path, "wb") as f:
+            np.save(f, values)
+    write_atomic(path, write)
+
+
+class PackedStrings(Sequence):
+    """
+    Strings stored as one UTF-8 blob plus an offsets array, both memory-mapped.
+    Items are decoded on access, so opening costs nothing and sorted blobs
+    can be searched with bisect.
+    """
+
+    def __init__(self, blob_path: Path, offsets_path: Path):
+        # np.memmap refuses empty files
+        self.blob = (np.memmap(blob_path, dtype=np.uint8, mode="r") if blob_path.stat().st_size
+                     else np.zeros(0, dtype=np.uint8))
+        self.offsets = np.load(offsets_path, mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+
+def save_strings(blob_path: Path, offsets_path: Path, values: List[str]) -> None:
+    """Writes `values` in the PackedStrings layout."""
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    write_atomic(blob_path, lambda p: Path(p).write_bytes(b"".join(encoded)))
+    save_array(offsets_path, offsets)
+
+
+def build_index(source: Path = MASTER_CATALOG_FILE) -> Path:
+    """Builds the index directory of a catalog parquet; returns its path."""
+    source = Path(source)
+    stat = source.stat()
+    target = index_dir(source)
+    target.mkdir(parents=True, exist_ok=True)
+
+    df = with_facets(pl.read_parquet(source))
+    write_atomic(target / "catalog.arrow", lambda p: df.write_ipc(p, compression="uncompressed"))
+
+    postings = _postings_frame(df)
+    groups = postings.group_by(["field", "term"], maintain_order=True).len()
+    ends = np.cumsum(groups["len"].to_numpy())
+    terms: Dict[str, Dict[str, List[int]]] = {field: {} for field in FIELDS}
+    for field, term, start, end in zip(groups["field"].to_list(), groups["term"].to_list(),
+                                       (ends - groups["len"].to_numpy()).tolist(), ends.tolist()):
+        terms[field][term] = [start, end]
+    save_array(target / "postings.npy", postings["row"].to_numpy().astype(np.uint32))
+
+    aliases = (df.select(pl.col("alias").str.to_lowercase(), pl.int_range(pl.len(), dtype=pl.UInt32).alias("row"))
+               .filter(pl.col("alias").is_not_null()).sort(["alias", "row"]))
+    save_strings(target / "aliases.bin", target / "alias_offsets.npy", aliases["alias"].to_list())
+    save_array(target / "alias_rows.npy", aliases["row"].to_numpy())
+
+    # Written last: a directory without an up-to-date terms.json is rebuilt.
+    meta = {
+        "format": INDEX_FORMAT,
+        "source": source.name,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": file_digest(source),
+        "rows": df.height,
+        "terms": terms,
+    }
+    write_atomic(target / "terms.json", lambda p: Path(p).write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8"))
+    print(f"Indexed {df.height} series ({sum(len(t) for t in terms.values())} terms) into {target}")
+    return target
+
+
+def _load_meta(target: Path) -> Dict:
+    meta_file = target / "terms.json"
+    if not meta_file.exists():
+        return {}
+    with open(meta_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def ensure_index(source: Path = MASTER_CATALOG_FILE, rebuild: bool = False) -> Dict:
+    """The index metadata of `source`, (re)building the index when it is stale."""
+    source = Path(source)
+    stat = source.stat()
+    target = index_dir(source)
+    meta = _load_meta(target)
+    if not rebuild and meta.get("format") == INDEX_FORMAT:
+        if meta.get("mtime_ns") == stat.st_mtime_ns and meta.get("size") == stat.st_size:
+            return meta
+        if meta.get("sha256") == file_digest(source):
+            # Touched but unchanged: remember the new mtime and keep the index.
+            meta.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            write_atomic(target / "terms.json",
+                          lambda p: Path(p).write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8"))
+            return meta
+    build_index(source)
+    return _load_meta(target)
+
+
+# --- Query ---
+
+class CatalogIndex:
+    """Inverted index and memory-mapped rows of one catalog parquet."""
+
+    def __init__(self, target: Path, meta: Dict):
+        self.path = target
+        self.rows = meta["rows"]
+        self.terms: Dict[str, Dict[str, List[int]]] = meta["terms"]
+        self.postings = np.load(target / "postings.npy", mmap_mode="r")
+        self._aliases = PackedStrings(target / "aliases.bin", target / "alias_offsets.npy")
+        self._alias_rows = np.load(target / "alias_rows.npy", mmap_mode="r")
+        self._table: Optional[pl.DataFrame] = None
+
+    @classmethod
+    def open(cls, source: Path = MASTER_CATALOG_FILE, rebuild: bool = False) -> "CatalogIndex":
+        meta = ensure_index(Path(source), rebuild=rebuild)
+        return cls(index_dir(Path(source)), meta)
+
+    @property
+    def table(self) -> pl.DataFrame:
+        """The catalog, memory-mapped (pages are read only when rows are touched)."""
+        if self._table is None:
+            # Uncompressed IPC is memory-mapped by Polars by default
+            self._table = pl.read_ipc(self.path / "catalog.arrow")
+        return self._table
+
+    def values(self, field: str) -> List[str]:
+        """Indexed terms of a field, e.g. values("indicator")."""
+        return sorted(self.terms[field])
+
+    def postings_for(self, field: str, term: str) -> np.ndarray:
+        if field not in self.terms:
+            raise KeyError(f"Unknown index field '{field}' (expected one of {FIELDS})")
+        span = self.terms[field].get(str(term).lower())
+        return self.postings[span[0]:span[1]] if span else np.zeros(0, dtype=np.uint32)
+
+    def alias_prefix(self, prefix: str, limit: Optional[int] = None) -> np.ndarray:
+        """Rows whose alias starts with `prefix`, in alias order."""
+        prefix = prefix.lower()
+        lo = bisect.bisect_left(self._aliases, prefix)
+        hi = lo
+        end = len(self._aliases) if limit is None else min(len(self._aliases), lo + limit)
+        while hi < end and self._aliases[hi].startswith(prefix):
+            hi += 1
+        return np.asarray(self._alias_rows[lo:hi])
+
+    def lookup(self, alias_prefix: Optional[str] = None, alias_tokens: Iterable[str] = (),
+               **facets: str) -> np.ndarray:
+        """
+        Sorted row ids matching every condition: facet=value pairs (see FIELDS),
+        alias tokens (all must appear) and an alias prefix.
+        """
+        candidates = [self.postings_for(field, value) for field, value in facets.items()]
+        candidates += [self.postings_for("alias_token", token) for token in alias_tokens]
+        if alias_prefix is not None:
+            candidates.append(np.sort(self.alias_prefix(alias_prefix)))
+        if not candidates:
+            return np.arange(self.rows, dtype=np.uint32)
+        # Smallest posting list first keeps every intersection small.
+        candidates.sort(key=len)
+        result = np.asarray(candidates[0])
+        for rows in candidates[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, rows, assume_unique=True)
+        return result
+
+    def fetch(self, rows: np.ndarray, columns: Optional[List[str]] = None) -> pl.DataFrame:
+        table = self.table if columns is None else self.table.select(columns)
+        return table[np.asarray(rows, dtype=np.int64)]
+
+    def query(self, columns: Optional[List[str]] = None, alias_prefix: Optional[str] = None,
+              alias_tokens: Iterable[str] = (), **facets: str) -> pl.DataFrame:
+        """Catalog rows matching lookup(...), as a DataFrame."""
+        return self.fetch(self.lookup(alias_prefix, alias_tokens, **facets), columns)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Build or query the series catalog index.")
+    parser.add_argument("--source", type=Path, default=MASTER_CATALOG_FILE, help="Catalog parquet")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index even if it is up to date")
+    parser.add_argument("--prefix", help="Alias prefix to search")
+    parser.add_argument("--where", nargs="*", default=[], metavar="FIELD=VALUE",
+                        help=f"Facet conditions, fields: {', '.join(FIELDS)}")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    index = CatalogIndex.open(args.source, rebuild=args.rebuild)
+    if args.prefix is None and not args.where:
+        print(f"{index.rows} series indexed in {index.path}")
+        return
+    facets = dict(condition.split("=", 1) for condition in args.where)
+    rows = index.lookup(args.prefix, **facets)
+    print(f"{len(rows)} series match")
+    with pl.Config(fmt_str_lengths=80, tbl_rows=args.limit):
+        print(index.fetch(rows[:args.limit], ["alias", "branch", "indicator", "location", "api_url"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Shared multi-pattern matchers for the IBGE catalog alias scripts.
+
+classify_ibge_series, create_semantic_aliases and generate_aliases all look
+for a list of literal names (indicators, locations, economic keywords) in each
+series description. The matchers are built once per rule family at import
+time instead of re-sorting / re-searching the rule lists for every row.
+
+- KeywordMatcher compiles a whole keyword dictionary into one Aho-Corasick
+  automaton, so each text is scanned once instead of once per regex.
+- LongestMatcher answers "longest name contained in the text". For these
+  short lists (~20-50 names), ordered `in` checks run in C and beat a
+  Python-level automaton walk; see benchmark_catalog_matcher.py.
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# Characters with a special meaning in `re` patterns. Rule entries containing
+# them cannot be matched literally.
+_REGEX_METACHARACTERS = set('.^$*+?{}[]\\|()')
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over a fixed list of literal patterns.
+
+    Matches are reported as indices into the original pattern list, so callers
+    can keep whatever priority the list order encodes.
+    """
+
+    def __init__(self, patterns: Sequence[str], ignore_case: bool = False):
+        self.patterns = list(patterns)
+        self.ignore_case = ignore_case
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+
+        for index, pattern in enumerate(self.patterns):
+            if not pattern:
+                raise ValueError("Empty patterns cannot be matched")
+            self._add(pattern.lower() if ignore_case else pattern, index)
+        self._build_failure_links()
+
+    def _add(self, pattern: str, index: int) -> None:
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+                self._goto[node][char] = next_node
+            node = next_node
+        self._out[node] += (index,)
+
+    def _build_failure_links(self) -> None:
+        # Breadth-first, so the failure target of a node is always finished first.
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] += self._out[self._fail[child]]
+
+    def found(self, text: str) -> Set[int]:
+        """Indices of all patterns that occur anywhere in the text."""
+        if self.ignore_case:
+            text = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Set[int] = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+class LongestMatcher:
+    """
+    Finds the longest rule entry contained in a text.
+
+    Same result as the loop the alias scripts used before:
+        for name in sorted(names, key=len, reverse=True):
+            if name in text: return name
+    i.e. ties between equally long names go to the one listed first.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self.names = list(names)
+        if not all(self.names):
+            raise ValueError("Empty names cannot be matched")
+        # Sorted once; the sort is stable, so equal lengths keep their list order.
+        self.by_length = sorted(self.names, key=len, reverse=True)
+
+    def longest(self, text: str) -> Optional[str]:
+        for name in self.by_length:
+            if name in text:
+                return name
+        return None
+
+
+class KeywordMatcher:
+    """
+    Reports which families of a keyword dictionary ({family: [keywords]}) appear in a text.
+
+    The keywords may be written as regex strings (as in ECONOMIC_KEYWORDS) but
+    must be plain literals; anything using regex syntax is rejected up front.
+    """
+
+    def __init__(self, families: Dict[str, Sequence[str]], ignore_case: bool = False):
+        patterns: List[str] = []
+        self._family_of: List[str] = []
+        for family, keywords in families.items():
+            for keyword in keywords:
+                if _REGEX_METACHARACTERS & set(keyword):
+                    raise ValueError(f"Keyword {keyword!r} for {family} is not a literal string")
+                patterns.append(keyword)
+                self._family_of.append(family)
+        self._automaton = AhoCorasick(patterns, ignore_case=ignore_case)
+
+    def families(self, text: str) -> Set[str]:
+        return {self._family_of[index] for index in self._automaton.found(text)}
@@ -0,0 +1,338 @@
+"""
+Full-text search over the IBGE and BCB series catalogs.
+
+    python scripts/catalog_search.py "ipca alimentacao sao paulo 12m"
+
+    search = CatalogSearch.open()
+    search.search("pim veiculos sa", limit=10)   # [{source, key, title, api_url, score}, ...]
+
+Documents are the series of master_series_catalog.parquet (general_name,
+label and alias) and of the BCB catalogs (name). Text is tokenized with the
+accent folding of generate_aliases.normalize_text (normalize_text_expr when
+building, column-wise), aliases are split on "_", and results are ranked
+with BM25. Accents and case never matter ("alimentaçao" finds
+"alimentação"); query words that are not in the vocabulary at all (typos
+such as "pernambco") are expanded to the closest vocabulary terms by
+trigram similarity.
+
+The index lives in data/processed/catalog_search.index/ as plain .npy
+arrays (CSR postings, sorted vocabulary, trigram table) and packed strings
+for the result fields, all memory-mapped, so opening it takes a few
+milliseconds and a query touches only the postings of its terms. It is
+rebuilt when any source catalog changes.
+"""
+
+import json
+import math
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import polars as pl
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.catalog_index import MASTER_CATALOG_FILE, PackedStrings, save_array, save_strings, write_atomic
+from scripts.etl_manifest import file_digest
+from scripts.generate_aliases import normalize_text, normalize_text_expr
+
+# --- Configuration ---
+PROCESSED_DIR = PROJECT_ROOT / "data" / "processed"
+INDEX_DIR = PROCESSED_DIR / "catalog_search.index"
+INDEX_FORMAT = 1
+
+# BCB catalogs, by preference: (file, id column, name column). A series found
+# in several catalogs is indexed once, from the first.
+BCB_CATALOGS = [
+    (PROCESSED_DIR / "bcb_series_catalog.parquet", "series_id", "name"),
+    (PROCESSED_DIR / "bcb_catalog_from_api.parquet", "series_id", "name"),
+    (PROCESSED_DIR / "bcb_metadata_catalog.parquet", "series_number", "Nome completo"),
+]
+SOURCES = ["ibge", "bcb"]
+
+# SIDRA label boilerplate, identical in every label, left out of the index
+LABEL_BOILERPLATE = r"\s*-?\s*casas decimais:\s*padrão = \d+, máximo = \d+"
+TOKEN_PATTERN = r"[a-z0-9]+"
+
+# BM25
+K1 = 1.2
+B = 0.75
+# Fuzzy expansion of unknown query words
+# (a swapped letter pair, "infaltion", shares 5 of 13 trigrams with "inflation")
+FUZZY_MIN_SIMILARITY = 0.35
+FUZZY_MAX_EXPANSIONS = 3
+
+
+def tokenize(text: str) -> List[str]:
+    """Query-side tokenization, the same as the index's."""
+    return re.findall(TOKEN_PATTERN, normalize_text(text.replace("_", " ")))
+
+
+def trigrams(term: str) -> List[str]:
+    padded = f"${term}$"
+    return sorted({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+# --- Build ---
+
+def _bcb_documents() -> pl.DataFrame:
+    frames = []
+    for path, id_column, name_column in BCB_CATALOGS:
+        if not path.exists():
+            continue
+        frames.append(pl.read_parquet(path, columns=[id_column, name_column]).select(
+            pl.col(id_column).cast(pl.String).alias("key"),
+            pl.col(name_column).cast(pl.String).alias("title"),
+        ))
+    if not frames:
+        return pl.DataFrame(schema={"key": pl.String, "title": pl.String})
+    return pl.concat(frames).drop_nulls("key").unique("key", keep="first", maintain_order=True)
+
+
+def load_documents(master: Path = MASTER_CATALOG_FILE) -> pl.DataFrame:
+    """One row per searchable series: source, key, title, api_url and the indexed text."""
+    ibge = pl.read_parquet(master, columns=["alias", "general_name", "label", "api_url"]).select(
+        pl.lit("ibge").alias("source"),
+        pl.col("alias").fill_null("").alias("key"),
+        pl.col("general_name").fill_null("").alias("title"),
+        pl.col("api_url"),
+        pl.concat_str([
+            pl.col("general_name").fill_null(""),
+            pl.col("label").fill_null("").str.replace_all(LABEL_BOILERPLATE, ""),
+            pl.col("alias").fill_null("").str.replace_all("_", " "),
+        ], separator=" ").alias("text"),
+    )
+    bcb = _bcb_documents().select(
+        pl.lit("bcb").alias("source"),
+        pl.col("key"),
+        pl.col("title").fill_null(""),
+        pl.format("https://api.bcb.gov.br/dados/serie/bcdata.sgs.{}/dados?formato=json", "key").alias("api_url"),
+        pl.col("title").fill_null("").alias("text"),
+    )
+    return pl.concat([ibge, bcb])
+
+
+def source_files() -> List[Path]:
+    return [MASTER_CATALOG_FILE] + [path for path, _, _ in BCB_CATALOGS if path.exists()]
+
+
+def _fingerprints(sources: List[Path]) -> Dict[str, Dict]:
+    return {
+        path.name: {"mtime_ns": path.stat().st_mtime_ns, "size": path.stat().st_size}
+        for path in sources
+    }
+
+
+def build_index(target: Path = INDEX_DIR) -> Path:
+    """Builds the search index of the current catalogs; returns its directory."""
+    target.mkdir(parents=True, exist_ok=True)
+    sources = source_files()
+    fingerprints = _fingerprints(sources)
+    docs = load_documents()
+
+    tokens = (
+        docs.select(
+            pl.int_range(pl.len(), dtype=pl.UInt32).alias("doc"),
+            normalize_text_expr(pl.col("text")).str.extract_all(TOKEN_PATTERN).alias("term"),
+        )
+        .explode("term")
+        .drop_nulls("term")
+    )
+    doc_len = (tokens.group_by("doc").len()
+               .join(pl.DataFrame({"doc": pl.int_range(docs.height, dtype=pl.UInt32, eager=True)}), on="doc", how="right")
+               .sort("doc")["len"].fill_null(0).to_numpy().astype(np.float32))
+
+    vocab = tokens["term"].unique().sort()
+    postings = (
+        tokens.group_by(["term", "doc"]).len()
+        .join(pl.DataFrame({"term": vocab, "term_id": pl.int_range(len(vocab), dtype=pl.UInt32, eager=True)}), on="term")
+        .sort(["term_id", "doc"])
+    )
+    term_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(postings["term_id"].to_numpy(), minlength=len(vocab)), out=term_offsets[1:])
+
+    vocab_list = vocab.to_list()
+    width = max((len(term) for term in vocab_list), default=1)
+    save_array(target / "vocab.npy", np.array(vocab_list, dtype=f"S{width}"))
+    save_array(target / "term_offsets.npy", term_offsets)
+    save_array(target / "post_docs.npy", postings["doc"].to_numpy().astype(np.uint32))
+    save_array(target / "post_tf.npy", np.minimum(postings["len"].to_numpy(), 65535).astype(np.uint16))
+    save_array(target / "doc_len.npy", doc_len)
+
+    # Trigram -> vocabulary terms, for fuzzy matching of unknown words
+    pairs = sorted((gram, term_id) for term_id, term in enumerate(vocab_list) for gram in trigrams(term))
+    grams = [gram for gram, _ in pairs]
+    unique_grams, first = np.unique(np.array(grams, dtype="S3"), return_index=True)
+    save_array(target / "trigrams.npy", unique_grams)
+    save_array(target / "trigram_offsets.npy", np.append(first, len(pairs)).astype(np.int64))
+    save_array(target / "trigram_terms.npy", np.array([term_id for _, term_id in pairs], dtype=np.uint32))
+    save_array(target / "term_trigrams.npy", np.array([len(trigrams(t)) for t in vocab_list], dtype=np.uint8))
+
+    save_array(target / "doc_source.npy", docs["source"].replace_strict({s: i for i, s in enumerate(SOURCES)},
+                                                                       return_dtype=pl.UInt8).to_numpy())
+    for field in ["key", "title", "api_url"]:
+        save_strings(target / f"{field}.bin", target / f"{field}_offsets.npy", docs[field].fill_null("").to_list())
+
+    # Written last: a directory without an up-to-date meta.json is rebuilt.
+    meta = {
+        "format": INDEX_FORMAT,
+        "documents": docs.height,
+        "terms": len(vocab_list),
+        "avg_doc_len": float(doc_len.mean()) if docs.height else 0.0,
+        "sources": {name: {**fp, "sha256": file_digest(path)}
+                    for (name, fp), path in zip(fingerprints.items(), sources)},
+    }
+    write_atomic(target / "meta.json", lambda p: Path(p).write_text(json.dumps(meta, indent=2), encoding="utf-8"))
+    print(f"Indexed {docs.height} series ({len(vocab_list)} terms) into {target}")
+    return target
+
+
+def _load_meta(target: Path) -> Dict:
+    meta_file = target / "meta.json"
+    if not meta_file.exists():
+        return {}
+    with open(meta_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _is_current(meta: Dict, sources: List[Path]) -> bool:
+    known = meta.get("sources", {})
+    if meta.get("format") != INDEX_FORMAT or set(known) != {path.name for path in sources}:
+        return False
+    for path in sources:
+        stat = path.stat()
+        entry = known[path.name]
+        if (entry["mtime_ns"], entry["size"]) != (stat.st_mtime_ns, stat.st_size) and entry["sha256"] != file_digest(path):
+            return False
+    return True
+
+
+# --- Query ---
+
+class CatalogSearch:
+    """BM25 + trigram search over a built index directory (memory-mapped)."""
+
+    def __init__(self, target: Path = INDEX_DIR, meta: Optional[Dict] = None):
+        meta = meta or _load_meta(target)
+        self.path = target
+        self.documents = meta["documents"]
+        self.avg_doc_len = meta["avg_doc_len"] or 1.0
+
+        def load(name: str) -> np.ndarray:
+            return np.load(target / f"{name}.npy", mmap_mode="r")
+
+        self.vocab = load("vocab")
+        self.term_offsets = load("term_offsets")
+        self.post_docs = load("post_docs")
+        self.post_tf = load("post_tf")
+        self.doc_len = load("doc_len")
+        self.trigrams = load("trigrams")
+        self.trigram_offsets = load("trigram_offsets")
+        self.trigram_terms = load("trigram_terms")
+        self.term_trigrams = load("term_trigrams")
+        self.doc_source = load("doc_source")
+        self.fields = {field: PackedStrings(target / f"{field}.bin", target / f"{field}_offsets.npy")
+                       for field in ["key", "title", "api_url"]}
+
+    @classmethod
+    def open(cls, target: Path = INDEX_DIR, rebuild: bool = False) -> "CatalogSearch":
+        """The search index, built first if missing or older than the catalogs."""
+        meta = _load_meta(target)
+        if rebuild or not _is_current(meta, source_files()):
+            build_index(target)
+            meta = _load_meta(target)
+        return cls(target, meta)
+
+    def term_id(self, term: str) -> Optional[int]:
+        encoded = term.encode("ascii", "ignore")
+        i = int(np.searchsorted(self.vocab, encoded))
+        return i if i < len(self.vocab) and self.vocab[i] == encoded else None
+
+    def fuzzy_terms(self, term: str) -> List[Tuple[int, float]]:
+        """Vocabulary terms sharing the most trigrams with `term`: [(term_id, similarity)]."""
+        grams = [gram.encode("ascii", "ignore") for gram in trigrams(term)]
+        ids = []
+        for gram in grams:
+            i = int(np.searchsorted(self.trigrams, gram))
+            if i < len(self.trigrams) and self.trigrams[i] == gram:
+                ids.append(self.trigram_terms[self.trigram_offsets[i]:self.trigram_offsets[i + 1]])
+        if not ids:
+            return []
+        candidates, shared = np.unique(np.concatenate(ids), return_counts=True)
+        # Jaccard similarity of the trigram sets
+        similarity = shared / (len(grams) + self.term_trigrams[candidates].astype(np.float64) - shared)
+        best = np.argsort(-similarity, kind="stable")[:FUZZY_MAX_EXPANSIONS]
+        return [(int(candidates[i]), float(similarity[i])) for i in best if similarity[i] >= FUZZY_MIN_SIMILARITY]
+
+    def expand(self, query: str) -> List[Tuple[int, float]]:
+        """Query words -> [(term_id, weight)]: exact terms, else their fuzzy matches."""
+        expanded = []
+        for word in dict.fromkeys(tokenize(query)):
+            term_id = self.term_id(word)
+            expanded.extend([(term_id, 1.0)] if term_id is not None else self.fuzzy_terms(word))
+        return expanded
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for `query` (0 where no term matches)."""
+        scores = np.zeros(self.documents, dtype=np.float32)
+        for term_id, weight in self.expand(query):
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            docs = self.post_docs[start:end]
+            tf = self.post_tf[start:end].astype(np.float32)
+            idf = math.log(1 + (self.documents - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = K1 * (1 - B + B * self.doc_len[docs] / self.avg_doc_len)
+            # A term's postings hold each document once, so plain fancy-index += is exact
+            scores[docs] += weight * idf * tf * (K1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query: str, limit: int = 10, source: Optional[str] = None) -> List[Dict]:
+        """Best `limit` series for `query`, optionally from one source ("ibge" or "bcb")."""
+        scores = self.scores(query)
+        if source is not None:
+            scores[self.doc_source != SOURCES.index(source)] = 0
+        hits = np.flatnonzero(scores)
+        if len(hits) > limit:
+            hits = hits[np.argpartition(-scores[hits], limit - 1)[:limit]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [
+            {
+                "source": SOURCES[self.doc_source[doc]],
+                "key": self.fields["key"][doc],
+                "title": self.fields["title"][doc],
+                "api_url": self.fields["api_url"][doc] or None,
+                "score": round(float(scores[doc]), 4),
+            }
+            for doc in hits.tolist()
+        ]
+
+
+def main():
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Search the IBGE and BCB series catalogs.")
+    parser.add_argument("query", nargs="?", help="Search words (accents and case do not matter)")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--source", choices=SOURCES, help="Only series from this catalog")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index even if it is up to date")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    search = CatalogSearch.open(rebuild=args.rebuild)
+    opened = time.perf_counter()
+    if not args.query:
+        print(f"{search.documents} series indexed in {search.path} (opened in {(opened - started) * 1e3:.1f} ms)")
+        return
+    results = search.search(args.query, limit=args.limit, source=args.source)
+    elapsed = time.perf_counter() - opened
+    for result in results:
+        print(f"{result['score']:8.3f}  [{result['source']}] {result['key']}\n          {result['title']}")
+    print(f"\n{len(results)} results in {elapsed * 1e3:.1f} ms (index opened in {(opened - started) * 1e3:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
 import polars as pl
-import pandas as pd
 from pathlib import Path
 import re
+import sys
 import unicodedata
 
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.catalog_matcher import KeywordMatcher
+from scripts.excel_cache import read_excel_cached
+
 # --- Configuration ---
 INPUT_FILE = Path(__file__).parent.parent / "data" / "raw" / "IBGE catalog" / "IBGE_series_catalog.xlsx"
 OUTPUT_FILE = Path(__file__).parent.parent / "data" / "processed" / "classified_ibge_catalog.parquet"
@@ -29,6 +36,9 @@ ECONOMIC_KEYWORDS = {
     "SERVICES": [r'serviços'],
 }
 
+# All keyword families compiled into one automaton, so each text is scanned once.
+KEYWORD_MATCHER = KeywordMatcher(ECONOMIC_KEYWORDS, ignore_case=True)
+
 def normalize_text(text: str) -> str:
     """
     Cleans and normalizes text for keyword matching.
@@ -59,19 +69,13 @@ def generate_alias(row: dict) -> str:
     
     normalized_text = normalize_text(text_to_search)
     
-    found_keywords = []
-    
-    # Search for each keyword in our dictionary
-    for alias_part, patterns in ECONOMIC_KEYWORDS.items():
-        for pattern in patterns:
-            if re.search(pattern, normalized_text, re.IGNORECASE):
-                found_keywords.append(alias_part)
-                break # Move to the next alias part once one pattern is found
+    # Every alias part with at least one keyword present in the text
+    found_keywords = KEYWORD_MATCHER.families(normalized_text)
                 
     if not found_keywords:
         return "UNCATEGORIZED"
         
-    return "_".join(sorted(list(set(found_keywords))))
+    return "_".join(sorted(found_keywords))
 
 def process_catalog():
     """
@@ -80,12 +84,9 @@ def process_catalog():
     print("Starting IBGE series classification...")
     
     try:
-        # Step 1: Read the Excel file robustly using pandas
+        # Step 1: Read the Excel file (parsed once and cached as Arrow, see excel_cache.py)
         print(f"Reading Excel file from: {INPUT_FILE}")
-        pd_df = pd.read_excel(INPUT_FILE, sheet_name=0)
-        
-        # Convert to Polars DataFrame
-        df = pl.from_pandas(pd_df)
+        df = read_excel_cached(INPUT_FILE, sheet_name=0)
         print(f"Successfully read {df.shape[0]} rows and {df.shape[1]} columns.")
 
         # Step 2: Generate the economic alias for each row
@@ -116,8 +117,11 @@ def process_catalog():
         
     except FileNotFoundError:
         print(f"Error: Input file not found at {INPUT_FILE}")
+        raise
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
+        # Re-raise so run_etl.py sees the failure and does not record the step as done
+        raise
 
 if __name__ == "__main__":
     process_catalog()
@@ -0,0 +1,145 @@
+"""
+Spec-driven Excel -> JSON converter for the indicator pages.
+
+Each indicator is described by a TOML file in scripts/indicator_specs/
+(workbooks relative to the repository root, the sheet -> JSON key map of
+each workbook, how its date column is parsed, column renames and the
+frontend metadata) instead of a hand-written script with hard-coded paths:
+
+    python scripts/convert_indicators.py                 # every spec
+    python scripts/convert_indicators.py ipca15 --workers 1
+
+Every workbook is opened once and all of its sheets are parsed from that
+handle; indicators are converted in parallel worker processes. The output
+is frontend/public/data/<output>, written by frame_json.write_indicator_json.
+
+PIM, PMC and PMS are not covered: their R scripts (scripts/R/*_update.R)
+download the SIDRA tables directly and there is no workbook to convert.
+"""
+
+import argparse
+import sys
+import time
+import tomllib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.frame_json import DATE_KEY, dates_first, format_dates, parse_month_year, write_indicator_json
+
+# --- Configuration ---
+SPEC_DIR = PROJECT_ROOT / "scripts" / "indicator_specs"
+OUTPUT_DIR = PROJECT_ROOT / "frontend" / "public" / "data"
+
+DATE_PARSERS = ("iso", "month_year")
+
+
+def load_spec(name: str, spec_dir: Path = SPEC_DIR) -> Dict:
+    path = spec_dir / f"{name}.toml"
+    with open(path, "rb") as f:
+        spec = tomllib.load(f)
+    spec.setdefault("name", name)
+    for workbook in spec.get("workbooks", []):
+        parser = workbook.get("date_parser", "iso")
+        if parser not in DATE_PARSERS:
+            raise ValueError(f"{path}: unknown date_parser '{parser}' (expected one of {DATE_PARSERS})")
+    return spec
+
+
+def available_specs(spec_dir: Path = SPEC_DIR) -> List[str]:
+    return sorted(p.stem for p in spec_dir.glob("*.toml"))
+
+
+def convert_sheet(df: pd.DataFrame, workbook: Dict) -> pd.DataFrame:
+    """Date column -> ISO data_date (first column), then the spec's column renames."""
+    date_column = workbook.get("date_column", DATE_KEY)
+    if date_column in df.columns:
+        if workbook.get("date_parser", "iso") == "month_year":
+            dates = parse_month_year(df[date_column], day=workbook.get("date_day", 1))
+        else:
+            dates = format_dates(df[date_column])
+        df = df.drop(columns=[date_column]).assign(**{DATE_KEY: dates})
+        df = dates_first(df)
+
+    for old, new in workbook.get("replace_in_columns", {}).items():
+        df.columns = [c.replace(old, new) for c in df.columns]
+    return df.rename(columns=workbook.get("rename_columns", {}))
+
+
+def read_workbook(workbook: Dict, root: Path = PROJECT_ROOT) -> Dict[str, pd.DataFrame]:
+    """All mapped sheets of one workbook, parsed from a single open handle."""
+    path = root / workbook["path"]
+    views = {}
+    with pd.ExcelFile(path) as xls:
+        for key, sheet_name in workbook["sheets"].items():
+            if sheet_name not in xls.sheet_names:
+                print(f"  Warning: Sheet '{sheet_name}' not found in {path.name}")
+                continue
+            views[key] = convert_sheet(xls.parse(sheet_name), workbook)
+            print(f"  - {path.name}/{sheet_name}: {len(views[key])} rows, {len(views[key].columns)} columns")
+    return views
+
+
+def convert_indicator(spec: Dict, output_dir: Path = OUTPUT_DIR, root: Path = PROJECT_ROOT) -> Path:
+    """Converts one indicator spec to its JSON file; returns the output path."""
+    print(f"Converting {spec['name']}...")
+    views: Dict[str, pd.DataFrame] = {}
+    for workbook in spec["workbooks"]:
+        try:
+            views.update(read_workbook(workbook, root))
+        except Exception as e:
+            if not workbook.get("optional", False):
+                raise
+            print(f"  Warning: Could not read {workbook['path']}: {e}")
+
+    metadata = {**spec.get("metadata", {}), "last_updated": datetime.now().isoformat()}
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_file = output_dir / spec.get("output", f"{spec['name']}.json")
+    write_indicator_json(output_file, views, metadata)
+    print(f"✅ Saved to {output_file}")
+
+    headline = spec.get("headline")
+    mom = views.get("mom")
+    if headline and mom is not None and not mom.empty:
+        latest = mom.iloc[-1]
+        print(f"   Último dado: {latest.get(DATE_KEY, 'N/A')} | {headline} MoM: {latest.get(headline, 'N/A')}%")
+    return output_file
+
+
+def _convert_by_name(name: str, output_dir: Path) -> Path:
+    return convert_indicator(load_spec(name), output_dir)
+
+
+def convert_all(names: Optional[List[str]] = None, output_dir: Path = OUTPUT_DIR,
+                workers: Optional[int] = None) -> List[Path]:
+    """Converts the named specs (default: all), in a process pool when there are several."""
+    names = names or available_specs()
+    for name in names:
+        load_spec(name)  # fail on a bad spec before starting any worker
+    if workers == 1 or len(names) == 1:
+        return [_convert_by_name(name, output_dir) for name in names]
+    with ProcessPoolExecutor(max_workers=workers or len(names)) as pool:
+        return list(pool.map(_convert_by_name, names, [output_dir] * len(names)))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Convert indicator workbooks to the frontend JSON files.")
+    parser.add_argument("indicators", nargs="*", help=f"Spec names (default: all of {SPEC_DIR.name}/)")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR, help="Where the JSON files are written")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per indicator)")
+    args = parser.parse_args(argv)
+
+    start = time.time()
+    outputs = convert_all(args.indicators, args.output_dir, args.workers)
+    print(f"\nConverted {len(outputs)} indicator(s) in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,16 @@ import polars as pl
 import pandas as pd
 from pathlib import Path
 import re
+import sys
 import unicodedata
 
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.catalog_matcher import LongestMatcher
+from scripts.excel_cache import read_excel_cached
+
 # --- Configuration ---
 INPUT_FILE = Path(__file__).parent.parent / "data" / "raw" / "IBGE catalog" / "IBGE_series_catalog.xlsx"
 OUTPUT_FILE = Path(__file__).parent.parent / "data" / "processed" / "semantic_aliased_catalog.parquet"
@@ -42,6 +50,10 @@ SEMANTIC_RULES = {
     ]
 }
 
+# Longest-name-first matchers (e.g. 'IPCA-15' before 'IPCA'), built once per run.
+INDICATOR_MATCHER = LongestMatcher(SEMANTIC_RULES["indicator"])
+LOCATION_MATCHER = LongestMatcher(SEMANTIC_RULES["location"])
+
 def slugify(text: str) -> str:
     """Normalizes a string to a URL-friendly 'slug'."""
     if not text: return ""
@@ -66,13 +78,11 @@ def parse_general_name(name: str) -> dict:
     # --- Extraction Pipeline ---
 
     # 1. Indicator (case-sensitive for acronyms)
-    # Sort by length to match longer names first (e.g., 'IPCA-15' before 'IPCA')
-    for indicator_pattern in sorted(SEMANTIC_RULES["indicator"], key=len, reverse=True):
-        if indicator_pattern in remaining_text:
-            components['indicator'] = slugify(indicator_pattern)
-            # Remove the found indicator to avoid re-matching
-            remaining_text = remaining_text.replace(indicator_pattern, '', 1)
-            break
+    indicator_pattern = INDICATOR_MATCHER.longest(remaining_text)
+    if indicator_pattern:
+        components['indicator'] = slugify(indicator_pattern)
+        # Remove the found indicator to avoid re-matching
+        remaining_text = remaining_text.replace(indicator_pattern, '', 1)
 
     # 2. Metric
     for key, metric_pattern in SEMANTIC_RULES["metric"].items():
@@ -91,11 +101,10 @@ def parse_general_name(name: str) -> dict:
             break
 
     # 4. Location
-    for loc_pattern in sorted(SEMANTIC_RULES["location"], key=len, reverse=True):
-        if loc_pattern in remaining_text:
-            components['location'] = slugify(loc_pattern)
-            remaining_text = remaining_text.replace(loc_pattern, '', 1)
-            break
+    loc_pattern = LOCATION_MATCHER.longest(remaining_text)
+    if loc_pattern:
+        components['location'] = slugify(loc_pattern)
+        remaining_text = remaining_text.replace(loc_pattern, '', 1)
             
     # 5. Sub-Item (what's left after removing everything else)
     # The sub-item is often what follows the '|' separator or a numerical code.
@@ -131,8 +140,7 @@ def process_catalog():
     print("Starting Semantic Alias generation...")
     
     try:
-        pd_df = pd.read_excel(INPUT_FILE, sheet_name=0)
-        df = pl.from_pandas(pd_df)
+        df = read_excel_cached(INPUT_FILE, sheet_name=0)
         print(f"Read {df.shape[0]} series from {INPUT_FILE}")
 
         new_aliases = []
@@ -169,6 +177,8 @@ def process_catalog():
 
     except Exception as e:
         print(f"An error occurred: {e}")
+        # Re-raise so run_etl.py sees the failure and does not record the step as done
+        raise
 
 if __name__ == "__main__":
     process_catalog()
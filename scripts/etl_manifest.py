@@ -0,0 +1,150 @@
+"""
+Content-hash manifest used by run_etl.py to skip steps whose inputs did not change.
+
+For every step we store a fingerprint built from the bytes of its input files,
+the rule dictionaries it reads (ALIAS_RULES, SEMANTIC_RULES, ...) and the
+source code of the module that implements it, together with the local modules
+it imports (scripts.catalog_matcher, scripts.excel_cache, ...). If the fingerprint of a new run
+matches the stored one and all outputs are still on disk, the step is skipped.
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CHUNK_SIZE = 1024 * 1024
+# Top-level packages whose modules are hashed as part of a step's code
+LOCAL_PACKAGES = ("scripts", "backend")
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file's contents, read in chunks so large workbooks stay cheap on memory."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def value_digest(value: object) -> str:
+    """SHA-256 of a JSON-serialisable value (dict key order does not matter)."""
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _module_path(name: str) -> Optional[Path]:
+    """Source file of a local module, or None for packages, attributes and third-party modules."""
+    if name.split(".")[0] not in LOCAL_PACKAGES:
+        return None
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not spec.origin or not spec.origin.endswith(".py"):
+        return None
+    return Path(spec.origin)
+
+
+def local_sources(module_name: str) -> Dict[str, Path]:
+    """
+    Source files of a module and of every local module it imports, directly or
+    through other local modules. Imports are read from the source, not executed.
+    """
+    sources: Dict[str, Path] = {}
+    pending: List[str] = [module_name]
+    while pending:
+        name = pending.pop()
+        if name in sources:
+            continue
+        path = _module_path(name) if name != module_name else Path(importlib.import_module(name).__file__)
+        if path is None:
+            continue
+        sources[name] = path
+        for node in ast.walk(ast.parse(path.read_text(encoding="utf-8"), filename=str(path))):
+            if isinstance(node, ast.Import):
+                pending.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                pending.append(node.module)
+                # `from scripts import timeseries` names a module, not an attribute
+                pending.extend(f"{node.module}.{alias.name}" for alias in node.names)
+    return sources
+
+
+def _input_key(path: Path) -> str:
+    """
+    Path relative to the project root (absolute outside of it), so inputs
+    with the same file name in different folders get separate digests.
+    """
+    resolved = Path(path).resolve()
+    try:
+        return resolved.relative_to(PROJECT_ROOT).as_posix()
+    except ValueError:
+        return resolved.as_posix()
+
+
+def step_fingerprint(target: str, inputs: Iterable[Path], rules: Iterable[str] = ()) -> Optional[str]:
+    """
+    Fingerprint of everything a step depends on.
+
+    ``target`` is the step's ``"module:function"`` string; the source of its
+    module and of the local modules it imports is hashed as the code version,
+    so editing e.g. catalog_matcher invalidates the steps using it. ``rules`` names module-level attributes to
+    include. Returns ``None`` when an input file is missing, so the step runs
+    and reports the problem itself.
+    """
+    module_name = target.split(":")[0]
+    module = importlib.import_module(module_name)
+
+    parts = {f"code:{name}": file_digest(path) for name, path in local_sources(module_name).items()}
+    for path in inputs:
+        if not path.exists():
+            return None
+        parts[f"file:{_input_key(path)}"] = file_digest(path)
+    for name in rules:
+        parts[f"rule:{name}"] = value_digest(getattr(module, name))
+
+    return value_digest(parts)
+
+
+class Manifest:
+    """JSON file mapping step name -> fingerprint of the inputs of its last successful run."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def is_fresh(self, name: str, fingerprint: Optional[str], outputs: Iterable[Path]) -> bool:
+        entry = self.entries.get(name)
+        if fingerprint is None or entry is None or entry.get("fingerprint") != fingerprint:
+            return False
+        return all(path.exists() for path in outputs)
+
+    def record(self, name: str, fingerprint: Optional[str]) -> None:
+        if fingerprint is None:
+            return
+        self.entries[name] = {
+            "fingerprint": fingerprint,
+            "completed_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        self.save()
+
+    def save(self) -> None:
+        # Write to a temporary file first so an interrupted run never leaves a truncated manifest.
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,101 @@
+"""
+Columnar cache for Excel workbooks that several ETL steps read.
+
+Parsing IBGE_series_catalog.xlsx with openpyxl dominates the runtime of the
+IBGE catalog steps. read_excel_cached() parses a sheet once, stores it as an
+uncompressed Arrow IPC file in data/cache/ and memory-maps that file (the
+Polars default for IPC) on every later call. The cache is keyed by the
+workbook's mtime and size (cheap check) and its SHA-256 (so a
+touched-but-identical file is not re-parsed).
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Union
+
+import pandas as pd
+import polars as pl
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.etl_manifest import file_digest
+
+# --- Configuration ---
+CACHE_DIR = PROJECT_ROOT / "data" / "cache"
+IBGE_CATALOG_FILE = PROJECT_ROOT / "data" / "raw" / "IBGE catalog" / "IBGE_series_catalog.xlsx"
+
+
+def cache_path(source: Path, sheet_name: Union[int, str] = 0) -> Path:
+    """Location of the Arrow file caching one sheet of a workbook."""
+    return CACHE_DIR / f"{source.stem}.{sheet_name}.arrow"
+
+
+def _meta_path(cached: Path) -> Path:
+    return cached.with_suffix(".json")
+
+
+def _load_meta(cached: Path) -> dict:
+    meta_file = _meta_path(cached)
+    if not (cached.exists() and meta_file.exists()):
+        return {}
+    with open(meta_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_meta(cached: Path, meta: dict) -> None:
+    tmp_path = _meta_path(cached).with_suffix(f".json.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, _meta_path(cached))
+
+
+def read_excel_cached(source: Path, sheet_name: Union[int, str] = 0) -> pl.DataFrame:
+    """
+    Same result as pl.from_pandas(pd.read_excel(source, sheet_name=sheet_name)),
+    parsed at most once per workbook version.
+    """
+    source = Path(source)
+    stat = source.stat()  # Raises FileNotFoundError like pd.read_excel would
+    cached = cache_path(source, sheet_name)
+    meta = _load_meta(cached)
+
+    if meta.get("mtime_ns") == stat.st_mtime_ns and meta.get("size") == stat.st_size:
+        return pl.read_ipc(cached)
+
+    digest = file_digest(source)
+    if meta.get("sha256") == digest:
+        # Touched but unchanged: remember the new mtime and reuse the cache.
+        _write_meta(cached, {**meta, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size})
+        return pl.read_ipc(cached)
+
+    print(f"Parsing {source.name} (sheet {sheet_name}) into the columnar cache...")
+    df = pl.from_pandas(pd.read_excel(source, sheet_name=sheet_name))
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # Uncompressed so readers can memory-map it; written aside and renamed so
+    # a concurrent reader never sees a half-written file.
+    tmp_path = cached.with_suffix(f".{os.getpid()}.tmp")
+    df.write_ipc(tmp_path, compression="uncompressed")
+    os.replace(tmp_path, cached)
+    _write_meta(cached, {
+        "source": str(source),
+        "sheet_name": sheet_name,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": digest,
+    })
+    return df
+
+
+def warm_ibge_catalog() -> None:
+    """ETL step: parse the IBGE catalog once before the steps that read it start."""
+    df = read_excel_cached(IBGE_CATALOG_FILE)
+    print(f"IBGE catalog cache ready: {df.shape[0]} rows at {cache_path(IBGE_CATALOG_FILE)}")
+
+
+if __name__ == "__main__":
+    warm_ibge_catalog()
@@ -0,0 +1,248 @@
+"""
+Compact export of the indicator JSON files for the frontend.
+
+The R ETL writes frontend/public/data/{ipca,ipca15,pim,pmc,pms}.json as
+indented, row-oriented records (every row repeats every column name), which
+makes pim.json alone 2.4 MB. This stage rewrites each view of each indicator
+as its own minified, columnar file:
+
+    frontend/public/data/compact/pim/mom.json
+    {"dates": ["2002-01-01", ...], "series": {"1 Indústria geral": [null, ...], ...}}
+
+plus a manifest.json with the metadata of every indicator and the SHA-256 and
+sizes of every file. The indicator pages import these views (and the metadata
+from the manifest) through frontend/src/lib/indicator-data.ts, so the pages
+bundle the compact files instead of the full ones.
+
+The chat route and the flash report generator only need recent data and read
+compact/<indicator>_latest.json (same layout as the full file, last
+LATEST_PERIODS rows of each view). compact/deltas/<indicator>_<date>.json lists
+only the rows added or revised since the previous export.
+
+Every file also gets a precompressed .gz (and .br, when the brotli package is
+installed) sibling, for static hosting that serves precompressed files; the
+Next.js app itself does not read them.
+
+The indicator files are read through scripts/timeseries.py, like everywhere
+else, so numpy is required; brotli is optional.
+"""
+
+import gzip
+import hashlib
+import json
+import math
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # Optional: .br siblings are skipped without it
+    brotli = None
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts import timeseries
+
+DATA_DIR = timeseries.DATA_DIR
+COMPACT_DIR = DATA_DIR / "compact"
+MANIFEST_FILE = COMPACT_DIR / "manifest.json"
+DELTA_DIR = COMPACT_DIR / "deltas"
+
+INDICATORS = timeseries.INDICATORS
+DATE_KEY = timeseries.DATE_KEY
+# Enough for a 12-month chart plus the same month of the previous year
+LATEST_PERIODS = 24
+
+
+def load_indicator(name: str, data_dir: Path = DATA_DIR) -> Optional[timeseries.Indicator]:
+    """The full row-oriented <name>.json written by the R ETL."""
+    path = data_dir / f"{name}.json"
+    if not path.exists():
+        return None
+    return timeseries.read_json(path)
+
+
+def _cell(value: float):
+    """JSON value of a Dataset cell: null when missing, an int when integer-valued (as the R files write it)."""
+    if math.isnan(value):
+        return None
+    return int(value) if value.is_integer() else value
+
+
+def to_columnar(dataset: timeseries.Dataset) -> Dict:
+    """A view as {"dates": [...], "series": {"a": [...], "b": [...]}}, null where missing."""
+    return {
+        "dates": dataset.dates,
+        "series": {name: [_cell(value) for value in dataset.column(name).tolist()] for name in dataset.names},
+    }
+
+
+def to_records(columnar: Dict, last: int) -> List[Dict]:
+    """The last `last` rows of a columnar view in the row-oriented layout."""
+    dates = columnar["dates"][-last:]
+    series = {name: values[-last:] for name, values in columnar["series"].items()}
+    return [{DATE_KEY: date, **{name: values[i] for name, values in series.items()}} for i, date in enumerate(dates)]
+
+
+def load_columnar(path: Path) -> Optional[Dict]:
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def changed_rows(previous: Optional[Dict], current: Dict) -> Tuple[List[Dict], int, int]:
+    """
+    Rows of the columnar view `current` that are new or differ from
+    `previous`, as row-oriented records, plus the added and revised counts.
+    """
+    if previous is None:
+        return [], 0, 0
+    previous_index = {date: i for i, date in enumerate(previous["dates"])}
+    previous_series = previous["series"]
+    rows, added, revised = [], 0, 0
+    for i, date in enumerate(current["dates"]):
+        values = {name: column[i] for name, column in current["series"].items()}
+        j = previous_index.get(date)
+        if j is None:
+            added += 1
+        elif any(previous_series.get(name, [None] * (j + 1))[j] != value for name, value in values.items()):
+            revised += 1
+        else:
+            continue
+        rows.append({DATE_KEY: date, **values})
+    return rows, added, revised
+
+
+def dumps_compact(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _write_if_changed(path: Path, payload: bytes) -> None:
+    """Atomic write that leaves the file (and its mtime) alone when unchanged."""
+    if path.exists() and path.read_bytes() == payload:
+        return
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(payload)
+    os.replace(tmp_path, path)
+
+
+def write_artifact(path: Path, payload: bytes) -> Dict:
+    """Writes `payload` plus its compressed siblings; returns the manifest entry."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _write_if_changed(path, payload)
+    entry = {
+        "file": path.relative_to(COMPACT_DIR).as_posix(),
+        "sha256": hashlib.sha256(payload).hexdigest(),
+        "bytes": len(payload),
+    }
+    # mtime=0 keeps the .gz byte-identical across runs for identical data
+    gz_payload = gzip.compress(payload, compresslevel=9, mtime=0)
+    _write_if_changed(path.with_name(path.name + ".gz"), gz_payload)
+    entry["gzip_bytes"] = len(gz_payload)
+    if brotli is not None:
+        br_payload = brotli.compress(payload, quality=11)
+        _write_if_changed(path.with_name(path.name + ".br"), br_payload)
+        entry["br_bytes"] = len(br_payload)
+    return entry
+
+
+def write_delta(name: str, delta: Dict[str, List[Dict]], metadata: Dict) -> Dict:
+    """
+    Writes today's delta file of an indicator. A second export on the same
+    day is merged into the existing file, the newer row winning.
+    """
+    path = DELTA_DIR / f"{name}_{datetime.now().strftime('%Y-%m-%d')}.json"
+    existing = load_columnar(path) or {}
+    views = existing.get("views", {})
+    for view, rows in delta.items():
+        merged = {row[DATE_KEY]: row for row in views.get(view, [])}
+        merged.update((row[DATE_KEY], row) for row in rows)
+        views[view] = [merged[date] for date in sorted(merged)]
+    payload = {"indicator": name, "last_updated": metadata.get("last_updated"), "views": views}
+    return write_artifact(path, dumps_compact(payload))
+
+
+def export_indicator(name: str, indicator: timeseries.Indicator) -> Dict:
+    """Writes the compact, latest and delta files of one indicator; returns its manifest section."""
+    views, delta, latest = {}, {}, {"metadata": indicator.metadata}
+    added = revised = 0
+    for view in indicator.views:
+        dataset = indicator[view]
+        columnar = to_columnar(dataset)
+        path = COMPACT_DIR / name / f"{view}.json"
+        view_rows, view_added, view_revised = changed_rows(load_columnar(path), columnar)
+        if view_rows:
+            delta[view] = view_rows
+            added, revised = added + view_added, revised + view_revised
+
+        entry = write_artifact(path, dumps_compact(columnar))
+        entry["rows"] = len(dataset)
+        entry["last_date"] = columnar["dates"][-1] if len(dataset) else None
+        views[view] = entry
+        latest[view] = to_records(columnar, LATEST_PERIODS)
+
+    section = {"metadata": indicator.metadata, "views": views}
+    section["latest"] = write_artifact(COMPACT_DIR / f"{name}_latest.json", dumps_compact(latest))
+    if delta:
+        print(f"  {name}: {added} rows added, {revised} revised since the previous export")
+        section["delta"] = write_delta(name, delta, indicator.metadata)
+    return section
+
+
+def load_manifest() -> Dict:
+    if not MANIFEST_FILE.exists():
+        return {}
+    with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def export_all(indicators: List[str] = INDICATORS) -> Dict:
+    previous = load_manifest()
+    manifest = {"generated_at": datetime.now().isoformat(timespec="seconds"), "indicators": {}}
+    for name in indicators:
+        indicator = load_indicator(name)
+        if indicator is None:
+            print(f"  [WARN] {name}.json not found, skipping")
+            continue
+        section = export_indicator(name, indicator)
+        manifest["indicators"][name] = section
+
+        original = (DATA_DIR / f"{name}.json").stat().st_size
+        compact = sum(v["bytes"] for v in section["views"].values())
+        gzipped = sum(v["gzip_bytes"] for v in section["views"].values())
+        if "delta" not in section:
+            # Keep pointing at the last delta written for this indicator
+            last_delta = previous.get("indicators", {}).get(name, {}).get("delta")
+            if last_delta:
+                section["delta"] = last_delta
+        print(f"  {name}: {original / 1024:,.0f} KB -> {compact / 1024:,.0f} KB compact, "
+              f"{gzipped / 1024:,.0f} KB gzip ({len(section['views'])} views)")
+
+    if previous.get("indicators") == manifest["indicators"]:
+        # Nothing changed: keep the old manifest so the data commit stays empty
+        return previous
+
+    COMPACT_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = MANIFEST_FILE.with_name(MANIFEST_FILE.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, MANIFEST_FILE)
+    return manifest
+
+
+def main():
+    print("Exporting compact indicator JSON...")
+    if brotli is None:
+        print("  (brotli not installed: writing .gz siblings only)")
+    export_all()
+    print(f"Manifest: {MANIFEST_FILE}")
+
+
+if __name__ == "__main__":
+    main()
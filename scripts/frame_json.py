@@ -0,0 +1,115 @@
+"""
+Column-wise helpers for writing indicator DataFrames as the frontend's JSON.
+
+The Excel converters used to turn every sheet into a list of dicts, walk the
+whole structure with a recursive clean_nan() and format dates row by row.
+Here sanitization and date formatting work on whole columns, and each view
+is encoded column by column (one json.dumps per numeric column) and the
+per-row fragments are joined into the records as text, so no dict is built
+per row.
+"""
+
+import json
+import math
+import os
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+DATE_KEY = "data_date"
+
+MONTHS_PT = {
+    'janeiro': 1, 'fevereiro': 2, 'março': 3, 'abril': 4,
+    'maio': 5, 'junho': 6, 'julho': 7, 'agosto': 8,
+    'setembro': 9, 'outubro': 10, 'novembro': 11, 'dezembro': 12
+}
+
+
+def sanitize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    NaN/Inf become missing values (null in the JSON): in float columns, and
+    float cells of object (mixed) columns. Integer columns cannot hold either
+    and keep their dtype.
+    """
+    df = df.copy()
+    for column in df.select_dtypes(include=["floating"]).columns:
+        values = df[column].to_numpy()
+        df[column] = np.where(np.isfinite(values), values, np.nan)
+    for column in df.columns[df.dtypes == object]:
+        non_finite = df[column].map(_is_non_finite).to_numpy(dtype=bool)
+        if non_finite.any():
+            df[column] = df[column].mask(non_finite, None)
+    return df
+
+
+def _is_non_finite(value) -> bool:
+    return isinstance(value, float) and not math.isfinite(value)
+
+
+def format_dates(values: pd.Series) -> pd.Series:
+    """
+    ISO 'YYYY-MM-DD' strings. Text that is already there is kept as is and
+    missing dates stay missing.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.strftime("%Y-%m-%d")
+    parsed = pd.to_datetime(values, errors="coerce")
+    formatted = parsed.dt.strftime("%Y-%m-%d").astype(object)
+    is_text = values.map(type).eq(str)
+    return formatted.where(~is_text, values).where(values.notna(), None)
+
+
+def parse_month_year(values: pd.Series, day: int = 1) -> pd.Series:
+    """'novembro 2025' -> '2025-11-DD'; anything else is kept as text."""
+    text = values.astype(str).str.strip().str.lower()
+    parts = text.str.extract(r"^(\w+)\s+(\d{4})$")
+    month = parts[0].map(MONTHS_PT)
+    parsed = parts[1] + "-" + month.map("{:02.0f}".format, na_action="ignore") + f"-{day:02d}"
+    return parsed.where(month.notna(), values.astype(str))
+
+
+def dates_first(df: pd.DataFrame) -> pd.DataFrame:
+    return df[[DATE_KEY] + [c for c in df.columns if c != DATE_KEY]]
+
+
+def column_to_json(values: pd.Series) -> List[str]:
+    """
+    JSON text of every cell of a sanitized column (null where missing).
+    Numbers and booleans never contain a comma, so a numeric column is
+    encoded by a single json.dumps and split; text is encoded cell by cell.
+    """
+    cells = values.astype(object).where(values.notna(), None).tolist()
+    if not cells:
+        return []
+    if pd.api.types.is_numeric_dtype(values):
+        return json.dumps(cells, allow_nan=False, separators=(",", ":"))[1:-1].split(",")
+    return [json.dumps(cell, ensure_ascii=False, allow_nan=False) for cell in cells]
+
+
+def frame_to_json(df: pd.DataFrame) -> str:
+    """
+    Row-oriented JSON records of a sanitized frame, encoded column-wise.
+    Floats are written at full precision (shortest repr that round-trips,
+    as json.dump does) and '/' is not escaped; pandas' to_json caps at 15
+    digits and escapes it.
+    """
+    keys = [json.dumps(str(name), ensure_ascii=False) + ":" for name in df.columns]
+    columns = [column_to_json(df[name]) for name in df.columns]
+    records = ("{" + ",".join(key + cell for key, cell in zip(keys, row)) + "}" for row in zip(*columns))
+    return "[" + ",".join(records) + "]"
+
+
+def write_indicator_json(path: Path, views: Dict[str, pd.DataFrame], metadata: Dict) -> None:
+    """
+    Writes {"<view>": [records...], ..., "metadata": {...}} (minified). Each
+    view is encoded on its own and spliced in. Written aside and renamed, so
+    readers never see half a file.
+    """
+    parts = [f"{json.dumps(key)}:{frame_to_json(sanitize_frame(df))}" for key, df in views.items()]
+    parts.append(f'"metadata":{json.dumps(metadata, ensure_ascii=False)}')
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("{" + ",".join(parts) + "}")
+    os.replace(tmp_path, path)
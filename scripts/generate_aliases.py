@@ -2,8 +2,16 @@ import polars as pl
 import pandas as pd
 from pathlib import Path
 import re
+import sys
 import unicodedata
 
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.catalog_matcher import LongestMatcher
+from scripts.excel_cache import read_excel_cached
+
 # --- Configuration ---
 INPUT_FILE = Path(__file__).parent.parent / "data" / "raw" / "IBGE catalog" / "IBGE_series_catalog.xlsx"
 OUTPUT_FILE = Path(__file__).parent.parent / "data" / "processed" / "final_ibge_catalog.parquet"
@@ -46,6 +54,17 @@ ALIAS_RULES = {
     ]
 }
 
+# Longest names first to avoid partial matches (e.g., "ipca-15" before "ipca").
+INDICATOR_MATCHER = LongestMatcher(ALIAS_RULES["indicator"])
+LOCATION_MATCHER = LongestMatcher(ALIAS_RULES["location"])
+
+# Pattern: a multi-digit number followed by a dot or hyphen, then the sub-item text.
+ITEM_PATTERN = r'\b\d{4,}[\.\-]\s*([a-z].*)'
+ITEM_BOILERPLATE_PATTERN = r'\s*casas decimais.*'
+
+# Python's \s also matches the ASCII separators \x1c-\x1f; Polars' regex engine does not.
+_PL_WHITESPACE = r'\s\x1c-\x1f'
+
 def slugify(text: str) -> str:
     """
     Normalizes a string, converting it to a URL-friendly "slug".
@@ -88,11 +107,9 @@ def generate_smart_alias(row: dict) -> str:
     
     # 1. Extract Indicator
     indicator = ""
-    # Search for the longest matching indicator first to avoid partial matches (e.g., "ipca-15" before "ipca")
-    for ind in sorted(ALIAS_RULES["indicator"], key=len, reverse=True):
-        if ind in normalized_text:
-            indicator = slugify(ind)
-            break
+    ind = INDICATOR_MATCHER.longest(normalized_text)
+    if ind:
+        indicator = slugify(ind)
 
     # 2. Extract Transformation
     transform = ""
@@ -103,21 +120,19 @@ def generate_smart_alias(row: dict) -> str:
             
     # 3. Extract Location
     location = ""
-    for loc in sorted(ALIAS_RULES["location"], key=len, reverse=True):
-        if loc in normalized_text:
-            location = slugify(loc)
-            break
+    loc = LOCATION_MATCHER.longest(normalized_text)
+    if loc:
+        location = slugify(loc)
             
     # 4. Extract Sub-item (This is often the most complex part)
     item = ""
-    # Pattern: Look for a multi-digit number followed by a dot or hyphen, then capture the text.
     # This is a common pattern for sub-items in the IBGE data.
-    match = re.search(r'\b\d{4,}[\.\-]\s*([a-z].*)', normalized_text)
+    match = re.search(ITEM_PATTERN, normalized_text)
     if match:
         # Clean up the captured item text
         item_text = match.group(1).strip()
         # Remove common boilerplate that might be left over
-        item_text = re.sub(r'\s*casas decimais.*', '', item_text)
+        item_text = re.sub(ITEM_BOILERPLATE_PATTERN, '', item_text)
         item = slugify(item_text)
 
     # --- Alias Assembly ---
@@ -129,6 +144,79 @@ def generate_smart_alias(row: dict) -> str:
     return "_".join(alias_parts)
 
 
+# --- Vectorized (column-wise) version of generate_smart_alias ---
+# Same rules, expressed as Polars expressions so the whole catalog is processed
+# in a handful of column passes instead of a Python loop over every row.
+
+def normalize_text_expr(expr: pl.Expr) -> pl.Expr:
+    """Column-wise equivalent of normalize_text."""
+    # Accents become combining marks after NFKD and are dropped by the character filter.
+    return (
+        expr.str.to_lowercase()
+        .str.normalize("NFKD")
+        .str.replace_all(f'[^a-z0-9{_PL_WHITESPACE}]', '')
+    )
+
+def slugify_expr(expr: pl.Expr) -> pl.Expr:
+    """Column-wise equivalent of slugify."""
+    return normalize_text_expr(expr).str.replace_all(f'[{_PL_WHITESPACE}]+', '_').str.strip_chars('_')
+
+def _first_match(conditions: list, default: str = "") -> pl.Expr:
+    """Builds a pl.when chain returning the value of the first (condition, value) pair that holds."""
+    if not conditions:
+        return pl.lit(default)
+    condition, value = conditions[0]
+    chain = pl.when(condition).then(pl.lit(value))
+    for condition, value in conditions[1:]:
+        chain = chain.when(condition).then(pl.lit(value))
+    return chain.otherwise(pl.lit(default))
+
+def _text_column(df: pl.DataFrame, name: str) -> pl.Expr:
+    # Mirrors f"{row.get(name, '')}": a missing column is '', a null value is 'None'.
+    if name not in df.columns:
+        return pl.lit("")
+    return pl.col(name).cast(pl.String).fill_null("None")
+
+def generate_smart_aliases(df: pl.DataFrame) -> pl.Series:
+    """
+    Vectorized generate_smart_alias over a whole catalog.
+    Produces exactly the same aliases as calling generate_smart_alias on every row.
+    """
+    text = pl.concat_str([_text_column(df, 'label'), pl.lit(" "), _text_column(df, 'general_name')])
+
+    indicator = _first_match([
+        (pl.col('_text').str.contains(ind, literal=True), slugify(ind)) for ind in INDICATOR_MATCHER.by_length
+    ])
+    transform = _first_match([
+        (pl.col('_text').str.contains(pattern), key) for key, pattern in ALIAS_RULES["transform"].items()
+    ])
+    location = _first_match([
+        (pl.col('_text').str.contains(loc, literal=True), slugify(loc)) for loc in LOCATION_MATCHER.by_length
+    ])
+    item = slugify_expr(
+        pl.col('_text').str.extract(ITEM_PATTERN, 1)
+        .str.strip_chars()
+        .str.replace_all(ITEM_BOILERPLATE_PATTERN, '')
+    ).fill_null("")
+
+    parts = [pl.when(part != "").then(part) for part in [indicator, transform, item, location]]
+    generated = pl.concat_str(parts, separator="_", ignore_nulls=True)
+    generated = pl.when(generated.is_null() | (generated == "")).then(pl.lit("UNCATEGORIZED")).otherwise(generated)
+
+    # If an alias already exists (from the user's manual input), keep it.
+    if 'alias' in df.columns and df.schema['alias'] == pl.String:
+        existing = pl.col('alias')
+        generated = pl.when(existing.is_not_null() & (existing != "")).then(existing).otherwise(generated)
+
+    return (
+        df.lazy()
+        .select(normalize_text_expr(text).alias('_text'), *([pl.col('alias')] if 'alias' in df.columns else []))
+        .select(generated.alias('alias'))
+        .collect()
+        .to_series()
+    )
+
+
 def process_catalog():
     """
     Main function to read, classify, and save the IBGE series catalog.
@@ -138,17 +226,15 @@ def process_catalog():
     try:
         # Read the full Excel file
         print(f"Reading data from: {INPUT_FILE}")
-        pd_df = pd.read_excel(INPUT_FILE, sheet_name=0)
-        df = pl.from_pandas(pd_df)
+        df = read_excel_cached(INPUT_FILE, sheet_name=0)
         print(f"Successfully read {df.shape[0]} series.")
 
         # Generate aliases
-        print("Generating aliases... (This will take a few minutes for the full dataset)")
-        rows = df.to_dicts()
-        aliases = [generate_smart_alias(row) for row in rows]
+        print("Generating aliases...")
+        aliases = generate_smart_aliases(df)
         
         # Replace the old 'alias' column with our newly generated ones
-        df = df.with_columns(pl.Series("alias", aliases))
+        df = df.with_columns(aliases)
 
         # Reorder columns to have 'alias' first for easy review
         final_columns = ["alias"] + [col for col in df.columns if col != "alias"]
@@ -173,6 +259,8 @@ def process_catalog():
 
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
+        # Re-raise so run_etl.py sees the failure and does not record the step as done
+        raise
 
 if __name__ == "__main__":
     process_catalog()
@@ -1,25 +1,37 @@
 import json
 import os
-import glob
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import hashlib
 import sys
+import threading
 import urllib.request
 import urllib.error
 import math
 
 # Define proper paths relative to script execution (root or scripts/)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from scripts import timeseries
 DATA_DIR = os.path.join(BASE_DIR, '../frontend/public/data')
 FLASH_REPORT_PATH = os.path.join(DATA_DIR, 'flash_reports.json')
+# Recent-window files written by export_indicator_json.py
+LATEST_DIR = os.path.join(DATA_DIR, 'compact')
 
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
+# GROQ_API_URL can point at a local chat-completions stub for testing
+GROQ_API_URL = os.environ.get("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+GROQ_MODEL = "llama-3.3-70b-versatile"
+LLM_TIMEOUT = 30  # seconds per call
 
-def load_json(filename):
-    path = os.path.join(DATA_DIR, filename)
-    if not os.path.exists(path):
-        return None
-    with open(path, 'r') as f:
-        return json.load(f)
+# Responses keyed by hash of (indicator, context, prompts, model): unchanged
+# indicators reuse last run's headline/analysis instead of calling the API.
+LLM_CACHE_PATH = os.path.join(BASE_DIR, '../data/cache/flash_llm_cache.json')
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
 
 def format_value(val):
     if val is None: return ""
@@ -48,29 +60,52 @@ def clean_float(val):
 # LLM GENERATION
 # ==================================================================================
 
-def call_groq_llm(indicator, context_str):
-    """
-    Calls Groq API to generate headline and analysis.
-    Returns dict: {'headline': str, 'analysis': str} or None on failure.
-    """
-    if not GROQ_API_KEY:
-        print("Warning: GROQ_API_KEY not found. Using template fallback.")
-        return None
+def load_llm_cache():
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = {}
+            if os.path.exists(LLM_CACHE_PATH):
+                try:
+                    with open(LLM_CACHE_PATH, 'r', encoding='utf-8') as f:
+                        _llm_cache = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"Warning: ignoring unreadable LLM cache ({e})")
+        return _llm_cache
 
-    url = "https://api.groq.com/openai/v1/chat/completions"
-    
-    system_prompt = (
-        "Você é um Economista Sênior (Senior Market Analyst) da PX Economics. "
-        "Sua função é escrever relatórios 'Flash' curtos e impactantes sobre indicadores econômicos do Brasil. "
-        "O tone deve ser profissional, direto e analítico (estilo Bloomberg/Valor Econômico). "
-        "regras CRÍTICAS: "
-        "1. Nunca invente dados. "
-        "2. SEMPRE use o ano completo (ex: 2024, 2025). NUNCA use 'de 01', 'de 24', 'de 25'. "
-        "3. Se o ano for 2025, escreva 'de 2025'. Exemplo: 'novembro de 2025'. "
-        "Foque nos números e no 'driver' do resultado."
-    )
-    
-    user_prompt = f"""
+def save_llm_cache():
+    if _llm_cache is None:
+        return
+    os.makedirs(os.path.dirname(LLM_CACHE_PATH), exist_ok=True)
+    tmp_path = LLM_CACHE_PATH + '.tmp'
+    with _llm_cache_lock:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(_llm_cache, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, LLM_CACHE_PATH)
+
+def prune_llm_cache(keys):
+    """Drops the cached answers no current report was generated from."""
+    cache = load_llm_cache()
+    with _llm_cache_lock:
+        stale = [key for key in cache if key not in keys]
+        for key in stale:
+            del cache[key]
+    if stale:
+        print(f"Pruned {len(stale)} unused LLM cache entries")
+
+LLM_SYSTEM_PROMPT = (
+    "Você é um Economista Sênior (Senior Market Analyst) da PX Economics. "
+    "Sua função é escrever relatórios 'Flash' curtos e impactantes sobre indicadores econômicos do Brasil. "
+    "O tone deve ser profissional, direto e analítico (estilo Bloomberg/Valor Econômico). "
+    "regras CRÍTICAS: "
+    "1. Nunca invente dados. "
+    "2. SEMPRE use o ano completo (ex: 2024, 2025). NUNCA use 'de 01', 'de 24', 'de 25'. "
+    "3. Se o ano for 2025, escreva 'de 2025'. Exemplo: 'novembro de 2025'. "
+    "Foque nos números e no 'driver' do resultado."
+)
+
+def llm_user_prompt(indicator, context_str):
+    return f"""
     Dados do indicador: {indicator}
     
     CONTEXTO DOS DADOS (JSON):
@@ -83,9 +118,35 @@ def call_groq_llm(indicator, context_str):
     
     Responda APENAS o JSON válido.
     """
+
+def llm_cache_key(indicator, context_str):
+    """Hash of everything the answer depends on: indicator, context, prompts and model."""
+    raw = json.dumps([indicator, context_str, LLM_SYSTEM_PROMPT, llm_user_prompt(indicator, context_str), GROQ_MODEL],
+                     ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def call_groq_llm(indicator, context_str):
+    """
+    Calls Groq API to generate headline and analysis.
+    Returns dict: {'headline': str, 'analysis': str} or None on failure.
+    Answers are cached on disk, so an unchanged context is not sent again.
+    """
+    system_prompt = LLM_SYSTEM_PROMPT
+    user_prompt = llm_user_prompt(indicator, context_str)
     
+    cache = load_llm_cache()
+    key = llm_cache_key(indicator, context_str)
+    cached = cache.get(key)
+    if cached:
+        print(f"Reusing cached LLM text for {indicator}")
+        return cached
+
+    if not GROQ_API_KEY:
+        print("Warning: GROQ_API_KEY not found. Using template fallback.")
+        return None
+
     payload = {
-        "model": "llama-3.3-70b-versatile",
+        "model": GROQ_MODEL,
         "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
@@ -97,7 +158,7 @@ def call_groq_llm(indicator, context_str):
     
     try:
         req = urllib.request.Request(
-            url, 
+            GROQ_API_URL, 
             data=json.dumps(payload).encode('utf-8'),
             headers={
                 "Authorization": f"Bearer {GROQ_API_KEY}",
@@ -105,7 +166,7 @@ def call_groq_llm(indicator, context_str):
             }
         )
         
-        with urllib.request.urlopen(req) as response:
+        with urllib.request.urlopen(req, timeout=LLM_TIMEOUT) as response:
             result = json.loads(response.read().decode('utf-8'))
             content = result['choices'][0]['message']['content']
             parsed = json.loads(content)
@@ -115,7 +176,9 @@ def call_groq_llm(indicator, context_str):
             if 'de 01' in headline or 'de 00' in headline:
                 print(f"Warning: Detected Hallucinated Year in headline: '{headline}'. Falling back to template.")
                 return None
-                
+            
+            with _llm_cache_lock:
+                cache[key] = parsed
             return parsed
             
     except Exception as e:
@@ -123,260 +186,222 @@ def call_groq_llm(indicator, context_str):
         return None
 
 # ==================================================================================
-# REPORT GENERATORS
+# REPORT REGISTRY
 # ==================================================================================
 
-def generate_ipca_report(data):
-    if not data or 'mom' not in data: return None
-    latest = data['mom'][-1]
-    date = latest['data_date']
-    
-    # Context for LLM
-    context = {
-        "date": date,
+# One entry per flash report; adding an indicator (CNT, PNAD, ...) only takes
+# a new entry here. Field values name a column of the latest 'mom' row, YOY
+# stands for the value of `yoy_key` in the `yoy_view` row of the same date,
+# and nested dicts are kept as nested dicts in the LLM context. Headline and
+# analysis fallbacks are formatted with the metrics plus {month}.
+YOY = '<yoy>'
+
+FLASH_REPORTS = [
+    {
         "indicator": "IPCA",
-        "monthly_change": latest.get('IPCA'),
-        "yoy_change": data['a12'][-1]['IPCA'] if 'a12' in data else None,
-        "groups": {
-            "Alimentação": latest.get('Alimentação no domicílio'),
-            "Industrializados": latest.get('Industrializados'),
-            "Serviços": latest.get('Serviços'),
-            "Administrados": latest.get('Administrados'),
-            "Livres": latest.get('Livres')
+        "source": "ipca",
+        "llm_name": "IPCA",
+        "series_key": "IPCA",
+        "yoy_view": "a12",
+        "yoy_key": "IPCA",
+        "context": {
+            "monthly_change": "IPCA",
+            "yoy_change": YOY,
+            "groups": {
+                "Alimentação": "Alimentação no domicílio",
+                "Industrializados": "Industrializados",
+                "Serviços": "Serviços",
+                "Administrados": "Administrados",
+                "Livres": "Livres"
+            },
+            "nucleos": {
+                "EX3": "EX3",
+                "MS": "MS"
+            }
         },
-        "nucleos": {
-            "EX3": latest.get('EX3'),
-            "MS": latest.get('MS')
-        }
-    }
-    
-    llm_result = call_groq_llm("IPCA", json.dumps(context, ensure_ascii=False))
-    
-    # Fallback Strings
-    headline = f"IPCA variou {format_value(latest.get('IPCA'))}% em {get_month_name(date)}"
-    analysis = f"O IPCA de {get_month_name(date)} registrou variação de {format_value(latest.get('IPCA'))}%. Na composição, os preços administrados variaram {format_value(latest.get('Administrados'))}% e serviços {format_value(latest.get('Serviços'))}%."
-    
-    if llm_result:
-        headline = llm_result.get('headline', headline)
-        analysis = llm_result.get('analysis', analysis)
-    
-    report = {
-        "id": f"ipca-{date}",
-        "indicator": "IPCA",
-        "reference_date": date,
-        "headline": headline,
         "metrics": {
-            "mom": clean_float(latest.get('IPCA')),
-            "yoy": clean_float(data['a12'][-1]['IPCA']) if 'a12' in data else None,
-            "servicos": clean_float(latest.get('Serviços')),
-            "alimentacao": clean_float(latest.get('Alimentação no domicílio')),
-            "ex3": clean_float(latest.get('EX3')),
-            "administrados": clean_float(latest.get('Administrados'))
+            "mom": "IPCA",
+            "yoy": YOY,
+            "servicos": "Serviços",
+            "alimentacao": "Alimentação no domicílio",
+            "ex3": "EX3",
+            "administrados": "Administrados"
         },
-        "analysis": analysis,
-        "chart_data": [],
+        "headline": "IPCA variou {mom}% em {month}",
+        "analysis": "O IPCA de {month} registrou variação de {mom}%. Na composição, os preços administrados variaram {administrados}% e serviços {servicos}%.",
         "link": "/indicators/ipca",
-        "source_title": "Dados oficiais do IBGE (SIDRA)",
-        "source_url": "https://sidra.ibge.gov.br/home/ipca",
-        "generated_at": datetime.utcnow().isoformat() + "Z"
-    }
-    
-    for item in data['mom'][-12:]:
-        d = datetime.strptime(item['data_date'], '%Y-%m-%d')
-        report['chart_data'].append({
-            "date": d.strftime('%b/%y').lower(),
-            "value": clean_float(item['IPCA'])
-        })
-    return report
-
-def generate_pmc_report(data):
-    if not data or 'mom' not in data: return None
-    latest = data['mom'][-1]
-    date = latest['data_date']
-    
-    yoy_val = None
-    if 'yoy' in data:
-        for y in data['yoy']:
-            if y['data_date'] == date:
-                yoy_val = y.get('PMC NSA')
-                break
-
-    # Context for LLM
-    context = {
-        "date": date,
-        "indicator": "Varejo (PMC)",
-        "monthly_restricted": latest.get('PMC SA'),
-        "monthly_expanded": latest.get('PMCA SA'),
-        "sectors": {
-            "Supermercados": latest.get('Hipermercados, supermercados, produtos alimentícios, bebidas e fumo'),
-            "Moveis_Eletro": latest.get('Móveis e eletrodomésticos'),
-            "Combustiveis": latest.get('Combustíveis e lubrificantes'),
-            "Vestuario": latest.get('Tecidos, vestuário e calçados'),
-            "Veiculos": latest.get('Veículos, motocicletas, partes e peças')
-        }
-    }
-    
-    llm_result = call_groq_llm("PMC (Varejo)", json.dumps(context, ensure_ascii=False))
-
-    headline = f"Varejo (PMC) variou {format_value(latest.get('PMC SA'))}% em {get_month_name(date)}"
-    analysis = f"O volume de vendas do varejo variou {format_value(latest.get('PMC SA'))}% em {get_month_name(date)}. O varejo ampliado registrou {format_value(latest.get('PMCA SA'))}%."
-
-    if llm_result:
-        headline = llm_result.get('headline', headline)
-        analysis = llm_result.get('analysis', analysis)
-
-    report = {
-        "id": f"pmc-{date}",
+        "source_url": "https://sidra.ibge.gov.br/home/ipca"
+    },
+    {
         "indicator": "PMC",
-        "reference_date": date,
-        "headline": headline,
+        "source": "pmc",
+        "llm_name": "PMC (Varejo)",
+        "context_name": "Varejo (PMC)",
+        "series_key": "PMC SA",
+        "yoy_view": "yoy",
+        "yoy_key": "PMC NSA",
+        "context": {
+            "monthly_restricted": "PMC SA",
+            "monthly_expanded": "PMCA SA",
+            "sectors": {
+                "Supermercados": "Hipermercados, supermercados, produtos alimentícios, bebidas e fumo",
+                "Moveis_Eletro": "Móveis e eletrodomésticos",
+                "Combustiveis": "Combustíveis e lubrificantes",
+                "Vestuario": "Tecidos, vestuário e calçados",
+                "Veiculos": "Veículos, motocicletas, partes e peças"
+            }
+        },
         "metrics": {
-            "mom": clean_float(latest.get('PMC SA')),
-            "mom_ampliado": clean_float(latest.get('PMCA SA')),
-            "yoy": clean_float(yoy_val)
+            "mom": "PMC SA",
+            "mom_ampliado": "PMCA SA",
+            "yoy": YOY
         },
-        "analysis": analysis,
-        "chart_data": [],
+        "headline": "Varejo (PMC) variou {mom}% em {month}",
+        "analysis": "O volume de vendas do varejo variou {mom}% em {month}. O varejo ampliado registrou {mom_ampliado}%.",
         "link": "/indicators/pmc",
-        "source_title": "Dados oficiais do IBGE (SIDRA)",
-        "source_url": "https://sidra.ibge.gov.br/home/pmc",
-        "generated_at": datetime.utcnow().isoformat() + "Z"
-    }
-    
-    for item in data['mom'][-12:]:
-         d = datetime.strptime(item['data_date'], '%Y-%m-%d')
-         report['chart_data'].append({
-            "date": d.strftime('%b/%y').lower(),
-            "value": clean_float(item['PMC SA'])
-        })
-    return report
-
-def generate_pms_report(data):
-    if not data or 'mom' not in data: return None
-    latest = data['mom'][-1]
-    date = latest['data_date']
-    
-    yoy_val = None
-    if 'yoy' in data:
-        for y in data['yoy']:
-            if y['data_date'] == date:
-                yoy_val = y.get('Total')
-                break
-
-    context = {
-        "date": date,
-        "indicator": "Serviços (PMS)",
-        "monthly_total": latest.get('Total'),
-        "sectors": {
-            "Familias": latest.get('1. Serviços prestados às famílias'),
-            "Informacao": latest.get('2. Serviços de informação e comunicação'),
-            "Profissionais": latest.get('3. Serviços profissionais, administrativos e complementares'),
-            "Transportes": latest.get('4. Transportes, serviços auxiliares aos transportes e correio'),
-            "Outros": latest.get('5. Outros serviços')
-        }
-    }
-    
-    llm_result = call_groq_llm("PMS (Serviços)", json.dumps(context, ensure_ascii=False))
-
-    headline = f"Setor de Serviços variou {format_value(latest.get('Total'))}% em {get_month_name(date)}"
-    analysis = f"O volume de serviços variou {format_value(latest.get('Total'))}% em {get_month_name(date)}. Os serviços prestados às famílias registraram {format_value(latest.get('1. Serviços prestados às famílias'))}%."
-
-    if llm_result:
-        headline = llm_result.get('headline', headline)
-        analysis = llm_result.get('analysis', analysis)
-
-    report = {
-        "id": f"pms-{date}",
+        "source_url": "https://sidra.ibge.gov.br/home/pmc"
+    },
+    {
         "indicator": "PMS",
-        "reference_date": date,
-        "headline": headline,
+        "source": "pms",
+        "llm_name": "PMS (Serviços)",
+        "context_name": "Serviços (PMS)",
+        "series_key": "Total",
+        "yoy_view": "yoy",
+        "yoy_key": "Total",
+        "context": {
+            "monthly_total": "Total",
+            "sectors": {
+                "Familias": "1. Serviços prestados às famílias",
+                "Informacao": "2. Serviços de informação e comunicação",
+                "Profissionais": "3. Serviços profissionais, administrativos e complementares",
+                "Transportes": "4. Transportes, serviços auxiliares aos transportes e correio",
+                "Outros": "5. Outros serviços"
+            }
+        },
         "metrics": {
-            "mom": clean_float(latest.get('Total')),
-            "yoy": clean_float(yoy_val),
-            "familias": clean_float(latest.get('1. Serviços prestados às famílias'))
+            "mom": "Total",
+            "yoy": YOY,
+            "familias": "1. Serviços prestados às famílias"
         },
-        "analysis": analysis,
-        "chart_data": [],
+        "headline": "Setor de Serviços variou {mom}% em {month}",
+        "analysis": "O volume de serviços variou {mom}% em {month}. Os serviços prestados às famílias registraram {familias}%.",
         "link": "/indicators/pms",
-        "source_title": "Dados oficiais do IBGE (SIDRA)",
-        "source_url": "https://sidra.ibge.gov.br/home/pms",
-        "generated_at": datetime.utcnow().isoformat() + "Z"
-    }
-    
-    for item in data['mom'][-12:]:
-         d = datetime.strptime(item['data_date'], '%Y-%m-%d')
-         report['chart_data'].append({
-            "date": d.strftime('%b/%y').lower(),
-            "value": clean_float(item['Total'])
-        })
-    return report
+        "source_url": "https://sidra.ibge.gov.br/home/pms"
+    },
+    {
+        "indicator": "PIM",
+        "source": "pim",
+        "llm_name": "PIM (Indústria)",
+        "series_key": "1 Indústria geral",
+        "yoy_view": "yoy",
+        "yoy_key": "1 Indústria geral",
+        "context": {
+            "monthly_total": "1 Indústria geral",
+            "sectors": {
+                "Extrativa": "2 Indústrias extrativas",
+                "Transformacao": "3 Indústrias de transformação",
+                "Bens_Capital": "Bens de capital",
+                "Bens_Intermediarios": "Bens intermediários",
+                "Bens_Consumo": "Bens de consumo"
+            }
+        },
+        "metrics": {
+            "mom": "1 Indústria geral",
+            "yoy": YOY,
+            "extrativas": "2 Indústrias extrativas",
+            "transformacao": "3 Indústrias de transformação"
+        },
+        "headline": "Produção Industrial variou {mom}% em {month}",
+        "analysis": "A produção industrial variou {mom}% em {month}. A indústria extrativa variou {extrativas}%, enquanto a de transformação registrou {transformacao}%.",
+        "link": "/indicators/pim",
+        "source_url": "https://sidra.ibge.gov.br/home/pim"
+    },
+]
 
-def generate_pim_report(data):
+# ==================================================================================
+# REPORT GENERATOR
+# ==================================================================================
+
+def resolve_field(field, latest, yoy_val):
+    if isinstance(field, dict):
+        return {name: resolve_field(value, latest, yoy_val) for name, value in field.items()}
+    return yoy_val if field == YOY else latest.get(field)
+
+def generate_report(spec, data):
+    """Builds the flash report described by a FLASH_REPORTS entry from a timeseries.Indicator."""
     if not data or 'mom' not in data: return None
-    latest = data['mom'][-1]
+    mom = data['mom']
+    if not len(mom): return None
+    latest = mom.row(-1)
     date = latest['data_date']
     
-    yoy_val = None
-    if 'yoy' in data:
-         for y in data['yoy']:
-            if y['data_date'] == date:
-                yoy_val = y.get('1 Indústria geral')
-                break
-
+    yoy_row = (data[spec['yoy_view']].at(date) if spec['yoy_view'] in data else None) or {}
+    yoy_val = yoy_row.get(spec['yoy_key'])
+    
+    # Context for LLM
     context = {
         "date": date,
-        "indicator": "PIM (Indústria)",
-        "monthly_total": latest.get('1 Indústria geral'),
-        "sectors": {
-            "Extrativa": latest.get('2 Indústrias extrativas'),
-            "Transformacao": latest.get('3 Indústrias de transformação'),
-            "Bens_Capital": latest.get('Bens de capital'),
-            "Bens_Intermediarios": latest.get('Bens intermediários'),
-            "Bens_Consumo": latest.get('Bens de consumo')
-        }
+        "indicator": spec.get('context_name', spec['llm_name']),
+        **resolve_field(spec['context'], latest, yoy_val)
     }
     
-    llm_result = call_groq_llm("PIM (Indústria)", json.dumps(context, ensure_ascii=False))
-
-    headline = f"Produção Industrial variou {format_value(latest.get('1 Indústria geral'))}% em {get_month_name(date)}"
-    analysis = f"A produção industrial variou {format_value(latest.get('1 Indústria geral'))}% em {get_month_name(date)}. A indústria extrativa variou {format_value(latest.get('2 Indústrias extrativas'))}%, enquanto a de transformação registrou {format_value(latest.get('3 Indústrias de transformação'))}%."
-
+    context_str = json.dumps(context, ensure_ascii=False)
+    llm_result = call_groq_llm(spec['llm_name'], context_str)
+    
+    metrics = {name: clean_float(resolve_field(field, latest, yoy_val)) for name, field in spec['metrics'].items()}
+    
+    # Fallback Strings
+    values = {name: format_value(value) for name, value in metrics.items()}
+    values['month'] = get_month_name(date)
+    headline = spec['headline'].format(**values)
+    analysis = spec['analysis'].format(**values)
+    
     if llm_result:
         headline = llm_result.get('headline', headline)
         analysis = llm_result.get('analysis', analysis)
-
+    
     report = {
-        "id": f"pim-{date}",
-        "indicator": "PIM",
+        "id": f"{spec['source']}-{date}",
+        "indicator": spec['indicator'],
         "reference_date": date,
         "headline": headline,
-        "metrics": {
-            "mom": clean_float(latest.get('1 Indústria geral')),
-            "yoy": clean_float(yoy_val),
-            "extrativas": clean_float(latest.get('2 Indústrias extrativas')),
-            "transformacao": clean_float(latest.get('3 Indústrias de transformação'))
-        },
-         "analysis": analysis,
+        "metrics": metrics,
+        "analysis": analysis,
         "chart_data": [],
-        "link": "/indicators/pim",
+        "link": spec['link'],
         "source_title": "Dados oficiais do IBGE (SIDRA)",
-        "source_url": "https://sidra.ibge.gov.br/home/pim",
-        "generated_at": datetime.utcnow().isoformat() + "Z"
+        "source_url": spec['source_url'],
+        "generated_at": datetime.utcnow().isoformat() + "Z",
+        # False when the template text was used (no key, timeout, API error)
+        "llm": bool(llm_result),
+        # Lets the next run prune cached answers no report uses any more
+        "llm_cache_key": llm_cache_key(spec['llm_name'], context_str)
     }
     
-    for item in data['mom'][-12:]:
-         d = datetime.strptime(item['data_date'], '%Y-%m-%d')
-         report['chart_data'].append({
+    window = mom.tail(12)
+    values = window.column(spec['series_key']).tolist() if spec['series_key'] in window else [None] * len(window)
+    for d, value in zip(window.index.astype(object), values):
+        report['chart_data'].append({
             "date": d.strftime('%b/%y').lower(),
-            "value": clean_float(item['1 Indústria geral'])
+            "value": clean_float(value)
         })
     return report
 
-def update_flash_reports():
+def source_path(indicator):
+    """File a report is built from: the exported recent window, else the full history."""
+    latest = os.path.join(LATEST_DIR, f'{indicator}_latest.json')
+    return latest if os.path.exists(latest) else os.path.join(DATA_DIR, f'{indicator}.json')
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def update_flash_reports(force=False):
     print("Generating Flash Reports with AI Enhanced Analysis...")
     
-    # Load existing to keep history or just rebuild headers? 
-    # Current file has a list. We should update/replace the entry for the indicator.
+    # Existing reports are kept; only the entries of indicators whose source
+    # changed since they were generated are rebuilt.
     
     if os.path.exists(FLASH_REPORT_PATH):
         with open(FLASH_REPORT_PATH, 'r') as f:
@@ -386,29 +411,43 @@ def update_flash_reports():
         
     reports_map = {r['indicator']: r for r in current_data.get('reports', [])}
     
-    # Process each indicator
-    ipca = load_json('ipca.json')
-    if ipca:
-        rep = generate_ipca_report(ipca)
-        if rep: reports_map['IPCA'] = rep
-        
-    pmc = load_json('pmc.json')
-    if pmc:
-        rep = generate_pmc_report(pmc)
-        if rep: reports_map['PMC'] = rep
-        
-    pms = load_json('pms.json')
-    if pms:
-         rep = generate_pms_report(pms)
-         if rep: reports_map['PMS'] = rep
-
-    pim = load_json('pim.json')
-    if pim:
-        rep = generate_pim_report(pim)
-        if rep: reports_map['PIM'] = rep
+    # Compare source hashes first so that a day without releases parses nothing
+    pending = []
+    for spec in FLASH_REPORTS:
+        path = source_path(spec['source'])
+        if not os.path.exists(path):
+            continue
+        digest = file_hash(path)
+        previous = reports_map.get(spec['indicator'], {})
+        # A template fallback is retried while an API key is configured, so
+        # one failed LLM call does not stick until the next release
+        llm_done = previous.get('llm') or not GROQ_API_KEY
+        if not force and previous.get('source_hash') == digest and llm_done:
+            print(f"{spec['indicator']}: source unchanged since {previous.get('generated_at')}, skipping")
+            continue
+        pending.append((spec, path, digest))
+    
+    if not pending:
+        print("No indicator changed; flash reports left untouched.")
+        return
+    
+    # The generators spend their time waiting on the LLM API, so they run
+    # side by side (each call has its own timeout).
+    with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+        futures = []
+        for spec, path, digest in pending:
+            data = timeseries.read_json(path)
+            futures.append((spec, digest, pool.submit(generate_report, spec, data)))
+        for spec, digest, future in futures:
+            rep = future.result()
+            if rep:
+                rep['source_hash'] = digest
+                reports_map[spec['indicator']] = rep
         
     # Reconstruct list
     final_reports = list(reports_map.values())
+    prune_llm_cache({r.get('llm_cache_key') for r in final_reports})
+    save_llm_cache()
     
     # Sort by reference date descending
     final_reports.sort(key=lambda x: x['reference_date'], reverse=True)
@@ -427,4 +466,7 @@ def update_flash_reports():
     print(f"Flash reports updated at {FLASH_REPORT_PATH}")
 
 if __name__ == "__main__":
-    update_flash_reports()
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate flash reports for the indicators that changed.")
+    parser.add_argument('--force', action='store_true', help="Regenerate every report even if its source is unchanged.")
+    update_flash_reports(force=parser.parse_args().force)
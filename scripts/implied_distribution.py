@@ -0,0 +1,327 @@
+"""
+Implied probability distributions from Kalshi range markets.
+
+Kalshi lists an economic release (GDP, and in the same way CPI or the Fed
+rate) as a set of markets on ranges of the outcome, each with a
+floor_strike and/or cap_strike. Their prices are probabilities that do not
+add up to exactly 1 (the overround). This module turns the collected daily
+prices of every event into one tensor
+
+    prob[event, date, bucket]        (NaN where the event has no prices)
+
+normalized to sum to 1 per (event, date), and computes for every day of
+every event at once: mean, variance, quantiles, and the probability below /
+above any threshold. Inside a bucket the mass is taken as uniform; the
+open-ended tail buckets get the median width of the inner buckets.
+
+Two market layouts are supported:
+- buckets: markets "between a and b" (floor and cap), plus tails with only
+  a cap ("below a") or only a floor ("above b");
+- ladders: every market is "above k" (floor only, several k). Prices are
+  exceedance probabilities; they are made non-increasing in k and
+  differenced into buckets, so there is no overround to remove.
+
+A market that has not traded yet is unknown, not worth 0: its price is
+interpolated from the priced neighbours (exceedance probability in the
+strike for ladders, price per unit of width for buckets).
+
+    dist = build_distribution(history)          # collector rows, see load_history()
+    dist.to_frame()                             # one row per (event, date)
+    dist.cdf(0.0)                               # P(growth < 0%) for every (event, date)
+"""
+
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# --- Configuration ---
+KALSHI_DIR = PROJECT_ROOT / "data" / "kalshi"
+LATEST_FILE = KALSHI_DIR / "kalshi_gdp_latest.parquet"
+OUTPUT_FILE = KALSHI_DIR / "implied_distribution.parquet"
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+# Thresholds reported by to_frame() as P(outcome < t)
+TAIL_THRESHOLDS = (0.0,)
+# Tail width when an event has no inner bucket to take it from
+DEFAULT_TAIL_WIDTH = 1.0
+
+
+# --- Statistics ---
+# prob is (..., B) and lower/upper broadcast against it. Rows without a
+# distribution are NaN and stay NaN; padding buckets have 0 mass and zero
+# width, so they add nothing.
+
+def distribution_mean(prob: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    return (prob * (lower + upper) / 2).sum(axis=-1)
+
+
+def distribution_variance(prob: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """Between-bucket variance plus the within-bucket variance of the uniform mass."""
+    points = (lower + upper) / 2
+    second = (prob * (points ** 2 + (upper - lower) ** 2 / 12)).sum(axis=-1)
+    return second - distribution_mean(prob, lower, upper) ** 2
+
+
+def distribution_cdf(prob: np.ndarray, lower: np.ndarray, upper: np.ndarray, threshold: float) -> np.ndarray:
+    """P(outcome < threshold)."""
+    width = upper - lower
+    with np.errstate(invalid="ignore", divide="ignore"):
+        share = np.where(width > 0, np.clip((threshold - lower) / width, 0.0, 1.0), (threshold >= upper).astype(float))
+    return (prob * share).sum(axis=-1)
+
+
+def distribution_quantiles(prob: np.ndarray, lower: np.ndarray, upper: np.ndarray, buckets: np.ndarray,
+                           levels: Sequence[float] = QUANTILES) -> np.ndarray:
+    """(..., Q) quantiles, interpolated linearly inside the bucket that crosses each level."""
+    levels = np.asarray(levels, dtype=np.float64)
+    lower, upper = np.broadcast_to(lower, prob.shape), np.broadcast_to(upper, prob.shape)
+    cum = np.cumsum(prob, axis=-1)
+    # Bucket in which each level is crossed: the number of buckets whose CDF is still below it
+    crossing = (cum[..., None] < levels).sum(axis=-2)
+    crossing = np.minimum(crossing, np.asarray(buckets)[..., None] - 1)
+    below = np.take_along_axis(cum - prob, crossing, axis=-1)
+    mass = np.take_along_axis(prob, crossing, axis=-1)
+    lo = np.take_along_axis(lower, crossing, axis=-1)
+    hi = np.take_along_axis(upper, crossing, axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        share = np.where(mass > 0, np.clip((levels - below) / mass, 0.0, 1.0), 0.0)
+    return np.where(np.isnan(cum[..., -1:]), np.nan, lo + share * (hi - lo))
+
+
+@dataclass
+class ImpliedDistribution:
+    """Normalized bucket probabilities of every (event, date), with their bucket edges."""
+
+    events: np.ndarray          # (E,) event tickers
+    dates: np.ndarray           # (D,) datetime64[D]
+    buckets: np.ndarray         # (E,) number of buckets of each event
+    lower: np.ndarray           # (E, B) lower edge of each bucket (events with fewer buckets are
+    upper: np.ndarray           # (E, B) upper edge                 padded with zero-width buckets)
+    prob: np.ndarray            # (E, D, B) normalized probabilities, NaN where the event has no prices
+    overround: np.ndarray       # (E, D) sum of the raw prices minus 1 (NaN for ladders)
+
+    def __post_init__(self):
+        self.valid = ~np.isnan(self.prob[..., 0])   # (E, D): the event has a distribution that day
+
+    def mean(self) -> np.ndarray:
+        """(E, D) implied mean."""
+        return distribution_mean(self.prob, self.lower[:, None], self.upper[:, None])
+
+    def variance(self) -> np.ndarray:
+        return distribution_variance(self.prob, self.lower[:, None], self.upper[:, None])
+
+    def cdf(self, threshold: float) -> np.ndarray:
+        """(E, D) implied P(outcome < threshold)."""
+        return distribution_cdf(self.prob, self.lower[:, None], self.upper[:, None], threshold)
+
+    def quantiles(self, levels: Sequence[float] = QUANTILES) -> np.ndarray:
+        """(E, D, Q) implied quantiles."""
+        return distribution_quantiles(self.prob, self.lower[:, None], self.upper[:, None],
+                                      self.buckets[:, None], levels)
+
+    def to_frame(self, levels: Sequence[float] = QUANTILES,
+                 thresholds: Sequence[float] = TAIL_THRESHOLDS) -> pd.DataFrame:
+        """One row per (event, date) with a distribution: moments, quantiles, tails, overround."""
+        e, d = np.nonzero(self.valid)
+        # Only the (event, date) rows that have a distribution, as an (N, B) block
+        prob, lower, upper = self.prob[e, d], self.lower[e], self.upper[e]
+        frame = pd.DataFrame({
+            "event_ticker": self.events[e],
+            "date": self.dates[d],
+            "mean": distribution_mean(prob, lower, upper),
+            "std": np.sqrt(np.maximum(distribution_variance(prob, lower, upper), 0.0)),
+            "overround": self.overround[e, d],
+            "buckets": self.buckets[e],
+        })
+        quantiles = distribution_quantiles(prob, lower, upper, self.buckets[e], levels)
+        for i, level in enumerate(levels):
+            frame[f"q{round(level * 100):02d}"] = quantiles[:, i]
+        for threshold in thresholds:
+            frame[f"p_below_{threshold:g}"] = distribution_cdf(prob, lower, upper, threshold)
+        return frame
+
+
+# --- Construction ---
+
+def _tail_width(lower: np.ndarray, upper: np.ndarray) -> float:
+    inner = upper - lower
+    inner = inner[np.isfinite(inner) & (inner > 0)]
+    return float(np.median(inner)) if len(inner) else DEFAULT_TAIL_WIDTH
+
+
+def _close_tails(lower: np.ndarray, upper: np.ndarray) -> None:
+    """Gives the open-ended buckets (in place) the median inner width."""
+    width = _tail_width(lower, upper)
+    lower[:] = np.where(np.isneginf(lower), upper - width, lower)
+    upper[:] = np.where(np.isposinf(upper), lower + width, upper)
+
+
+def _ffill_dates(values: np.ndarray) -> np.ndarray:
+    """Forward fill along axis 0 (dates) of a (D, B) block."""
+    observed = ~np.isnan(values)
+    index = np.where(observed, np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    filled = values[index, np.arange(values.shape[1])]
+    return np.where(np.maximum.accumulate(observed, axis=0), filled, np.nan)
+
+
+def _interp_rows(values: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """
+    Fills the NaNs of each row of a (D, K) block by linear interpolation in
+    x between the row's known neighbours (flat beyond the outermost ones).
+    Rows without any known value stay NaN.
+    """
+    known = ~np.isnan(values)
+    columns = np.arange(values.shape[1])
+    prev = np.maximum.accumulate(np.where(known, columns, -1), axis=1)
+    following = np.minimum.accumulate(np.where(known, columns, values.shape[1])[:, ::-1], axis=1)[:, ::-1]
+    prev = np.where(prev >= 0, prev, following)
+    following = np.where(following < values.shape[1], following, prev)
+    prev, following = np.clip(prev, 0, values.shape[1] - 1), np.clip(following, 0, values.shape[1] - 1)
+
+    rows = np.arange(len(values))[:, None]
+    v0, v1 = values[rows, prev], values[rows, following]
+    x0, x1 = x[prev], x[following]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        share = np.where(x1 > x0, (x[None, :] - x0) / (x1 - x0), 0.0)
+    return np.where(known, values, v0 + share * (v1 - v0))
+
+
+def _event_block(rows: pd.DataFrame, date_index: pd.Index):
+    """(lower, upper, prob (D, B), overround (D,)) of one event."""
+    floors = rows["floor_strike"].to_numpy(dtype=np.float64)
+    caps = rows["cap_strike"].to_numpy(dtype=np.float64)
+    ladder = np.isnan(caps).all() and len(np.unique(floors[~np.isnan(floors)])) > 1
+
+    if ladder:
+        strikes, market = np.unique(floors, return_inverse=True)
+    else:
+        # (floor, cap) pairs as one integer code each; np.unique(axis=0) is far slower
+        floor_values, floor_code = np.unique(np.nan_to_num(floors, nan=-np.inf), return_inverse=True)
+        cap_values, cap_code = np.unique(np.nan_to_num(caps, nan=np.inf), return_inverse=True)
+        codes, market = np.unique(floor_code * len(cap_values) + cap_code, return_inverse=True)
+        strikes = np.stack([floor_values[codes // len(cap_values)], cap_values[codes % len(cap_values)]], axis=1)
+    day = date_index.get_indexer(rows["date"])
+
+    prices = np.full((len(date_index), len(strikes)), np.nan)
+    prices[day, market] = rows["price"].to_numpy(dtype=np.float64)
+    active = slice(day.min(), day.max() + 1)  # no forward fill past the event's last price
+    block = np.full_like(prices, np.nan)
+    block[active] = _ffill_dates(prices[active])
+
+    # Markets without a price yet are unknown, not 0: they are interpolated from the priced neighbours
+    if ladder:
+        lower = np.concatenate([[-np.inf], strikes])
+        upper = np.concatenate([strikes, [np.inf]])
+        _close_tails(lower, upper)
+        has_prices = ~np.isnan(block).all(axis=1)
+        # P(outcome > k), anchored at 1 / 0 on the closed tails, so a missing strike is
+        # linearly interpolated (the same as merging its two buckets, mass uniform inside)
+        anchored = np.concatenate([np.ones((len(block), 1)), block, np.zeros((len(block), 1))], axis=1)
+        exceed = _interp_rows(anchored, np.concatenate([[lower[0]], strikes, [upper[-1]]]))
+        # Non-increasing in k, then differenced into len(k) + 1 buckets
+        exceed = np.clip(np.minimum.accumulate(exceed, axis=1), 0.0, 1.0)
+        prob = -np.diff(exceed, axis=1)
+        overround = np.full(len(block), np.nan)
+    else:
+        lower, upper = strikes[:, 0].copy(), strikes[:, 1].copy()
+        _close_tails(lower, upper)
+        complete = ~np.isnan(block).any(axis=1)
+        # A missing bucket gets the price density (price / width) of its neighbours
+        width = upper - lower
+        filled = _interp_rows(block / width, (lower + upper) / 2) * width
+        total = filled.sum(axis=1)
+        has_prices = total > 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            prob = filled / total[:, None]
+        # The overround is only measured when every bucket has a price
+        overround = np.where(has_prices & complete, total - 1.0, np.nan)
+
+    prob[~has_prices] = np.nan
+    return lower, upper, prob, overround
+
+
+def build_distribution(history: pd.DataFrame) -> ImpliedDistribution:
+    """
+    The implied distributions of every event in `history`: rows with
+    event_ticker, date, floor_strike, cap_strike and a price, taken from
+    close_price (cents, missing when nothing traded; the last price is
+    carried forward) or else implied_prob (0-1).
+    """
+    history = history.copy()
+    if "close_price" in history:
+        history["price"] = pd.to_numeric(history["close_price"], errors="coerce") / 100.0
+    else:
+        history["price"] = pd.to_numeric(history["implied_prob"], errors="coerce")
+    history["date"] = pd.to_datetime(history["date"]).dt.normalize()
+    history = history.dropna(subset=["date"])
+    # Several rows for the same (market, date): the last one wins
+    history = history.drop_duplicates(["event_ticker", "floor_strike", "cap_strike", "date"], keep="last")
+
+    history["event_ticker"] = history["event_ticker"].astype(str)
+
+    date_index = pd.Index(np.sort(history["date"].unique()))
+    events = list(pd.unique(history["event_ticker"]))
+    blocks = [_event_block(rows, date_index) for _, rows in history.groupby("event_ticker", sort=False)]
+    n_buckets = max((len(block[0]) for block in blocks), default=0)
+
+    lower = np.zeros((len(events), n_buckets))
+    upper = np.zeros((len(events), n_buckets))
+    buckets = np.zeros(len(events), dtype=np.int64)
+    prob = np.full((len(events), len(date_index), n_buckets), np.nan)
+    overround = np.full((len(events), len(date_index)), np.nan)
+    for i, (lo, hi, p, over) in enumerate(blocks):
+        b = buckets[i] = len(lo)
+        lower[i, :b], upper[i, :b] = lo, hi
+        prob[i, :, :b] = p
+        # Padding buckets hold no mass on days the event has a distribution
+        prob[i, ~np.isnan(p).all(axis=1), b:] = 0.0
+        overround[i] = over
+
+    return ImpliedDistribution(
+        events=np.array(events, dtype=object),
+        dates=date_index.to_numpy().astype("datetime64[D]"),
+        buckets=buckets,
+        lower=lower,
+        upper=upper,
+        prob=prob,
+        overround=overround,
+    )
+
+
+def load_history(path: Path = LATEST_FILE) -> pd.DataFrame:
+    """Daily candle rows of the collector output (kalshi_gdp_collector.save_data)."""
+    df = pd.read_parquet(path)
+    if "data_type" in df:
+        df = df[df["data_type"] == "historical"]
+    return df
+
+
+def main():
+    import time
+
+    if not LATEST_FILE.exists():
+        print(f"{LATEST_FILE} not found: run kalshi_gdp_collector.py first")
+        return
+    history = load_history()
+    started = time.perf_counter()
+    dist = build_distribution(history)
+    frame = dist.to_frame()
+    elapsed = time.perf_counter() - started
+    print(f"{len(dist.events)} events x {len(dist.dates)} dates x {dist.prob.shape[2]} buckets "
+          f"-> {len(frame)} daily distributions in {elapsed * 1e3:.1f} ms")
+    frame.to_parquet(OUTPUT_FILE, index=False)
+    print(f"Saved: {OUTPUT_FILE}")
+    print(frame.groupby("event_ticker", sort=False).tail(1).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
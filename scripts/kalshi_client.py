@@ -0,0 +1,247 @@
+"""
+Kalshi API client with connection pooling and client-side rate limiting.
+
+Used by kalshi_gdp_collector.py instead of bare requests.get calls: one
+pooled requests.Session keeps TCP/TLS connections alive across calls, a token
+bucket replaces the fixed time.sleep pauses, throttled (429/503) responses
+are retried with exponential backoff, and fetch_candlesticks_many()
+downloads the history of every market of an event concurrently over aiohttp.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+
+# Kalshi API base URL (public, no auth required for market data).
+# KALSHI_BASE_URL can point the client at a local fixture server.
+BASE_URL = os.environ.get("KALSHI_BASE_URL", "https://api.elections.kalshi.com/trade-api/v2")
+
+# Kalshi's basic tier allows 20 reads/second; stay comfortably below it.
+DEFAULT_RATE_PER_SECOND = 10.0
+DEFAULT_BURST = 10
+DEFAULT_POOL_SIZE = 20
+DEFAULT_TIMEOUT = 15
+# Throttled requests are retried with exponential backoff (or the server's Retry-After)
+RETRY_STATUSES = {429, 503}
+MAX_RETRIES = 4
+RETRY_BACKOFF = 1.0
+MAX_RETRY_DELAY = 30
+
+
+def get_headers() -> Dict[str, str]:
+    """Return headers for API requests."""
+    return {
+        "Accept": "application/json",
+        "Content-Type": "application/json",
+    }
+
+
+def retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before retry number `attempt` (0-based); honors a numeric Retry-After."""
+    try:
+        if retry_after is not None:
+            return min(MAX_RETRY_DELAY, max(0.0, float(retry_after)))
+    except ValueError:
+        pass
+    return min(MAX_RETRY_DELAY, RETRY_BACKOFF * 2 ** attempt)
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter shared by the sync and async request paths.
+
+    Tokens refill continuously at `rate` per second up to `capacity`; each
+    request takes one token, waiting only as long as needed for it.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Takes a token and returns how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+
+class KalshiClient:
+    """Thin, rate-limited wrapper around the public Kalshi trade API."""
+
+    def __init__(self, base_url: str = BASE_URL, rate_per_second: float = DEFAULT_RATE_PER_SECOND,
+                 burst: int = DEFAULT_BURST, pool_size: int = DEFAULT_POOL_SIZE,
+                 timeout: float = DEFAULT_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.limiter = TokenBucket(rate_per_second, burst)
+
+        self.session = requests.Session()
+        self.session.headers.update(get_headers())
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Sync path ---
+
+    def get(self, path: str, params: Optional[Dict] = None, timeout: Optional[float] = None) -> requests.Response:
+        """GET {base_url}{path} through the pooled session. Network errors propagate."""
+        self.limiter.acquire()
+        return self.session.get(f"{self.base_url}{path}", params=params, timeout=timeout or self.timeout)
+
+    def get_json(self, path: str, params: Optional[Dict] = None, label: str = "") -> Optional[Dict]:
+        """
+        JSON body of a 200 response, or None (with a warning) for any other
+        outcome. 429/503 responses are retried up to MAX_RETRIES times first.
+        """
+        try:
+            for attempt in range(MAX_RETRIES + 1):
+                response = self.get(path, params)
+                if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                    break
+                time.sleep(retry_delay(attempt, response.headers.get("Retry-After")))
+            if response.status_code != 200:
+                print(f"[WARN] {label or path}: Status {response.status_code}")
+                return None
+            return response.json()
+        except Exception as e:
+            print(f"[ERROR] {label or path}: {e}")
+            return None
+
+    def iter_pages(self, path: str, key: str, params: Optional[Dict] = None, label: str = "",
+                   strict: bool = False) -> Iterator[List[Dict]]:
+        """
+        Yields the items under `key` page by page, following Kalshi's `cursor`
+        until exhausted. A failed page ends the iteration, or raises
+        RuntimeError with `strict` (callers that must not store a partial set).
+        """
+        params = dict(params or {})
+        while True:
+            data = self.get_json(path, params, label)
+            if data is None:
+                if strict:
+                    raise RuntimeError(f"{label or path}: pagination interrupted")
+                return
+            yield data.get(key, [])
+            cursor = data.get("cursor")
+            if not cursor:
+                return
+            params["cursor"] = cursor
+
+    def paginate(self, path: str, key: str, params: Optional[Dict] = None, label: str = "") -> List[Dict]:
+        """Follows Kalshi's `cursor` until exhausted and returns all items under `key`."""
+        return [item for page in self.iter_pages(path, key, params, label) for item in page]
+
+    def candlesticks_params(self, start_ts: Optional[int] = None, end_ts: Optional[int] = None,
+                            period_interval: int = 1440) -> Dict:
+        params = {"period_interval": period_interval}
+        if start_ts:
+            params["start_ts"] = start_ts
+        if end_ts:
+            params["end_ts"] = end_ts
+        return params
+
+    # --- Async fan-out ---
+
+    async def _get_json_async(self, session: aiohttp.ClientSession, path: str, params: Dict):
+        """
+        Returns (status, json body or None). status is None on network errors;
+        a body that is not JSON gives (status, None). Throttled requests are
+        retried like in get_json.
+        """
+        try:
+            for attempt in range(MAX_RETRIES + 1):
+                await self.limiter.acquire_async()
+                async with session.get(f"{self.base_url}{path}", params=params) as response:
+                    if response.status in RETRY_STATUSES and attempt < MAX_RETRIES:
+                        delay = retry_delay(attempt, response.headers.get("Retry-After"))
+                    elif response.status != 200:
+                        return response.status, None
+                    else:
+                        return response.status, await response.json(content_type=None)
+                await asyncio.sleep(delay)
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+            print(f"[ERROR] {path}: {e}")
+            return None, None
+        except ValueError as e:
+            # Unparseable body: this market fails, the rest of the gather goes on
+            print(f"[ERROR] {path}: {e}")
+            return response.status, None
+
+    async def _candlesticks_many(self, params_by_ticker: Dict[str, Dict]) -> Dict[str, Optional[List[Dict]]]:
+        market_tickers = list(params_by_ticker)
+        connector = aiohttp.TCPConnector(limit=self.pool_size)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=get_headers()) as session:
+            responses = await asyncio.gather(*[
+                self._get_json_async(session, f"/markets/{ticker}/candlesticks", params_by_ticker[ticker])
+                for ticker in market_tickers
+            ])
+
+        results: Dict[str, Optional[List[Dict]]] = {}
+        for ticker, (status, data) in zip(market_tickers, responses):
+            if data is not None:
+                results[ticker] = data.get("candlesticks", [])
+            elif status is not None:
+                # The endpoint answered but has no candles for this market.
+                print(f"[WARN] History for {ticker}: Status {status}")
+                results[ticker] = None
+            # Network errors are left out: the caller must not take them for an empty history
+        return results
+
+    def fetch_candlesticks_many(self, market_tickers: Iterable[str],
+                                start_ts: Union[int, Dict[str, Optional[int]], None] = None,
+                                end_ts: Optional[int] = None, period_interval: int = 1440) -> Dict[str, Optional[List[Dict]]]:
+        """
+        Candlesticks for many markets at once, concurrently.
+
+        `start_ts` is either one timestamp for every market or a dict of
+        per-market timestamps (markets missing from it get their full history),
+        so incremental callers resume each market where its stored history ends.
+
+        Maps ticker -> list of candles; None means the endpoint answered with
+        a non-200 status (callers fall back to the trades endpoint). Markets
+        whose request failed on the network are missing from the result.
+        """
+        market_tickers = list(market_tickers)
+        if not market_tickers:
+            return {}
+        starts = start_ts if isinstance(start_ts, dict) else dict.fromkeys(market_tickers, start_ts)
+        params_by_ticker = {
+            ticker: self.candlesticks_params(starts.get(ticker), end_ts, period_interval)
+            for ticker in market_tickers
+        }
+        return asyncio.run(self._candlesticks_many(params_by_ticker))
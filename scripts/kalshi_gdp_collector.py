@@ -8,16 +8,31 @@ Author: PX Economics
 Purpose: Academic research on nowcasting vs prediction markets
 """
 
-import requests
 import pandas as pd
 import json
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Dict, List, Optional, Tuple
-import time
 import os
+import sys
 
-# Kalshi API base URL (public, no auth required for market data)
-BASE_URL = "https://api.elections.kalshi.com/trade-api/v2"
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.kalshi_client import BASE_URL, KalshiClient
+from scripts.kalshi_store import CandleStore
+from scripts.kalshi_trades import TickStore, ingest_market, resample
+
+# One pooled, rate-limited client shared by every fetch in this module
+CLIENT = KalshiClient(BASE_URL)
+
+# Candle history persisted across runs (data/kalshi/candles/)
+STORE = CandleStore()
+
+# Trades of the markets without candlesticks (data/kalshi/trades/), resampled to the candles' interval
+TICKS = TickStore()
+DAILY_INTERVAL = "1440min"
 
 # GDP series tickers (old format and new format)
 GDP_SERIES = ["GDP", "KXGDP"]
@@ -50,95 +65,23 @@ TARGET_EVENTS = [
 ]
 
 
-def get_headers() -> Dict[str, str]:
-    """Return headers for API requests."""
-    return {
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-    }
-
-
 def fetch_series(series_ticker: str) -> Optional[Dict]:
     """Fetch series information."""
-    url = f"{BASE_URL}/series/{series_ticker}"
-    try:
-        response = requests.get(url, headers=get_headers(), timeout=10)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            print(f"[WARN] Series {series_ticker}: Status {response.status_code}")
-            return None
-    except Exception as e:
-        print(f"[ERROR] Series {series_ticker}: {e}")
-        return None
+    return CLIENT.get_json(f"/series/{series_ticker}", label=f"Series {series_ticker}")
 
 
 def fetch_events_for_series(series_ticker: str, status: str = None) -> List[Dict]:
     """Fetch all events for a series."""
-    url = f"{BASE_URL}/events"
     params = {"series_ticker": series_ticker}
     if status:
         params["status"] = status
-    
-    all_events = []
-    cursor = None
-    
-    while True:
-        if cursor:
-            params["cursor"] = cursor
-        
-        try:
-            response = requests.get(url, headers=get_headers(), params=params, timeout=10)
-            if response.status_code != 200:
-                print(f"[WARN] Events for {series_ticker}: Status {response.status_code}")
-                break
-            
-            data = response.json()
-            events = data.get("events", [])
-            all_events.extend(events)
-            
-            cursor = data.get("cursor")
-            if not cursor:
-                break
-                
-        except Exception as e:
-            print(f"[ERROR] Events for {series_ticker}: {e}")
-            break
-    
-    return all_events
+    return CLIENT.paginate("/events", "events", params, label=f"Events for {series_ticker}")
 
 
 def fetch_markets_for_event(event_ticker: str) -> List[Dict]:
     """Fetch all markets (contracts) for an event."""
-    url = f"{BASE_URL}/markets"
     params = {"event_ticker": event_ticker}
-    
-    all_markets = []
-    cursor = None
-    
-    while True:
-        if cursor:
-            params["cursor"] = cursor
-        
-        try:
-            response = requests.get(url, headers=get_headers(), params=params, timeout=10)
-            if response.status_code != 200:
-                print(f"[WARN] Markets for {event_ticker}: Status {response.status_code}")
-                break
-            
-            data = response.json()
-            markets = data.get("markets", [])
-            all_markets.extend(markets)
-            
-            cursor = data.get("cursor")
-            if not cursor:
-                break
-                
-        except Exception as e:
-            print(f"[ERROR] Markets for {event_ticker}: {e}")
-            break
-    
-    return all_markets
+    return CLIENT.paginate("/markets", "markets", params, label=f"Markets for {event_ticker}")
 
 
 def fetch_market_history(market_ticker: str, min_ts: int = None, max_ts: int = None) -> List[Dict]:
@@ -148,22 +91,14 @@ def fetch_market_history(market_ticker: str, min_ts: int = None, max_ts: int = N
     This gives us price history which represents probability over time.
     Price in cents / 100 = implied probability.
     """
-    url = f"{BASE_URL}/markets/{market_ticker}/candlesticks"
-    params = {
-        "period_interval": 1440,  # 1 day in minutes (daily candles)
-    }
-    
-    if min_ts:
-        params["start_ts"] = min_ts
-    if max_ts:
-        params["end_ts"] = max_ts
+    params = CLIENT.candlesticks_params(min_ts, max_ts)
     
     try:
-        response = requests.get(url, headers=get_headers(), params=params, timeout=15)
+        response = CLIENT.get(f"/markets/{market_ticker}/candlesticks", params=params)
         if response.status_code != 200:
             print(f"[WARN] History for {market_ticker}: Status {response.status_code}")
             # Try alternative approach
-            return fetch_market_history_alternative(market_ticker)
+            return fetch_market_history_alternative(market_ticker) or []
         
         data = response.json()
         return data.get("candlesticks", [])
@@ -173,54 +108,61 @@ def fetch_market_history(market_ticker: str, min_ts: int = None, max_ts: int = N
         return []
 
 
-def fetch_market_history_alternative(market_ticker: str) -> List[Dict]:
-    """Alternative method using trades endpoint if candlesticks not available."""
-    url = f"{BASE_URL}/markets/{market_ticker}/trades"
-    params = {"limit": 1000}
-    
-    try:
-        response = requests.get(url, headers=get_headers(), params=params, timeout=15)
-        if response.status_code != 200:
-            return []
-        
-        data = response.json()
-        return data.get("trades", [])
-        
-    except Exception as e:
-        print(f"[ERROR] Trades for {market_ticker}: {e}")
-        return []
+def fetch_histories_for_markets(market_tickers: List[str],
+                                start_ts: Optional[Dict[str, Optional[int]]] = None) -> Dict[str, Optional[List[Dict]]]:
+    """
+    Fetch candlestick histories for all markets of an event concurrently.
+
+    `start_ts` maps market ticker -> first timestamp wanted, so only the
+    candles missing from the store are downloaded. Markets whose candlesticks
+    endpoint answers with an error fall back to the trades endpoint, like
+    fetch_market_history does. None means the fetch failed this run.
+    """
+    start_ts = start_ts or {}
+    fetched = CLIENT.fetch_candlesticks_many(market_tickers, start_ts=start_ts)
+    histories = {}
+    for ticker in market_tickers:
+        if ticker not in fetched:
+            histories[ticker] = None  # network error
+        elif fetched[ticker] is None:
+            histories[ticker] = fetch_market_history_alternative(ticker, start_ts.get(ticker))
+        else:
+            histories[ticker] = fetched[ticker]
+    return histories
+
+
+def fetch_market_history_alternative(market_ticker: str, min_ts: int = None) -> Optional[List[Dict]]:
+    """
+    Alternative method using trades endpoint if candlesticks not available:
+    every trade not yet in the tick store is fetched (all pages), and daily
+    candles are built from the stored trades. None if the trades could not
+    be fetched.
+    """
+    if ingest_market(CLIENT, market_ticker, TICKS) is None:
+        return None
+    candles = resample(TICKS.load(market_ticker), DAILY_INTERVAL)
+    if min_ts:
+        candles = candles[candles['end_period_ts'] >= min_ts]
+    candles = candles.assign(yes_price=candles['close'])
+    return candles[['end_period_ts', 'open', 'high', 'low', 'close', 'yes_price', 'volume']].to_dict('records')
 
 
 def fetch_orderbook(market_ticker: str) -> Optional[Dict]:
     """Fetch current orderbook for a market."""
-    url = f"{BASE_URL}/markets/{market_ticker}/orderbook"
-    
-    try:
-        response = requests.get(url, headers=get_headers(), timeout=10)
-        if response.status_code != 200:
-            return None
-        
-        return response.json().get("orderbook", {})
-        
-    except Exception as e:
-        print(f"[ERROR] Orderbook for {market_ticker}: {e}")
-        return None
+    data = CLIENT.get_json(f"/markets/{market_ticker}/orderbook", label=f"Orderbook for {market_ticker}")
+    return data.get("orderbook", {}) if data else None
 
 
 def fetch_market_details(market_ticker: str) -> Optional[Dict]:
     """Fetch detailed market information."""
-    url = f"{BASE_URL}/markets/{market_ticker}"
-    
-    try:
-        response = requests.get(url, headers=get_headers(), timeout=10)
-        if response.status_code != 200:
-            return None
-        
-        return response.json().get("market", {})
-        
-    except Exception as e:
-        print(f"[ERROR] Market details for {market_ticker}: {e}")
-        return None
+    data = CLIENT.get_json(f"/markets/{market_ticker}", label=f"Market details for {market_ticker}")
+    return data.get("market", {}) if data else None
+
+
+def settlement_ts(market: Dict) -> Optional[int]:
+    """Close time of a market in epoch seconds (None if missing or unparseable)."""
+    close_time = pd.to_datetime(market.get('close_time'), utc=True, errors='coerce')
+    return None if pd.isna(close_time) else int(close_time.timestamp())
 
 
 def parse_quarter_from_event(event_ticker: str, title: str) -> Tuple[int, int]:
@@ -262,6 +204,110 @@ def parse_quarter_from_event(event_ticker: str, title: str) -> Tuple[int, int]:
     return None, None
 
 
+# Market-level fields (one row per market), joined onto its candles
+MARKET_COLUMNS = [
+    'event_ticker', 'market_ticker', 'title', 'year', 'quarter', 'floor_strike', 'cap_strike',
+    'last_price', 'yes_bid', 'yes_ask', 'no_bid', 'no_ask', 'volume', 'open_interest',
+    'result', 'settled', 'close_time',
+]
+HISTORY_META_COLUMNS = [
+    'market_ticker', 'event_ticker', 'title', 'year', 'quarter', 'floor_strike', 'cap_strike', 'result', 'settled',
+]
+NUMERIC_MARKET_COLUMNS = ['last_price', 'yes_bid', 'yes_ask', 'no_bid', 'no_ask', 'volume', 'open_interest']
+CATEGORICAL_COLUMNS = ['event_ticker', 'market_ticker', 'title', 'data_type']
+
+
+def build_market_frame(markets: List[Dict], event_ticker: str, year: int, quarter: int) -> pd.DataFrame:
+    """Market metadata and current state of an event, one row per market."""
+    frame = pd.DataFrame({
+        'event_ticker': event_ticker,
+        'market_ticker': [m.get('ticker') for m in markets],
+        'title': [m.get('title', m.get('subtitle', '')) for m in markets],
+        'year': year,
+        'quarter': quarter,
+        # Strike prices (GDP ranges)
+        'floor_strike': [m.get('floor_strike') for m in markets],
+        'cap_strike': [m.get('cap_strike') for m in markets],
+        # Current market state
+        'last_price': [m.get('last_price') for m in markets],
+        'yes_bid': [m.get('yes_bid') for m in markets],
+        'yes_ask': [m.get('yes_ask') for m in markets],
+        'no_bid': [m.get('no_bid') for m in markets],
+        'no_ask': [m.get('no_ask') for m in markets],
+        'volume': [m.get('volume') for m in markets],
+        'open_interest': [m.get('open_interest') for m in markets],
+        # Settlement info
+        'result': [m.get('result') for m in markets],
+        'settled': [m.get('status') == 'settled' for m in markets],
+        'close_time': [m.get('close_time') for m in markets],
+    }, columns=MARKET_COLUMNS)
+    frame[NUMERIC_MARKET_COLUMNS] = frame[NUMERIC_MARKET_COLUMNS].apply(pd.to_numeric, errors='coerce')
+    return frame
+
+
+def build_history_frame(candles: pd.DataFrame, market_meta: pd.DataFrame) -> pd.DataFrame:
+    """
+    Historical rows: the stored candles of an event (columnar, see
+    kalshi_store) joined with the metadata of its markets.
+    """
+    if candles.empty:
+        return pd.DataFrame()
+    history = candles.merge(market_meta[HISTORY_META_COLUMNS], on='market_ticker', how='inner')
+    dates = pd.to_datetime(history['end_period_ts'], unit='s', utc=True).dt.strftime('%Y-%m-%d')
+    return pd.DataFrame({
+        'event_ticker': history['event_ticker'],
+        'market_ticker': history['market_ticker'],
+        'title': history['title'],
+        'year': history['year'],
+        'quarter': history['quarter'],
+        'floor_strike': history['floor_strike'],
+        'cap_strike': history['cap_strike'],
+        'date': dates,
+        'open_price': history['open'],
+        'high_price': history['high'],
+        'low_price': history['low'],
+        'close_price': history['close'],
+        'yes_price': history['yes_price'],
+        'volume': history['volume'],
+        'implied_prob': history['close'].fillna(0) / 100.0,
+        'result': history['result'],
+        'settled': history['settled'],
+        'data_type': 'historical',
+    })
+
+
+def build_current_frame(market_meta: pd.DataFrame) -> pd.DataFrame:
+    """Current-state rows, one per market."""
+    last_price = market_meta['last_price']
+    return pd.DataFrame({
+        'event_ticker': market_meta['event_ticker'],
+        'market_ticker': market_meta['market_ticker'],
+        'title': market_meta['title'],
+        'year': market_meta['year'],
+        'quarter': market_meta['quarter'],
+        'floor_strike': market_meta['floor_strike'],
+        'cap_strike': market_meta['cap_strike'],
+        'date': datetime.now().strftime('%Y-%m-%d'),
+        'open_price': float('nan'),
+        'high_price': float('nan'),
+        'low_price': float('nan'),
+        'close_price': last_price,
+        'yes_price': last_price,
+        'yes_bid': market_meta['yes_bid'],
+        'yes_ask': market_meta['yes_ask'],
+        'no_bid': market_meta['no_bid'],
+        'no_ask': market_meta['no_ask'],
+        'volume': market_meta['volume'],
+        'open_interest': market_meta['open_interest'],
+        # 0 and missing prices both mean "no implied probability"
+        'implied_prob': (last_price / 100.0).where(last_price.fillna(0) != 0),
+        'result': market_meta['result'],
+        'settled': market_meta['settled'],
+        'close_time': market_meta['close_time'],
+        'data_type': 'current',
+    })
+
+
 def collect_gdp_data() -> pd.DataFrame:
     """
     Main function to collect all GDP market data from Kalshi.
@@ -282,7 +328,7 @@ def collect_gdp_data() -> pd.DataFrame:
     - open_interest: Open interest
     """
     
-    all_data = []
+    frames = []
     
     print("=" * 80)
     print("KALSHI GDP DATA COLLECTOR")
@@ -296,7 +342,6 @@ def collect_gdp_data() -> pd.DataFrame:
         print(f"  Fetching events for series: {series}")
         events = fetch_events_for_series(series)
         all_events.extend(events)
-        time.sleep(0.5)  # Rate limiting
     
     print(f"  Found {len(all_events)} total events")
     
@@ -323,7 +368,6 @@ def collect_gdp_data() -> pd.DataFrame:
                     'title': markets[0].get('event_title', f'GDP {event_ticker}'),
                     'markets': markets
                 })
-            time.sleep(0.3)
     
     # Now collect market data for each event
     print("\n[3/4] Collecting market data for each event...")
@@ -339,7 +383,6 @@ def collect_gdp_data() -> pd.DataFrame:
         
         # Get markets for this event
         markets = event.get('markets') or fetch_markets_for_event(event_ticker)
-        time.sleep(0.3)
         
         if not markets:
             print(f"    [WARN] No markets found")
@@ -347,129 +390,57 @@ def collect_gdp_data() -> pd.DataFrame:
         
         print(f"    Found {len(markets)} markets/contracts")
         
-        for market in markets:
-            market_ticker = market.get('ticker')
-            market_title = market.get('title', market.get('subtitle', ''))
-            
-            # Extract strike prices (GDP ranges)
-            floor_strike = market.get('floor_strike')
-            cap_strike = market.get('cap_strike')
-            
-            # Current market state
-            yes_bid = market.get('yes_bid')
-            yes_ask = market.get('yes_ask')
-            no_bid = market.get('no_bid')
-            no_ask = market.get('no_ask')
-            last_price = market.get('last_price')
-            volume = market.get('volume')
-            open_interest = market.get('open_interest')
-            
-            # Settlement info
-            result = market.get('result')
-            settled = market.get('status') == 'settled'
-            close_time = market.get('close_time')
-            
-            # Get historical data (candlesticks)
-            print(f"      Fetching history for: {market_ticker}")
-            history = fetch_market_history(market_ticker)
-            time.sleep(0.2)
-            
-            if history:
-                # Add historical data points
-                for candle in history:
-                    timestamp = candle.get('end_period_ts') or candle.get('ts')
-                    if timestamp:
-                        date = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
-                    else:
-                        date = candle.get('period_end', 'unknown')
-                    
-                    all_data.append({
-                        'event_ticker': event_ticker,
-                        'market_ticker': market_ticker,
-                        'title': market_title,
-                        'year': year,
-                        'quarter': quarter,
-                        'floor_strike': floor_strike,
-                        'cap_strike': cap_strike,
-                        'date': date,
-                        'open_price': candle.get('open'),
-                        'high_price': candle.get('high'),
-                        'low_price': candle.get('low'),
-                        'close_price': candle.get('close'),
-                        'yes_price': candle.get('yes_price', candle.get('close')),
-                        'volume': candle.get('volume'),
-                        'implied_prob': (candle.get('close', 0) or 0) / 100.0,
-                        'result': result,
-                        'settled': settled,
-                        'data_type': 'historical'
-                    })
-            
-            # Always add current state
-            all_data.append({
-                'event_ticker': event_ticker,
-                'market_ticker': market_ticker,
-                'title': market_title,
-                'year': year,
-                'quarter': quarter,
-                'floor_strike': floor_strike,
-                'cap_strike': cap_strike,
-                'date': datetime.now().strftime('%Y-%m-%d'),
-                'open_price': None,
-                'high_price': None,
-                'low_price': None,
-                'close_price': last_price,
-                'yes_price': last_price,
-                'yes_bid': yes_bid,
-                'yes_ask': yes_ask,
-                'no_bid': no_bid,
-                'no_ask': no_ask,
-                'volume': volume,
-                'open_interest': open_interest,
-                'implied_prob': (last_price or 0) / 100.0 if last_price else None,
-                'result': result,
-                'settled': settled,
-                'close_time': close_time,
-                'data_type': 'current'
-            })
+        # Get historical data (candlesticks) for every market of the event at
+        # once, resuming each market where the store ends. Markets stored
+        # after settlement cannot change any more and are not requested.
+        market_tickers = [m.get('ticker') for m in markets]
+        settled_markets = {m.get('ticker'): settlement_ts(m) for m in markets if m.get('status') == 'settled'}
+        to_fetch = [t for t in market_tickers if not STORE.is_frozen(t)]
+        print(f"      Fetching history for {len(to_fetch)} markets "
+              f"({len(market_tickers) - len(to_fetch)} settled markets already stored)")
+        new_candles = fetch_histories_for_markets(to_fetch, {t: STORE.start_ts_for(t) for t in to_fetch})
+        stored = STORE.append_event(event_ticker, new_candles, settled_markets)
+        
+        market_meta = build_market_frame(markets, event_ticker, year, quarter)
+        frames.append(build_history_frame(stored, market_meta))
+        frames.append(build_current_frame(market_meta))
     
     print("\n[4/4] Creating DataFrame...")
     
-    df = pd.DataFrame(all_data)
+    frames = [f for f in frames if not f.empty]
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
     
     # Sort by year, quarter, date
     if not df.empty:
         df = df.sort_values(['year', 'quarter', 'date', 'floor_strike'], 
                            ascending=[True, True, True, True])
+        # Few distinct tickers/titles repeated over many rows
+        for column in CATEGORICAL_COLUMNS:
+            df[column] = df[column].astype('category')
     
     return df
 
 
 def save_data(df: pd.DataFrame, output_dir: str = "data/kalshi"):
-    """Save collected data to various formats."""
+    """
+    Save the "latest" snapshot of the collected data.
+
+    The candle history itself already lives in the incremental store
+    (data/kalshi/candles/), so runs no longer write timestamped copies.
+    """
     os.makedirs(output_dir, exist_ok=True)
     
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    
-    # Save as Parquet (efficient for analysis)
-    parquet_path = os.path.join(output_dir, f"kalshi_gdp_{timestamp}.parquet")
+    # Parquet (efficient for analysis)
+    parquet_path = os.path.join(output_dir, "kalshi_gdp_latest.parquet")
     df.to_parquet(parquet_path, index=False)
     print(f"  Saved: {parquet_path}")
     
-    # Save as CSV (human readable)
-    csv_path = os.path.join(output_dir, f"kalshi_gdp_{timestamp}.csv")
+    # CSV (human readable, read by show_kalshi_summary.py)
+    csv_path = os.path.join(output_dir, "kalshi_gdp_latest.csv")
     df.to_csv(csv_path, index=False)
     print(f"  Saved: {csv_path}")
     
-    # Save as JSON (for web apps)
-    json_path = os.path.join(output_dir, f"kalshi_gdp_{timestamp}.json")
-    df.to_json(json_path, orient='records', date_format='iso')
-    print(f"  Saved: {json_path}")
-    
-    # Also save a "latest" version
-    df.to_parquet(os.path.join(output_dir, "kalshi_gdp_latest.parquet"), index=False)
-    df.to_csv(os.path.join(output_dir, "kalshi_gdp_latest.csv"), index=False)
-    
-    return parquet_path, csv_path, json_path
+    return parquet_path, csv_path
 
 
 def create_probability_distribution_summary(df: pd.DataFrame) -> pd.DataFrame:
@@ -492,7 +463,8 @@ def create_probability_distribution_summary(df: pd.DataFrame) -> pd.DataFrame:
         index=['year', 'quarter', 'event_ticker'],
         columns='title',
         values='implied_prob',
-        aggfunc='first'
+        aggfunc='first',
+        observed=True
     ).reset_index()
     
     return summary
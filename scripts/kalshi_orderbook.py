@@ -0,0 +1,302 @@
+"""
+Orderbook recorder for Kalshi markets.
+
+Polls the orderbook of every open market of the tracked events (default:
+the open events of the GDP series) concurrently, every POLL_SECONDS, and
+stores only the price levels that changed since the previous poll:
+
+    data/kalshi/orderbooks/event_ticker=<EVENT>/<YYYY-MM>/part-<ts>.parquet
+        ts  market_ticker  side  price  quantity  keyframe
+
+side is 1 for yes bids and 0 for no bids (a no bid at p is a yes ask at
+100 - p), price is in cents, quantity 0 means the level was removed. Once
+per KEYFRAME_SECONDS (and whenever the poller starts) every level of a
+market is written with keyframe = 1, after a marker row (side and price
+-1) that resets the market's book, so a book is rebuilt from its last
+keyframe without replaying the whole month. Keyframes are per market: one
+whose fetch fails keeps its keyframe pending until its next successful
+poll. Buffered rows are written every FLUSH_POLLS polls; the parts of past
+months are merged into one file.
+
+book_metrics() rebuilds the books as dense (time x price) ladders and
+computes best bid/ask, spread, mid, depth near the touch and imbalance for
+every change of every market, vectorized.
+
+    python scripts/kalshi_orderbook.py                        # poll until interrupted
+    python scripts/kalshi_orderbook.py --event KXGDP-25OCT30 --iterations 5
+    book_metrics(OrderbookStore().load("KXGDP-25OCT30"))
+"""
+
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.kalshi_gdp_collector import GDP_SERIES, fetch_events_for_series, fetch_markets_for_event, fetch_orderbook
+
+# --- Configuration ---
+ORDERBOOK_DIR = PROJECT_ROOT / "data" / "kalshi" / "orderbooks"
+POLL_SECONDS = 60
+FLUSH_POLLS = 60            # write the buffered deltas about once an hour at one-minute polling
+KEYFRAME_SECONDS = 86400    # a full snapshot once a day
+REFRESH_POLLS = 60          # re-list the open markets (new strikes get listed)
+WORKERS = 8
+DEPTH_CENTS = 5             # depth is summed over the levels within this many cents of the touch
+
+SIDES = {"yes": 1, "no": 0}
+KEYFRAME_MARKER = -1        # side and price of the row that opens a market's keyframe
+PRICE_LEVELS = 100          # prices are 1-99 cents
+ROW_DTYPES = {"ts": np.int64, "side": np.int8, "price": np.int16, "quantity": np.int32, "keyframe": np.int8}
+COLUMNS = ["ts", "market_ticker", "side", "price", "quantity", "keyframe"]
+
+Book = Dict[Tuple[int, int], int]
+
+
+def book_levels(orderbook: Optional[Dict]) -> Book:
+    """{(side, price): quantity} of an API orderbook (yes and no bids)."""
+    levels: Book = {}
+    for name, side in SIDES.items():
+        for price, quantity in (orderbook or {}).get(name) or []:
+            if quantity:
+                levels[(side, int(price))] = int(quantity)
+    return levels
+
+
+def book_delta(previous: Book, current: Book) -> Book:
+    """The levels that changed, with quantity 0 for the removed ones."""
+    delta = {level: quantity for level, quantity in current.items() if previous.get(level) != quantity}
+    delta.update({level: 0 for level in previous.keys() - current.keys()})
+    return delta
+
+
+def _safe_name(ticker: str) -> str:
+    return re.sub(r'[^A-Za-z0-9._-]', '_', ticker)
+
+
+class OrderbookStore:
+    """Event- and month-partitioned parquet store of orderbook deltas."""
+
+    def __init__(self, root: Path = ORDERBOOK_DIR):
+        self.root = Path(root)
+
+    def event_dir(self, event_ticker: str) -> Path:
+        return self.root / f"event_ticker={_safe_name(event_ticker)}"
+
+    def write_part(self, event_ticker: str, rows: pd.DataFrame) -> None:
+        """Writes buffered rows as one part per month they span."""
+        months = pd.to_datetime(rows["ts"], unit="s").dt.strftime("%Y-%m")
+        for month, part in rows.groupby(months.to_numpy(), sort=True):
+            folder = self.event_dir(event_ticker) / month
+            folder.mkdir(parents=True, exist_ok=True)
+            path = folder / f"part-{int(part['ts'].iloc[0])}.parquet"
+            self._write(part, path)
+
+    def _write(self, rows: pd.DataFrame, path: Path) -> None:
+        rows = rows.astype(ROW_DTYPES)
+        tmp_path = path.with_suffix(".tmp")
+        # Sorted by market and time within the file: runs of equal tickers/sides compress to almost nothing
+        rows.sort_values(["market_ticker", "ts", "side", "price"], kind="stable").to_parquet(
+            tmp_path, index=False, compression="zstd")
+        os.replace(tmp_path, path)
+
+    def compact(self, event_ticker: str, month: str) -> None:
+        """Merges the parts of a month into one file (month.parquet)."""
+        folder = self.event_dir(event_ticker) / month
+        parts = sorted(folder.glob("part-*.parquet"))
+        if not parts:
+            return
+        existing = [folder / "month.parquet"] if (folder / "month.parquet").exists() else []
+        rows = pd.concat([pd.read_parquet(p) for p in existing + parts], ignore_index=True)
+        self._write(rows, folder / "month.parquet")
+        for part in parts:
+            part.unlink()
+
+    def months(self, event_ticker: str) -> List[str]:
+        folder = self.event_dir(event_ticker)
+        return sorted(p.name for p in folder.iterdir() if p.is_dir()) if folder.exists() else []
+
+    def load(self, event_ticker: str, months: Optional[List[str]] = None) -> pd.DataFrame:
+        """Delta rows of an event (all months by default), sorted by time."""
+        paths = [p for month in (months or self.months(event_ticker))
+                 for p in sorted((self.event_dir(event_ticker) / month).glob("*.parquet"))]
+        if not paths:
+            return pd.DataFrame({column: pd.Series(dtype=ROW_DTYPES.get(column, "string")) for column in COLUMNS})
+        rows = pd.concat([pd.read_parquet(p) for p in paths], ignore_index=True)
+        return rows.sort_values(["ts", "market_ticker", "side", "price"], kind="stable", ignore_index=True)
+
+
+class OrderbookPoller:
+    """Polls the open markets of some events and buffers the orderbook deltas per event."""
+
+    def __init__(self, events: List[str], store: Optional[OrderbookStore] = None, workers: int = WORKERS):
+        self.events = events
+        self.store = store or OrderbookStore()
+        self.workers = workers
+        self.markets: Dict[str, str] = {}       # market ticker -> event ticker
+        self.books: Dict[str, Book] = {}
+        self.buffers: Dict[str, List[Tuple]] = {event: [] for event in events}
+        self.last_keyframe: Dict[str, int] = {}  # market ticker -> ts of its last written keyframe
+        self.polls = 0
+
+    def refresh_markets(self) -> None:
+        self.markets = {
+            m.get("ticker"): event
+            for event in self.events
+            for m in fetch_markets_for_event(event)
+            if m.get("status") in ("open", "active")
+        }
+
+    def poll(self, now: Optional[int] = None) -> int:
+        """Snapshots every open market once; returns how many level changes were buffered."""
+        if self.polls % REFRESH_POLLS == 0:
+            self.refresh_markets()
+        now = int(time.time()) if now is None else now
+        tickers = list(self.markets)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            orderbooks = list(pool.map(fetch_orderbook, tickers))
+
+        changes = 0
+        for ticker, orderbook in zip(tickers, orderbooks):
+            if orderbook is None:
+                # Failed request: keep the previous book (the next poll diffs against it) and,
+                # if a keyframe was due, leave it pending for the next successful poll
+                continue
+            current = book_levels(orderbook)
+            buffer = self.buffers[self.markets[ticker]]
+            keyframe = ticker not in self.last_keyframe or now - self.last_keyframe[ticker] >= KEYFRAME_SECONDS
+            if keyframe:
+                self.last_keyframe[ticker] = now
+                levels = current
+                buffer.append((now, ticker, KEYFRAME_MARKER, KEYFRAME_MARKER, 0, 1))
+            else:
+                levels = book_delta(self.books.get(ticker, {}), current)
+            self.books[ticker] = current
+            buffer.extend((now, ticker, side, price, quantity, int(keyframe))
+                          for (side, price), quantity in sorted(levels.items()))
+            changes += len(levels)
+
+        self.polls += 1
+        if self.polls % FLUSH_POLLS == 0:
+            self.flush()
+        return changes
+
+    def flush(self) -> None:
+        current_month = datetime.now(timezone.utc).strftime("%Y-%m")
+        for event, buffer in self.buffers.items():
+            if buffer:
+                self.store.write_part(event, pd.DataFrame(buffer, columns=COLUMNS))
+                buffer.clear()
+            for month in self.store.months(event):
+                if month < current_month:
+                    self.store.compact(event, month)
+
+    def run(self, interval: float = POLL_SECONDS, iterations: Optional[int] = None) -> None:
+        """Polls on a fixed schedule (not drifting with the request time) until interrupted."""
+        started = time.monotonic()
+        try:
+            while iterations is None or self.polls < iterations:
+                changes = self.poll()
+                print(f"  {datetime.now().strftime('%H:%M:%S')} {len(self.markets)} markets, {changes} level changes")
+                time.sleep(max(0.0, started + self.polls * interval - time.monotonic()))
+        except KeyboardInterrupt:
+            print("Interrupted")
+        finally:
+            self.flush()
+
+
+# --- Metrics ---
+
+def _ladders(rows: pd.DataFrame, times: np.ndarray) -> np.ndarray:
+    """(T, 2, PRICE_LEVELS) quantities of one market after each of `times`."""
+    ladder = np.full((len(times), 2, PRICE_LEVELS), np.nan, dtype=np.float32)
+    # A keyframe marker resets the market's book: levels its keyframe does not list are empty
+    marker = rows["side"].to_numpy() == KEYFRAME_MARKER
+    ladder[np.searchsorted(times, rows.loc[marker, "ts"].to_numpy())] = 0.0
+    rows = rows[~marker]
+    t = np.searchsorted(times, rows["ts"].to_numpy())
+    ladder[t, rows["side"].to_numpy(), rows["price"].to_numpy()] = rows["quantity"].to_numpy()
+
+    flat = ladder.reshape(len(times), -1)
+    observed = ~np.isnan(flat)
+    index = np.where(observed, np.arange(len(times))[:, None], 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    filled = flat[index, np.arange(flat.shape[1])]
+    return np.nan_to_num(filled, nan=0.0).reshape(ladder.shape)
+
+
+def _touch(quantities: np.ndarray) -> np.ndarray:
+    """(T,) highest price with a resting quantity, -1 when the side is empty."""
+    has = quantities > 0
+    best = PRICE_LEVELS - 1 - has[:, ::-1].argmax(axis=1)
+    return np.where(has.any(axis=1), best, -1)
+
+
+def book_metrics(rows: pd.DataFrame, depth_cents: int = DEPTH_CENTS) -> pd.DataFrame:
+    """
+    One row per (market, time its book changed): best yes bid and ask
+    (cents), spread, mid, contracts resting within `depth_cents` of each
+    touch, and imbalance = (bid depth - ask depth) / total depth.
+    """
+    prices = np.arange(PRICE_LEVELS)
+    frames = []
+    for market, market_rows in rows.groupby("market_ticker", sort=True):
+        times = np.unique(market_rows["ts"].to_numpy())
+        ladder = _ladders(market_rows, times)
+        yes, no = ladder[:, SIDES["yes"]], ladder[:, SIDES["no"]]
+        best_bid, best_no = _touch(yes), _touch(no)
+        best_ask = np.where(best_no >= 0, PRICE_LEVELS - best_no, -1)
+        bid_depth = np.where(prices >= best_bid[:, None] - depth_cents, yes, 0).sum(axis=1)
+        ask_depth = np.where(prices >= best_no[:, None] - depth_cents, no, 0).sum(axis=1)
+        two_sided = (best_bid >= 0) & (best_ask >= 0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            imbalance = (bid_depth - ask_depth) / (bid_depth + ask_depth)
+        frames.append(pd.DataFrame({
+            "ts": times,
+            "market_ticker": market,
+            "best_bid": np.where(best_bid >= 0, best_bid, np.nan),
+            "best_ask": np.where(best_ask >= 0, best_ask, np.nan),
+            "spread": np.where(two_sided, best_ask - best_bid, np.nan),
+            "mid": np.where(two_sided, (best_ask + best_bid) / 2, np.nan),
+            "bid_depth": bid_depth,
+            "ask_depth": ask_depth,
+            "imbalance": imbalance,
+        }))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def open_events() -> List[str]:
+    return [e.get("event_ticker") or e.get("ticker") for series in GDP_SERIES
+            for e in fetch_events_for_series(series, status="open")]
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Record Kalshi orderbooks as deltas.")
+    parser.add_argument("--event", action="append", default=[], help="Events to track (default: open GDP events)")
+    parser.add_argument("--interval", type=float, default=POLL_SECONDS, help="Seconds between polls")
+    parser.add_argument("--iterations", type=int, default=None, help="Stop after this many polls")
+    args = parser.parse_args()
+
+    events = args.event or open_events()
+    if not events:
+        print("No open events to track")
+        return
+    print(f"Recording orderbooks of {', '.join(events)} every {args.interval:g}s")
+    OrderbookPoller(events).run(args.interval, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
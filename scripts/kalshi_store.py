@@ -0,0 +1,143 @@
+"""
+Persistent, incremental store for Kalshi candlesticks.
+
+Candles are kept in parquet partitions, one per event
+(data/kalshi/candles/event_ticker=<EVENT>/candles.parquet), next to a small
+state file that remembers, per market, the last `end_period_ts` stored and
+whether the market's history is complete up to its settlement. Collectors
+ask the store where to resume (`start_ts_for`), append only the new candles
+(deduplicated on market + timestamp) and never refetch settled markets.
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+STORE_DIR = PROJECT_ROOT / "data" / "kalshi" / "candles"
+
+CANDLE_COLUMNS = ['market_ticker', 'end_period_ts', 'open', 'high', 'low', 'close', 'yes_price', 'volume']
+VALUE_COLUMNS = ['open', 'high', 'low', 'close', 'yes_price', 'volume']
+
+# A settled market's history is complete once its last candle ends within one
+# (daily) candle period of the settlement time.
+SETTLEMENT_SLACK = 86400
+
+
+def candle_timestamp(candle: Dict) -> Optional[int]:
+    """Candles carry `end_period_ts`; trades (the fallback history) carry `ts`."""
+    return candle.get('end_period_ts') or candle.get('ts')
+
+
+def candles_to_frame(market_ticker: str, candles: Iterable[Dict]) -> pd.DataFrame:
+    """Flattens API candles (or fallback trades) into the store's columns."""
+    candles = [c for c in candles if candle_timestamp(c)]
+    frame = pd.DataFrame({
+        'market_ticker': [market_ticker] * len(candles),
+        'end_period_ts': [int(candle_timestamp(c)) for c in candles],
+        'open': [c.get('open') for c in candles],
+        'high': [c.get('high') for c in candles],
+        'low': [c.get('low') for c in candles],
+        'close': [c.get('close') for c in candles],
+        'yes_price': [c.get('yes_price', c.get('close')) for c in candles],
+        'volume': [c.get('volume') for c in candles],
+    }, columns=CANDLE_COLUMNS)
+    # Trades have no OHLC; keep the value columns numeric (NaN) either way.
+    frame[VALUE_COLUMNS] = frame[VALUE_COLUMNS].astype('float64')
+    return frame
+
+
+class CandleStore:
+    """Event-partitioned parquet store with a per-market high-water mark."""
+
+    def __init__(self, root: Path = STORE_DIR):
+        self.root = Path(root)
+        self.state_file = self.root / "state.json"
+        self.state: Dict[str, Dict] = {}
+        if self.state_file.exists():
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+
+    def partition_path(self, event_ticker: str) -> Path:
+        # Some legacy tickers contain spaces (e.g. "GDP-232022 Q4").
+        safe = re.sub(r'[^A-Za-z0-9._-]', '_', event_ticker)
+        return self.root / f"event_ticker={safe}" / "candles.parquet"
+
+    def is_frozen(self, market_ticker: str) -> bool:
+        """Settled markets already stored after settlement never change again."""
+        return self.state.get(market_ticker, {}).get('settled', False)
+
+    def start_ts_for(self, market_ticker: str) -> Optional[int]:
+        """
+        Timestamp to resume fetching from. The last stored candle is requested
+        again because it may have been a partial period when it was fetched.
+        """
+        return self.state.get(market_ticker, {}).get('last_end_period_ts')
+
+    def load_event(self, event_ticker: str) -> pd.DataFrame:
+        path = self.partition_path(event_ticker)
+        if not path.exists():
+            return pd.DataFrame(columns=CANDLE_COLUMNS)
+        return pd.read_parquet(path)
+
+    def append_event(self, event_ticker: str, new_candles: Dict[str, Optional[List[Dict]]],
+                     settled_markets: Optional[Dict[str, Optional[int]]] = None) -> pd.DataFrame:
+        """
+        Merges freshly fetched candles for some markets of an event into its
+        partition (newer rows win on duplicate market + timestamp), updates the
+        high-water marks and returns the full partition.
+
+        A None in `new_candles` means the fetch of that market failed this run:
+        nothing is stored or updated for it. `settled_markets` maps the settled
+        markets to their settlement (close) timestamp; one is frozen only when
+        this run's fetch succeeded and the stored candles reach settlement.
+        """
+        settled_markets = settled_markets or {}
+        fetched = {ticker: candles for ticker, candles in new_candles.items() if candles is not None}
+        frames = [candles_to_frame(ticker, candles) for ticker, candles in fetched.items()]
+        frames = [f for f in frames if not f.empty]
+
+        existing = self.load_event(event_ticker)
+        if frames:
+            combined = pd.concat([existing] + frames, ignore_index=True) if not existing.empty else pd.concat(frames, ignore_index=True)
+            combined = (
+                combined.drop_duplicates(subset=['market_ticker', 'end_period_ts'], keep='last')
+                .sort_values(['market_ticker', 'end_period_ts'])
+                .reset_index(drop=True)
+            )
+            path = self.partition_path(event_ticker)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.tmp')
+            combined.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        else:
+            combined = existing
+
+        last_ts = combined.groupby('market_ticker')['end_period_ts'].max() if not combined.empty else pd.Series(dtype='int64')
+        for ticker, candles in fetched.items():
+            entry = self.state.setdefault(ticker, {'event_ticker': event_ticker})
+            if ticker not in last_ts.index:
+                continue
+            entry['last_end_period_ts'] = int(last_ts[ticker])
+            if ticker in settled_markets:
+                settled_ts = settled_markets[ticker]
+                # Without a settlement time, at least this run must have returned candles.
+                if settled_ts is None:
+                    complete = bool(candles)
+                else:
+                    complete = last_ts[ticker] >= settled_ts - SETTLEMENT_SLACK
+                if complete:
+                    entry['settled'] = True
+        self.save_state()
+        return combined
+
+    def save_state(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_file.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_file)
@@ -0,0 +1,234 @@
+"""
+Kalshi trades: paginated ingestion into a compact tick store, and a local
+candle resampler.
+
+The candlesticks endpoint only serves fixed intervals (the collector uses
+1440 minutes), and the trades fallback used to stop at its first page of
+1000. Here every trade of a market is streamed page by page following the
+cursor and stored as ticks, one parquet per market
+(data/kalshi/trades/market_ticker=<MARKET>/trades.parquet):
+
+    ts     int64   trade time, epoch milliseconds
+    price  int16   yes price, cents
+    size   int32   contracts
+    side   int8    taker side, 1 = yes, 0 = no
+
+Later runs resume from the last stored second, so only new trades are
+downloaded. resample() turns ticks into OHLCV + VWAP candles at any
+interval, vectorized, e.g. 5-minute bars around a BEA release:
+
+    python scripts/kalshi_trades.py --event KXGDP-25JUL30 --interval 5min
+    resample(TickStore().load("KXGDP-25JUL30-T2.5"), "5min")
+"""
+
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.kalshi_client import BASE_URL, KalshiClient
+
+# --- Configuration ---
+TRADES_DIR = PROJECT_ROOT / "data" / "kalshi" / "trades"
+PAGE_LIMIT = 1000
+# Markets ingested at once; the client's token bucket keeps the request rate in check
+WORKERS = 4
+
+TICK_DTYPES = {"ts": np.int64, "price": np.int16, "size": np.int32, "side": np.int8}
+CANDLE_COLUMNS = ["end_period_ts", "open", "high", "low", "close", "volume", "vwap", "trades"]
+
+Interval = Union[int, str, pd.Timedelta]
+
+
+def empty_ticks() -> pd.DataFrame:
+    return pd.DataFrame({column: np.array([], dtype=dtype) for column, dtype in TICK_DTYPES.items()})
+
+
+def trades_to_ticks(trades: List[Dict]) -> pd.DataFrame:
+    """One page of API trades as compact ticks (unsorted, as the API returns them)."""
+    if not trades:
+        return empty_ticks()
+    page = pd.DataFrame(trades)
+    if "created_time" in page:
+        # to_datetime picks the resolution of the strings; normalize to milliseconds
+        ts = pd.to_datetime(page["created_time"], utc=True, format="ISO8601").dt.as_unit("ms").astype("int64")
+    else:
+        ts = pd.to_numeric(page["ts"]).astype("int64") * 1000
+    if "yes_price" in page:
+        price = pd.to_numeric(page["yes_price"])
+    else:
+        price = (pd.to_numeric(page["yes_price_dollars"]) * 100).round()
+    size = pd.to_numeric(page["count"] if "count" in page else page["count_fp"])
+    side = page["taker_side"].eq("yes") if "taker_side" in page else pd.Series(True, index=page.index)
+    return pd.DataFrame({
+        "ts": ts.to_numpy(dtype=np.int64),
+        "price": price.to_numpy(dtype=np.int16),
+        "size": size.to_numpy(dtype=np.int32),
+        "side": side.to_numpy(dtype=np.int8),
+    })
+
+
+class TickStore:
+    """Market-partitioned parquet store of trades, sorted by time."""
+
+    def __init__(self, root: Path = TRADES_DIR):
+        self.root = Path(root)
+
+    def partition_path(self, market_ticker: str) -> Path:
+        safe = re.sub(r'[^A-Za-z0-9._-]', '_', market_ticker)
+        return self.root / f"market_ticker={safe}" / "trades.parquet"
+
+    def load(self, market_ticker: str) -> pd.DataFrame:
+        path = self.partition_path(market_ticker)
+        if not path.exists():
+            return empty_ticks()
+        return pd.read_parquet(path)
+
+    def resume_ts(self, market_ticker: str) -> Optional[int]:
+        """
+        Second to resume fetching from (the API's min_ts is in seconds): the
+        last stored one, whose trades are replaced by the refetched ones.
+        """
+        ticks = self.load(market_ticker)
+        return int(ticks["ts"].iloc[-1] // 1000) if len(ticks) else None
+
+    def append(self, market_ticker: str, ticks: pd.DataFrame, since_ts: Optional[int] = None) -> pd.DataFrame:
+        """
+        Stores `ticks`, fetched from `since_ts` (seconds) on: stored trades from
+        that second on are replaced by them. Returns the full partition.
+        """
+        existing = self.load(market_ticker)
+        if since_ts is not None:
+            existing = existing[existing["ts"] < since_ts * 1000]
+        combined = pd.concat([existing, ticks], ignore_index=True) if len(existing) else ticks
+        # Stable, so trades within the same millisecond keep the API's order
+        combined = combined.sort_values("ts", kind="stable", ignore_index=True).astype(TICK_DTYPES)
+
+        path = self.partition_path(market_ticker)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        combined.to_parquet(tmp_path, index=False, compression="zstd")
+        os.replace(tmp_path, path)
+        return combined
+
+
+def ingest_market(client: KalshiClient, market_ticker: str, store: TickStore) -> Optional[int]:
+    """
+    Streams the trades of a market not yet stored, page by page; returns how
+    many were fetched, or None if the fetch failed (nothing is stored then).
+    """
+    since_ts = store.resume_ts(market_ticker)
+    params = {"limit": PAGE_LIMIT}
+    if since_ts is not None:
+        params["min_ts"] = since_ts
+    try:
+        # Pages come newest first: a partial set would leave a gap the next resume skips over
+        pages = [
+            trades_to_ticks(page)
+            for page in client.iter_pages(f"/markets/{market_ticker}/trades", "trades", params,
+                                          label=f"Trades for {market_ticker}", strict=True)
+        ]
+    except RuntimeError as e:
+        print(f"[WARN] {e}; nothing stored for {market_ticker}")
+        return None
+    ticks = pd.concat(pages, ignore_index=True) if pages else empty_ticks()
+    if len(ticks) or since_ts is None:
+        store.append(market_ticker, ticks, since_ts)
+    return len(ticks)
+
+
+def ingest_markets(client: KalshiClient, market_tickers: Iterable[str], store: Optional[TickStore] = None,
+                   workers: int = WORKERS) -> Dict[str, Optional[int]]:
+    """Ingests several markets concurrently; maps ticker -> trades fetched (None: failed)."""
+    store = store or TickStore()
+    market_tickers = list(market_tickers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        counts = pool.map(lambda ticker: ingest_market(client, ticker, store), market_tickers)
+        return dict(zip(market_tickers, counts))
+
+
+# --- Resampling ---
+
+def interval_ms(interval: Interval) -> int:
+    """Seconds (int) or a pandas offset ("5min", "1h", "1D") in milliseconds."""
+    if isinstance(interval, (int, np.integer)):
+        return int(interval) * 1000
+    return int(pd.Timedelta(interval).total_seconds() * 1000)
+
+
+def resample(ticks: pd.DataFrame, interval: Interval) -> pd.DataFrame:
+    """
+    OHLCV + VWAP candles of the ticks, one per interval that has trades
+    (no empty bars). end_period_ts is the end of the interval in epoch
+    seconds, as in the API's candlesticks; prices are in cents.
+    """
+    if not len(ticks):
+        return pd.DataFrame({column: [] for column in CANDLE_COLUMNS})
+    step = interval_ms(interval)
+    ts = ticks["ts"].to_numpy()
+    price = ticks["price"].to_numpy(dtype=np.int64)
+    size = ticks["size"].to_numpy(dtype=np.int64)
+
+    period = ts // step
+    starts = np.flatnonzero(np.r_[True, period[1:] != period[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+    volume = np.add.reduceat(size, starts)
+    notional = np.add.reduceat(price * size, starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vwap = np.where(volume > 0, notional / volume, np.nan)
+    return pd.DataFrame({
+        "end_period_ts": (period[starts] + 1) * step // 1000,
+        "open": price[starts],
+        "high": np.maximum.reduceat(price, starts),
+        "low": np.minimum.reduceat(price, starts),
+        "close": price[ends],
+        "volume": volume,
+        "vwap": vwap,
+        "trades": np.diff(np.r_[starts, len(ts)]),
+    })
+
+
+def main():
+    import argparse
+    import time
+    parser = argparse.ArgumentParser(description="Ingest Kalshi trades and resample them into candles.")
+    parser.add_argument("markets", nargs="*", help="Market tickers")
+    parser.add_argument("--event", action="append", default=[], help="Ingest every market of an event")
+    parser.add_argument("--interval", default="1h", help="Candle interval, e.g. 1min, 5min, 1h (default: 1h)")
+    args = parser.parse_args()
+
+    client = KalshiClient(BASE_URL)
+    market_tickers = list(args.markets)
+    for event_ticker in args.event:
+        markets = client.paginate("/markets", "markets", {"event_ticker": event_ticker},
+                                  label=f"Markets for {event_ticker}")
+        market_tickers.extend(m.get("ticker") for m in markets)
+    if not market_tickers:
+        parser.error("give market tickers or --event")
+
+    store = TickStore()
+    started = time.perf_counter()
+    counts = ingest_markets(client, market_tickers, store)
+    failed = [ticker for ticker, count in counts.items() if count is None]
+    if failed:
+        print(f"[WARN] Trades of {len(failed)} markets could not be fetched: {', '.join(failed)}")
+    print(f"Fetched {sum(c for c in counts.values() if c)} new trades for {len(counts)} markets "
+          f"in {time.perf_counter() - started:.1f}s")
+    for ticker in market_tickers:
+        ticks = store.load(ticker)
+        candles = resample(ticks, args.interval)
+        size_kb = store.partition_path(ticker).stat().st_size / 1024 if len(ticks) else 0
+        print(f"  {ticker}: {len(ticks)} trades ({size_kb:.0f} KB) -> {len(candles)} {args.interval} candles")
+
+
+if __name__ == "__main__":
+    main()
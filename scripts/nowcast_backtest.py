@@ -0,0 +1,366 @@
+"""
+Nowcast vs prediction market backtest.
+
+Scores, for every day of every settled Kalshi GDP event, two probabilistic
+forecasts of the bucket the release fell in:
+
+- market:  the implied distribution of that day (implied_distribution.py);
+- nowcast: our GDP nowcast as it was known that day, read from the vintage
+           store (data/vintages/<NOWCAST_INDICATOR>/, view NOWCAST_VIEW, series
+           NOWCAST_MEAN and optionally NOWCAST_STD, ref_date = first day of the
+           quarter), taken as normal and discretized on the event's buckets.
+
+against the settled outcome (the `result` of the markets). Both are scored
+on the same buckets, all (event, date) rows at once:
+
+- crps:      CRPS of the bucketed forecast, mass at the bucket midpoints and
+             the outcome at the midpoint of the settled bucket (in pp);
+- log_score: -log p(settled bucket), with p floored at LOG_SCORE_FLOOR;
+- brier:     multi-category Brier score;
+- pit:       mid-PIT, F(below the settled bucket) + p(settled bucket) / 2.
+
+Scores are averaged per horizon (days to the event's close) on the rows
+both forecasters cover, and the PIT values are binned into histograms.
+
+Scores are cached per event (data/kalshi/backtest/event_ticker=<EVENT>/)
+with a fingerprint of their inputs; an event is scored again only when its
+prices, outcome or nowcast vintages change, so adding a quarter scores that
+quarter alone.
+
+    python scripts/nowcast_backtest.py              # after kalshi_gdp_collector.py
+    python scripts/nowcast_backtest.py --refresh    # ignore the cache
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.implied_distribution import LATEST_FILE, ImpliedDistribution, build_distribution
+from scripts.vintage_store import VintageStore
+
+# --- Configuration ---
+BACKTEST_DIR = PROJECT_ROOT / "data" / "kalshi" / "backtest"
+STATE_FILE = BACKTEST_DIR / "state.json"
+SUMMARY_FILE = BACKTEST_DIR / "scores_by_horizon.parquet"
+PIT_FILE = BACKTEST_DIR / "pit_histogram.parquet"
+
+NOWCAST_INDICATOR = "gdp_nowcast"
+NOWCAST_VIEW = "qoq_saar"
+NOWCAST_MEAN = "mean"
+NOWCAST_STD = "std"
+# Used when no std is recorded: about the RMSE of GDP nowcasts a month before the advance release
+DEFAULT_NOWCAST_STD = 1.2
+
+# Horizon bins, in days to the event's close
+HORIZON_EDGES = (0, 7, 14, 30, 60, 90, 180, 366)
+PIT_BINS = 10
+LOG_SCORE_FLOOR = 1e-4
+
+SCORE_COLUMNS = ["crps", "log_score", "brier", "pit"]
+
+_erf = np.vectorize(math.erf, otypes=[np.float64])
+
+
+def _normal_cdf(x: np.ndarray) -> np.ndarray:
+    return 0.5 * (1.0 + _erf(x / math.sqrt(2.0)))
+
+
+def _safe_name(event_ticker: str) -> str:
+    # Same escaping as the candle store (legacy tickers contain spaces)
+    return re.sub(r'[^A-Za-z0-9._-]', '_', event_ticker)
+
+
+# --- Scoring ---
+
+def score_buckets(prob: np.ndarray, mid: np.ndarray, buckets: np.ndarray, outcome: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Scores of N bucketed forecasts: prob and mid are (N, B) (padding
+    buckets have 0 mass), buckets (N,) the real bucket count of each row and
+    outcome (N,) the index of the settled bucket.
+    """
+    rows = np.arange(len(prob))
+    cum = np.cumsum(prob, axis=1)
+    p_outcome = prob[rows, outcome]
+
+    # CRPS of two step CDFs jumping at the midpoints: sum of (F - H)^2 x midpoint spacing
+    spacing = np.diff(mid, axis=1)
+    inner = np.arange(spacing.shape[1]) < (buckets - 1)[:, None]
+    spacing = np.where(inner, spacing, 0.0)
+    step = (np.arange(spacing.shape[1]) >= outcome[:, None]).astype(np.float64)
+    crps = (((cum[:, :-1] - step) ** 2) * spacing).sum(axis=1)
+
+    return {
+        "crps": crps,
+        "log_score": -np.log(np.maximum(p_outcome, LOG_SCORE_FLOOR)),
+        "brier": (prob ** 2).sum(axis=1) - 2.0 * p_outcome + 1.0,
+        "pit": cum[rows, outcome] - p_outcome / 2.0,
+    }
+
+
+def normal_buckets(mean: np.ndarray, std: np.ndarray, lower: np.ndarray, upper: np.ndarray,
+                   buckets: np.ndarray) -> np.ndarray:
+    """(N, B) probabilities of N(mean, std) on each row's buckets, the outer ones open-ended."""
+    columns = np.arange(lower.shape[1])
+    lower = np.where(columns == 0, -np.inf, lower)
+    upper = np.where(columns == (buckets - 1)[:, None], np.inf, upper)
+    z_lower = (lower - mean[:, None]) / std[:, None]
+    z_upper = (upper - mean[:, None]) / std[:, None]
+    prob = _normal_cdf(z_upper) - _normal_cdf(z_lower)
+    return np.where(columns < buckets[:, None], prob, 0.0)
+
+
+# --- Alignment ---
+
+def outcome_buckets(history: pd.DataFrame, dist: ImpliedDistribution) -> np.ndarray:
+    """
+    (E,) index of the settled bucket of each event, -1 when not settled.
+
+    Each settled market says the outcome is inside ("yes") or outside ("no")
+    its [floor, cap) range; intersecting them works for bucket and ladder
+    events alike. The settled bucket is the one whose midpoint is inside.
+    """
+    markets = history.drop_duplicates("market_ticker", keep="last")
+    result = markets["result"].astype("string").str.lower()
+    floors = pd.to_numeric(markets["floor_strike"], errors="coerce")
+    caps = pd.to_numeric(markets["cap_strike"], errors="coerce")
+    yes, no = result == "yes", result == "no"
+    bounds = pd.DataFrame({
+        "event_ticker": markets["event_ticker"].astype(str),
+        # yes: outcome >= floor and < cap; no on "below a": outcome >= a; no on "above b": outcome < b
+        "low": pd.concat([floors.where(yes), caps.where(no & floors.isna())], axis=1).max(axis=1),
+        "high": pd.concat([caps.where(yes), floors.where(no & caps.isna())], axis=1).min(axis=1),
+        "settled": yes | no,
+    })
+    per_event = bounds.groupby("event_ticker").agg(low=("low", "max"), high=("high", "min"), settled=("settled", "any"))
+    per_event = per_event.reindex(dist.events)
+    low = per_event["low"].fillna(-np.inf).to_numpy(dtype=np.float64)
+    high = per_event["high"].fillna(np.inf).to_numpy(dtype=np.float64)
+
+    mid = (dist.lower + dist.upper) / 2
+    real = np.arange(mid.shape[1]) < dist.buckets[:, None]
+    inside = real & (mid >= low[:, None]) & (mid < high[:, None])
+    settled = per_event["settled"].fillna(False).to_numpy(dtype=bool) & (inside.sum(axis=1) == 1)
+    return np.where(settled, inside.argmax(axis=1), -1)
+
+
+def close_dates(current: pd.DataFrame, dist: ImpliedDistribution) -> np.ndarray:
+    """(E,) datetime64[D] close of each event: the markets' close_time, else its last priced day."""
+    last_priced = dist.dates[dist.valid.shape[1] - 1 - dist.valid[:, ::-1].argmax(axis=1)]
+    if current.empty or "close_time" not in current:
+        return last_priced.astype("datetime64[D]")
+    close = pd.to_datetime(current["close_time"], errors="coerce", utc=True).dt.tz_localize(None)
+    close = close.groupby(current["event_ticker"].astype(str)).max().reindex(dist.events)
+    close = close.to_numpy().astype("datetime64[D]")
+    return np.where(np.isnat(close), last_priced, close).astype("datetime64[D]")
+
+
+def quarter_start(year, quarter) -> Optional[date]:
+    if pd.isna(year) or pd.isna(quarter):
+        return None
+    return date(int(year), 3 * int(quarter) - 2, 1)
+
+
+def nowcast_as_of(dist: ImpliedDistribution, ref_dates: Dict[str, Optional[date]],
+                  store: Optional[VintageStore] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (E, D) nowcast mean and std for each event's quarter as known on each
+    date (last release on or before it; NaN before the first).
+    """
+    store = store or VintageStore()
+    records = store.history(NOWCAST_INDICATOR, NOWCAST_VIEW, [NOWCAST_MEAN, NOWCAST_STD]).to_pandas()
+    shape = (len(dist.events), len(dist.dates))
+    values = {NOWCAST_MEAN: np.full(shape, np.nan), NOWCAST_STD: np.full(shape, np.nan)}
+    if records.empty:
+        return values[NOWCAST_MEAN], values[NOWCAST_STD]
+
+    records["ref_date"] = pd.to_datetime(records["ref_date"]).dt.date
+    release = pd.to_datetime(records["release_date"]).to_numpy().astype("datetime64[D]")
+    for (series, ref_date), rows in records.groupby(["series", "ref_date"]).indices.items():
+        events = [i for i, event in enumerate(dist.events) if ref_dates.get(event) == ref_date]
+        if not events:
+            continue
+        # Records are sorted by release_date within a cell
+        last = np.searchsorted(release[rows], dist.dates, side="right") - 1
+        cell = records["value"].to_numpy(dtype=np.float64, na_value=np.nan)[rows]
+        values[series][events] = np.where(last >= 0, cell[np.maximum(last, 0)], np.nan)
+    return values[NOWCAST_MEAN], values[NOWCAST_STD]
+
+
+# --- Cache ---
+
+def _load_state() -> Dict[str, str]:
+    if STATE_FILE.exists():
+        with open(STATE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def _save_state(state: Dict[str, str]) -> None:
+    BACKTEST_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = STATE_FILE.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, STATE_FILE)
+
+
+def _scores_path(event_ticker: str) -> Path:
+    return BACKTEST_DIR / f"event_ticker={_safe_name(event_ticker)}" / "scores.parquet"
+
+
+def _fingerprint(*arrays: np.ndarray) -> str:
+    digest = hashlib.sha1()
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+# --- Backtest ---
+
+def _score_rows(dist: ImpliedDistribution, e: np.ndarray, d: np.ndarray, outcome: np.ndarray,
+                horizon: np.ndarray, nowcast_mean: np.ndarray, nowcast_std: np.ndarray) -> pd.DataFrame:
+    """Long scores (one row per event, date, forecaster) of the given (event, date) rows."""
+    lower, upper, buckets = dist.lower[e], dist.upper[e], dist.buckets[e]
+    mid = (lower + upper) / 2
+    keys = {"event_ticker": dist.events[e], "date": dist.dates[d], "horizon_days": horizon[e, d]}
+
+    frames = [pd.DataFrame({**keys, "forecaster": "market",
+                            **score_buckets(dist.prob[e, d], mid, buckets, outcome[e])})]
+    mean = nowcast_mean[e, d]
+    has_nowcast = ~np.isnan(mean)
+    if has_nowcast.any():
+        std = np.nan_to_num(nowcast_std[e, d], nan=DEFAULT_NOWCAST_STD)[has_nowcast]
+        prob = normal_buckets(mean[has_nowcast], std, lower[has_nowcast], upper[has_nowcast], buckets[has_nowcast])
+        frames.append(pd.DataFrame({
+            **{key: value[has_nowcast] for key, value in keys.items()}, "forecaster": "nowcast",
+            **score_buckets(prob, mid[has_nowcast], buckets[has_nowcast], outcome[e][has_nowcast]),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def run_backtest(latest: Optional[pd.DataFrame] = None, store: Optional[VintageStore] = None,
+                 refresh: bool = False) -> pd.DataFrame:
+    """Per-(event, date, forecaster) scores of every settled event, from the cache where it is current."""
+    latest = pd.read_parquet(LATEST_FILE) if latest is None else latest
+    is_history = latest["data_type"] == "historical" if "data_type" in latest else pd.Series(True, index=latest.index)
+    history, current = latest[is_history], latest[~is_history]
+
+    dist = build_distribution(history)
+    outcome = outcome_buckets(history, dist)
+    closes = close_dates(current, dist)
+    horizon = (closes[:, None] - dist.dates[None, :]).astype(np.int64)
+    events = history.drop_duplicates("event_ticker")
+    ref_dates = {str(event): quarter_start(year, quarter)
+                 for event, year, quarter in zip(events["event_ticker"], events["year"], events["quarter"])}
+    nowcast_mean, nowcast_std = nowcast_as_of(dist, ref_dates, store)
+
+    # Settled events, on the days they were priced up to their close
+    scored = dist.valid & (outcome >= 0)[:, None] & (horizon >= 0)
+    state = {} if refresh else _load_state()
+    new_state, frames, todo = {}, [], []
+    for i, event in enumerate(dist.events):
+        days = np.flatnonzero(scored[i])
+        if not len(days):
+            continue
+        new_state[event] = _fingerprint(dist.prob[i, days], dist.lower[i], dist.upper[i], outcome[i], horizon[i, days],
+                                        nowcast_mean[i, days], nowcast_std[i, days])
+        path = _scores_path(event)
+        if state.get(event) == new_state[event] and path.exists():
+            frames.append(pd.read_parquet(path))
+        else:
+            todo.append(i)
+
+    if todo:
+        print(f"Scoring {len(todo)} event(s): {', '.join(dist.events[todo])}")
+        e, d = np.nonzero(scored[todo])
+        fresh = _score_rows(dist, np.asarray(todo)[e], d, outcome, horizon, nowcast_mean, nowcast_std)
+        for event, scores in fresh.groupby("event_ticker", sort=False):
+            path = _scores_path(event)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            scores.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        frames.append(fresh)
+    _save_state(new_state)
+    print(f"{len(new_state) - len(todo)} event(s) from cache")
+
+    if not frames:
+        return pd.DataFrame(columns=["event_ticker", "date", "horizon_days", "forecaster"] + SCORE_COLUMNS)
+    return pd.concat(frames, ignore_index=True).sort_values(["event_ticker", "date", "forecaster"], ignore_index=True)
+
+
+def _horizon_bins(horizon_days: pd.Series) -> pd.Series:
+    labels = [f"{lo}-{hi}d" for lo, hi in zip(HORIZON_EDGES[:-1], HORIZON_EDGES[1:])]
+    return pd.cut(horizon_days, HORIZON_EDGES, labels=labels, right=False)
+
+
+def paired(scores: pd.DataFrame) -> pd.DataFrame:
+    """The (event, date) rows scored for every forecaster present, so the averages compare like with like."""
+    n_forecasters = scores["forecaster"].nunique()
+    coverage = scores.groupby(["event_ticker", "date"])["forecaster"].transform("nunique")
+    return scores[coverage == n_forecasters]
+
+
+def summarize(scores: pd.DataFrame) -> pd.DataFrame:
+    """Mean scores and row counts per forecaster and horizon bin."""
+    scores = paired(scores).assign(horizon=lambda df: _horizon_bins(df["horizon_days"]))
+    return (
+        scores.groupby(["forecaster", "horizon"], observed=True)
+        .agg(events=("event_ticker", "nunique"), days=("date", "size"),
+             crps=("crps", "mean"), log_score=("log_score", "mean"), brier=("brier", "mean"))
+        .reset_index()
+    )
+
+
+def pit_histogram(scores: pd.DataFrame, bins: int = PIT_BINS) -> pd.DataFrame:
+    """PIT counts per forecaster, horizon bin and PIT bin (flat when calibrated)."""
+    scores = paired(scores).assign(
+        horizon=lambda df: _horizon_bins(df["horizon_days"]),
+        bin=lambda df: np.minimum((df["pit"] * bins).astype(np.int64), bins - 1),
+    )
+    counts = scores.groupby(["forecaster", "horizon", "bin"], observed=True).size().rename("count").reset_index()
+    counts["bin_lower"] = counts["bin"] / bins
+    counts["bin_upper"] = (counts["bin"] + 1) / bins
+    counts["density"] = counts["count"] * bins / counts.groupby(["forecaster", "horizon"], observed=True)["count"].transform("sum")
+    return counts.drop(columns="bin")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Score the Kalshi implied distributions and the GDP nowcast.")
+    parser.add_argument("--refresh", action="store_true", help="Score every event again, ignoring the cache")
+    args = parser.parse_args()
+
+    if not LATEST_FILE.exists():
+        print(f"{LATEST_FILE} not found: run kalshi_gdp_collector.py first")
+        return
+    started = time.perf_counter()
+    scores = run_backtest(refresh=args.refresh)
+    summary, pit = summarize(scores), pit_histogram(scores)
+    print(f"{scores['event_ticker'].nunique()} settled events, {len(scores)} scored days "
+          f"in {time.perf_counter() - started:.2f}s")
+    if "nowcast" not in set(scores["forecaster"]):
+        print(f"[WARN] No {NOWCAST_INDICATOR} vintages in the store: scoring the market only")
+
+    BACKTEST_DIR.mkdir(parents=True, exist_ok=True)
+    summary.to_parquet(SUMMARY_FILE, index=False)
+    pit.to_parquet(PIT_FILE, index=False)
+    print(summary.to_string(index=False))
+    print(f"Saved: {SUMMARY_FILE}, {PIT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+IBGE release calendar: cached locally, indexed by date and product.
+
+check_calendar.py used to ask the IBGE API about today only and, on any
+error, trigger a full rebuild. This module downloads the whole calendar
+window once, keeps it in data/calendar/ibge_calendar.json and indexes the
+releases by date and by product, so "which indicators release between X and
+Y" is a dictionary lookup per day. The answer is turned into a per-indicator
+run list (which R update scripts to execute).
+
+Fail-safe order when the API is unreachable: the cached calendar, then the
+calendar_dump.json snapshot in the repository root, and only if neither
+exists, run everything.
+
+Only the standard library is used, like the workflow step that calls it.
+"""
+
+import json
+import os
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from urllib.request import Request, urlopen
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CALENDAR_CACHE = PROJECT_ROOT / "data" / "calendar" / "ibge_calendar.json"
+CALENDAR_SNAPSHOT = PROJECT_ROOT / "calendar_dump.json"
+
+API_URL = "https://servicodados.ibge.gov.br/api/v3/calendario/"
+PAGE_SIZE = 1000
+FETCH_TIMEOUT = 30
+# Calendar window kept in the cache, relative to today
+WINDOW_PAST_DAYS = 30
+WINDOW_FUTURE_DAYS = 365
+# A cache younger than this is used without asking the API again
+CACHE_MAX_AGE = timedelta(hours=12)
+
+# Define Brazil Timezone (UTC-3)
+BRT = timezone(timedelta(hours=-3))
+
+# Calendar titles (exact) of the indicators we track. Exact titles already
+# leave out "Regional", "Anual", "Amplo 15"/"Especial" and similar releases.
+INDICATOR_TITLES = {
+    "ipca": "Índice Nacional de Preços ao Consumidor Amplo",
+    "ipca15": "Índice Nacional de Preços ao Consumidor Amplo 15",
+    "pim": "Pesquisa Industrial Mensal: Produção Física - Brasil",
+    "pmc": "Pesquisa Mensal de Comércio",
+    "pms": "Pesquisa Mensal de Serviços",
+}
+
+# R update scripts (scripts/R) to run when an indicator is released
+INDICATOR_SCRIPTS = {
+    "ipca": ["difusao_ipca.R", "ipca_update.R"],
+    "ipca15": ["difusao_ipca15.R", "ipca15_update.R"],
+    "pim": ["pim_update.R"],
+    "pmc": ["pmc_update.R"],
+    "pms": ["pms_update.R"],
+}
+
+KEPT_FIELDS = [
+    "id", "titulo", "data_divulgacao", "produto_id", "nome_produto",
+    "ano_referencia_inicio", "mes_referencia_inicio", "ano_referencia_fim", "mes_referencia_fim",
+]
+
+
+def get_brazil_date() -> date:
+    return datetime.now(BRT).date()
+
+
+def release_date(item: Dict) -> Optional[date]:
+    """'18/03/2026 12:00:00' -> date(2026, 3, 18)."""
+    try:
+        return datetime.strptime(item["data_divulgacao"][:10], "%d/%m/%Y").date()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class ReleaseCalendar:
+    """Calendar items indexed by release date and by title/product."""
+
+    def __init__(self, items: Iterable[Dict], fetched_at: Optional[str] = None, source: str = ""):
+        self.items = list(items)
+        self.fetched_at = fetched_at
+        self.source = source
+        self.by_date: Dict[date, List[Dict]] = defaultdict(list)
+        self.by_title: Dict[str, List[date]] = defaultdict(list)
+        self.by_product: Dict[int, List[date]] = defaultdict(list)
+        for item in self.items:
+            day = release_date(item)
+            if day is None:
+                continue
+            self.by_date[day].append(item)
+            self.by_title[item.get("titulo", "")].append(day)
+            self.by_product[item.get("produto_id")].append(day)
+        self._title_to_indicator = {title: name for name, title in INDICATOR_TITLES.items()}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def releases_on(self, day: date) -> List[Dict]:
+        return self.by_date.get(day, [])
+
+    def indicators_on(self, day: date) -> List[str]:
+        found = []
+        for item in self.releases_on(day):
+            name = self._title_to_indicator.get(item.get("titulo", ""))
+            if name and name not in found:
+                found.append(name)
+        return found
+
+    def indicators_in_window(self, start: date, end: date) -> Dict[str, List[date]]:
+        """{indicator: [release dates]} for releases between start and end (inclusive)."""
+        releases: Dict[str, List[date]] = defaultdict(list)
+        day = start
+        while day <= end:
+            for name in self.indicators_on(day):
+                releases[name].append(day)
+            day += timedelta(days=1)
+        return dict(releases)
+
+    def next_release(self, indicator: str, after: date) -> Optional[date]:
+        upcoming = [d for d in self.by_title.get(INDICATOR_TITLES[indicator], []) if d >= after]
+        return min(upcoming) if upcoming else None
+
+    def covers(self, day: date) -> bool:
+        """Whether `day` lies inside the span of dates this calendar knows about."""
+        return bool(self.by_date) and min(self.by_date) <= day <= max(self.by_date)
+
+
+# --- Loading ---
+
+def fetch_calendar(start: date, end: date) -> List[Dict]:
+    """All calendar items between start and end, following the API's pages."""
+    items: List[Dict] = []
+    page = 1
+    while True:
+        url = f"{API_URL}?de={start:%Y-%m-%d}&ate={end:%Y-%m-%d}&qtd={PAGE_SIZE}&page={page}"
+        # User-Agent header to avoid 403 blocks often used by govt APIs
+        req = Request(url, headers={"User-Agent": "Mozilla/5.0"})
+        with urlopen(req, timeout=FETCH_TIMEOUT) as response:
+            data = json.loads(response.read().decode())
+        items.extend({k: item.get(k) for k in KEPT_FIELDS} for item in data.get("items", []))
+        if not data.get("nextPage") or page >= data.get("totalPages", page):
+            return items
+        page += 1
+
+
+def read_calendar_file(path: Path, source: str) -> Optional[ReleaseCalendar]:
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Unreadable calendar file {path}: {e}")
+        return None
+    return ReleaseCalendar(data.get("items", []), data.get("fetched_at"), source)
+
+
+def save_calendar_cache(items: List[Dict], fetched_at: str, start: date, end: date) -> None:
+    CALENDAR_CACHE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = CALENDAR_CACHE.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"fetched_at": fetched_at, "de": str(start), "ate": str(end), "items": items},
+                  f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, CALENDAR_CACHE)
+
+
+def cache_is_fresh(calendar: ReleaseCalendar, today: date) -> bool:
+    if not calendar.fetched_at or not calendar.covers(today):
+        return False
+    fetched_at = datetime.fromisoformat(calendar.fetched_at)
+    return datetime.now(BRT) - fetched_at < CACHE_MAX_AGE
+
+
+def load_calendar(today: Optional[date] = None, refresh: bool = False) -> Optional[ReleaseCalendar]:
+    """
+    The release calendar: the local cache when fresh, otherwise a new download
+    (saved to the cache). If the download fails, the stale cache and then the
+    repository snapshot are used. None only if all of them are unavailable.
+    """
+    today = today or get_brazil_date()
+    cached = read_calendar_file(CALENDAR_CACHE, "cache")
+    if cached is not None and not refresh and cache_is_fresh(cached, today):
+        return cached
+
+    start, end = today - timedelta(days=WINDOW_PAST_DAYS), today + timedelta(days=WINDOW_FUTURE_DAYS)
+    try:
+        items = fetch_calendar(start, end)
+        fetched_at = datetime.now(BRT).isoformat(timespec="seconds")
+        save_calendar_cache(items, fetched_at, start, end)
+        print(f"Downloaded {len(items)} calendar items ({start} to {end}).")
+        return ReleaseCalendar(items, fetched_at, "api")
+    except Exception as e:
+        print(f"Error fetching the IBGE calendar: {e}")
+
+    for fallback in (cached, read_calendar_file(CALENDAR_SNAPSHOT, "snapshot")):
+        if fallback is not None and fallback.covers(today):
+            print(f"FAIL-SAFE: using the {fallback.source} calendar "
+                  f"({len(fallback)} items, fetched {fallback.fetched_at or 'unknown'}).")
+            return fallback
+    return None
+
+
+# --- Run list ---
+
+def run_list(indicators: Iterable[str]) -> List[str]:
+    """R scripts to execute for the given indicators, in INDICATOR_SCRIPTS order."""
+    indicators = set(indicators)
+    return [script for name, scripts in INDICATOR_SCRIPTS.items() if name in indicators for script in scripts]
+
+
+def write_outputs(outputs: Dict[str, str]) -> None:
+    """Appends key=value lines to GITHUB_OUTPUT, or prints them when running locally."""
+    output_path = os.environ.get("GITHUB_OUTPUT")
+    lines = "".join(f"{key}={value}\n" for key, value in outputs.items())
+    if output_path:
+        with open(output_path, "a") as f:
+            f.write(lines)
+    else:
+        print("Local output:\n" + lines, end="")
+
+
+def check_releases(start: Optional[date] = None, end: Optional[date] = None, refresh: bool = False) -> Dict[str, str]:
+    """
+    Works out which indicators release in [start, end] (default: today in
+    Brasília) and writes should_run / indicators / run_scripts outputs.
+    """
+    today = get_brazil_date()
+    start = start or today
+    end = end or start
+    calendar = load_calendar(today, refresh=refresh)
+
+    if calendar is None:
+        # No calendar at all (no API, no cache, no snapshot): run everything.
+        print("FAIL-SAFE: no calendar available, triggering every indicator.")
+        indicators = list(INDICATOR_TITLES)
+    else:
+        releases = calendar.indicators_in_window(start, end)
+        print(f"Checking IBGE releases for {start} to {end} ({calendar.source} calendar)...")
+        for name, days in releases.items():
+            print(f"MATCH FOUND: {INDICATOR_TITLES[name]} on {', '.join(map(str, days))}")
+        indicators = [name for name in INDICATOR_TITLES if name in releases]
+
+    outputs = {
+        "should_run": str(bool(indicators)).lower(),
+        "indicators": ",".join(indicators),
+        "run_scripts": ",".join(run_list(indicators)),
+    }
+    write_outputs(outputs)
+    return outputs
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Which tracked IBGE indicators release in a date window.")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, help="First day (YYYY-MM-DD), default today")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, help="Last day (YYYY-MM-DD), default --from")
+    parser.add_argument("--refresh", action="store_true", help="Download the calendar even if the cache is fresh")
+    args = parser.parse_args()
+    check_releases(args.start, args.end, refresh=args.refresh)
+
+
+if __name__ == "__main__":
+    main()
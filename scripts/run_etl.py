@@ -4,17 +4,60 @@ Central ETL runner for PX2.
 This script orchestrates the different data-building steps (IBGE catalogs,
 aliases, BCB catalogs, etc.) so you can schedule a single entrypoint from
 Windows Task Scheduler.
+
+Each step declares the files it reads and writes. Steps whose inputs are not
+produced by any other step start immediately, and independent branches run
+concurrently in a process pool, so a run takes as long as its longest branch
+instead of the sum of all steps.
+
+Steps with local inputs are fingerprinted (input file contents, rule
+dictionaries and the source of the module and its local imports) in
+data/processed/etl_manifest.json and are skipped when nothing changed since
+their last successful run. A step that raises is not recorded. Use --force to
+run everything anyway.
 """
 
 from __future__ import annotations
 
+import argparse
+import importlib
 import logging
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable, List, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 LOGS_DIR = PROJECT_ROOT / "logs"
+MANIFEST_FILE = PROJECT_ROOT / "data" / "processed" / "etl_manifest.json"
+RAW_DIR = PROJECT_ROOT / "data" / "raw" / "IBGE catalog"
+PROCESSED_DIR = PROJECT_ROOT / "data" / "processed"
+
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.etl_manifest import Manifest, step_fingerprint
+
+
+@dataclass(frozen=True)
+class Step:
+    """
+    A single ETL step.
+
+    ``target`` is a ``"module:function"`` string rather than the function
+    itself so the step can be shipped to a worker process and imported there.
+    ``rules`` names module-level dictionaries that are part of the step's
+    fingerprint. Steps without local inputs (API downloads) always run.
+    """
+
+    name: str
+    target: str
+    inputs: Tuple[Path, ...] = ()
+    outputs: Tuple[Path, ...] = ()
+    rules: Tuple[str, ...] = ()
 
 
 def setup_logging() -> None:
@@ -31,53 +74,232 @@ def setup_logging() -> None:
     )
 
 
-def _step(name: str, fn: Callable[[], None]) -> None:
-    logging.info("===== Starting ETL step: %s =====", name)
-    try:
-        fn()
-        logging.info("===== Finished ETL step: %s (OK) =====", name)
-    except Exception as exc:  # noqa: BLE001
-        logging.exception("ETL step failed: %s - %s", name, exc)
-        # Fail fast so the scheduler notices a non‑zero exit code
-        raise
+def _run_step(target: str) -> float:
+    """Import and run a step target inside a worker; returns its wall-clock time."""
+    if str(PROJECT_ROOT) not in sys.path:
+        sys.path.insert(0, str(PROJECT_ROOT))
+
+    module_name, func_name = target.split(":")
+    fn = getattr(importlib.import_module(module_name), func_name)
+
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
 
 
-def build_steps() -> List[Tuple[str, Callable[[], None]]]:
+def build_steps() -> List[Step]:
     """
     Define the ETL pipeline steps.
 
-    You can comment / uncomment steps here if needed.
+    You can comment / uncomment steps here if needed. Dependencies are derived
+    from inputs/outputs, so list order does not matter.
     """
-    # Local imports so that just importing this file does not pull everything.
-    from backend.collectors.get_cnt_catalog import main as build_cnt_catalog
-    from scripts.build_bcb_catalog_api import search_and_build_catalog as build_bcb_catalog
-    from scripts.classify_ibge_series import process_catalog as classify_ibge_catalog
-    from scripts.create_semantic_aliases import process_catalog as create_semantic_aliases
-    from scripts.generate_aliases import process_catalog as generate_smart_aliases
+    from scripts.excel_cache import IBGE_CATALOG_FILE, cache_path
+
+    # The three IBGE steps read the Arrow cache of the workbook; parsing it is
+    # its own step so the workbook is parsed once, not once per step.
+    ibge_catalog = IBGE_CATALOG_FILE
+    ibge_catalog_cache = cache_path(IBGE_CATALOG_FILE)
 
     return [
-        ("IBGE CNT catalog (SIDRA)", build_cnt_catalog),
-        ("IBGE catalog classification", classify_ibge_catalog),
-        ("IBGE semantic aliases", create_semantic_aliases),
-        ("IBGE smart aliases (final catalog)", generate_smart_aliases),
-        ("BCB catalog via seriesbr API", build_bcb_catalog),
+        Step(
+            "IBGE CNT catalog (SIDRA)",
+            "backend.collectors.get_cnt_catalog:main",
+            outputs=(RAW_DIR / "cnt.xlsx",),
+        ),
+        Step(
+            "IBGE catalog Excel cache",
+            "scripts.excel_cache:warm_ibge_catalog",
+            inputs=(ibge_catalog,),
+            outputs=(ibge_catalog_cache,),
+        ),
+        Step(
+            "IBGE catalog classification",
+            "scripts.classify_ibge_series:process_catalog",
+            inputs=(ibge_catalog, ibge_catalog_cache),
+            outputs=(PROCESSED_DIR / "classified_ibge_catalog.parquet",),
+            rules=("ECONOMIC_KEYWORDS",),
+        ),
+        Step(
+            "IBGE semantic aliases",
+            "scripts.create_semantic_aliases:process_catalog",
+            inputs=(ibge_catalog, ibge_catalog_cache),
+            outputs=(PROCESSED_DIR / "semantic_aliased_catalog.parquet",),
+            rules=("SEMANTIC_RULES",),
+        ),
+        Step(
+            "IBGE smart aliases (final catalog)",
+            "scripts.generate_aliases:process_catalog",
+            inputs=(ibge_catalog, ibge_catalog_cache),
+            outputs=(PROCESSED_DIR / "final_ibge_catalog.parquet",),
+            rules=("ALIAS_RULES",),
+        ),
+        Step(
+            "Master catalog index",
+            "scripts.catalog_index:build_index",
+            inputs=(PROCESSED_DIR / "master_series_catalog.parquet",),
+            outputs=(PROCESSED_DIR / "master_series_catalog.index" / "terms.json",),
+        ),
+        Step(
+            "Catalog search index",
+            "scripts.catalog_search:build_index",
+            inputs=(PROCESSED_DIR / "master_series_catalog.parquet",
+                    PROCESSED_DIR / "bcb_metadata_catalog.parquet",
+                    PROCESSED_DIR / "bcb_catalog_from_api.parquet"),
+            outputs=(PROCESSED_DIR / "catalog_search.index" / "meta.json",),
+        ),
+        Step(
+            "BCB catalog via seriesbr API",
+            "scripts.build_bcb_catalog_api:search_and_build_catalog",
+            outputs=(PROCESSED_DIR / "bcb_catalog_from_api.parquet",),
+        ),
         # If you want the heavy async BCB catalog discovery, also enable:
-        # ("BCB async catalog scan", run_build_bcb_catalog_async),
+        # Step("BCB async catalog scan", "scripts.build_bcb_catalog_robust:run",
+        #      outputs=(PROCESSED_DIR / "bcb_series_catalog.parquet",)),
     ]
 
 
+def resolve_dependencies(steps: List[Step]) -> Dict[str, Set[str]]:
+    """
+    Map each step name to the names of the steps that produce its inputs.
+
+    Raises ``ValueError`` if two steps write the same file or the graph has a cycle.
+    """
+    producers: Dict[Path, str] = {}
+    for step in steps:
+        for output in step.outputs:
+            if output in producers:
+                raise ValueError(f"{output} is produced by both '{producers[output]}' and '{step.name}'")
+            producers[output] = step.name
+
+    deps = {
+        step.name: {producers[path] for path in step.inputs if path in producers and producers[path] != step.name}
+        for step in steps
+    }
+
+    # Kahn's algorithm, only to reject cycles before anything is submitted.
+    remaining = {name: set(d) for name, d in deps.items()}
+    while remaining:
+        ready = [name for name, d in remaining.items() if not d]
+        if not ready:
+            raise ValueError(f"ETL steps have a dependency cycle: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for d in remaining.values():
+            d.difference_update(ready)
+
+    return deps
+
+
+def _fingerprint(step: Step) -> Optional[str]:
+    if not step.inputs:
+        return None
+    try:
+        return step_fingerprint(step.target, step.inputs, step.rules)
+    except Exception as exc:  # noqa: BLE001
+        # Let the step itself run and surface the real error.
+        logging.warning("Could not fingerprint ETL step %s: %s", step.name, exc)
+        return None
+
+
+def run_steps(
+    steps: List[Step],
+    max_workers: int | None = None,
+    manifest: Optional[Manifest] = None,
+    force: bool = False,
+) -> Dict[str, float]:
+    """
+    Run the steps as a DAG in a process pool and return per-step wall-clock times.
+
+    A step is submitted as soon as every step producing one of its inputs has
+    finished. With a ``manifest``, steps whose fingerprint is unchanged are
+    skipped (unless ``force``) and successful runs are recorded. On the first
+    failure no new steps are started, the ones already running are allowed to
+    finish, and the error is re-raised.
+    """
+    deps = resolve_dependencies(steps)
+    by_name = {step.name: step for step in steps}
+    pending = {name: set(d) for name, d in deps.items()}
+    fingerprints: Dict[str, Optional[str]] = {}
+    timings: Dict[str, float] = {}
+    failure: BaseException | None = None
+
+    def mark_done(name: str) -> None:
+        for d in pending.values():
+            d.discard(name)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        running: Dict[Future, str] = {}
+
+        def submit_ready() -> None:
+            ready = [n for n, d in pending.items() if not d]
+            while ready:
+                for name in ready:
+                    del pending[name]
+                    step = by_name[name]
+                    if manifest is not None:
+                        fingerprints[name] = _fingerprint(step)
+                        if not force and manifest.is_fresh(name, fingerprints[name], step.outputs):
+                            logging.info("===== Skipping ETL step: %s (inputs unchanged) =====", name)
+                            mark_done(name)
+                            continue
+                    logging.info("===== Starting ETL step: %s =====", name)
+                    running[pool.submit(_run_step, step.target)] = name
+                # Skipped steps may have unblocked others.
+                ready = [n for n, d in pending.items() if not d]
+
+        submit_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    timings[name] = future.result()
+                except Exception as exc:  # noqa: BLE001
+                    logging.error("ETL step failed: %s - %s", name, exc, exc_info=exc)
+                    failure = failure or exc
+                    continue
+                logging.info("===== Finished ETL step: %s (OK) in %.1fs =====", name, timings[name])
+                if manifest is not None:
+                    manifest.record(name, fingerprints.get(name))
+                mark_done(name)
+
+            if failure is None:
+                submit_ready()
+
+    if failure is not None:
+        # Fail fast so the scheduler notices a non‑zero exit code
+        raise failure
+
+    return timings
+
+
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the PX2 ETL pipeline.")
+    parser.add_argument("--workers", type=int, default=None, help="Maximum number of steps to run in parallel.")
+    parser.add_argument("--force", action="store_true", help="Run every step even if its inputs are unchanged.")
+    args = parser.parse_args()
+
     setup_logging()
     logging.info("==== PX2 ETL run started ====")
 
-    steps = build_steps()
-    for name, fn in steps:
-        _step(name, fn)
+    started = time.perf_counter()
+    timings = run_steps(
+        build_steps(),
+        max_workers=args.workers,
+        manifest=Manifest(MANIFEST_FILE),
+        force=args.force,
+    )
+    elapsed = time.perf_counter() - started
 
-    logging.info("==== PX2 ETL run completed successfully ====")
+    for name, seconds in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+        logging.info("  %-40s %8.1fs", name, seconds)
+    logging.info(
+        "==== PX2 ETL run completed successfully in %.1fs (sum of steps %.1fs) ====",
+        elapsed,
+        sum(timings.values()),
+    )
 
 
 if __name__ == "__main__":
     main()
-
-
@@ -0,0 +1,235 @@
+"""
+Typed, in-memory store for the processed indicator data (IPCA, IPCA-15, PIM,
+PMC, PMS).
+
+The indicator files are lists of row dicts keyed by Portuguese column names
+with `data_date` strings. Here each view (mom, yoy, a12, sa_index, ...) is a
+Dataset: one datetime64[D] index shared by all series of the view and one
+float64 block with a column per series, so slicing by date or by series is a
+NumPy operation instead of a walk over dicts.
+
+    ipca = timeseries.load("ipca")
+    ipca["mom"].column("IPCA")[-12:]
+    ipca["a12"].select(["IPCA", "Serviços"], start="2024-01-01")
+
+Views are loaded lazily: from the compact columnar export
+(frontend/public/data/compact/<indicator>/<view>.json, see
+export_indicator_json.py) or a parquet file next to it when present,
+otherwise from the full row-oriented <indicator>.json, parsed once.
+
+The scripts that read indicator data go through this module:
+generate_flash_report, export_indicator_json and vintage_store (the last two
+via read_json on the full files). convert_indicators only writes them.
+"""
+
+import json
+import math
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = PROJECT_ROOT / "frontend" / "public" / "data"
+COMPACT_DIR = DATA_DIR / "compact"
+
+INDICATORS = ["ipca", "ipca15", "pim", "pmc", "pms"]
+DATE_KEY = "data_date"
+
+DateLike = Union[str, np.datetime64]
+
+
+def _to_day(value: DateLike) -> np.datetime64:
+    return np.datetime64(value, "D")
+
+
+class Dataset:
+    """One view of an indicator: a date index and a (dates x series) float64 block."""
+
+    def __init__(self, index: np.ndarray, names: List[str], values: np.ndarray):
+        index = np.asarray(index, dtype="datetime64[D]")
+        values = np.asarray(values, dtype=np.float64).reshape(len(index), len(names))
+        if len(index) > 1 and (np.diff(index) < np.timedelta64(0, "D")).any():
+            order = np.argsort(index, kind="stable")
+            index, values = index[order], values[order]
+        self.index = index
+        self.names = list(names)
+        # Column-major, so every series is one contiguous array
+        self.values = np.asfortranarray(values)
+        self._positions = {name: i for i, name in enumerate(self.names)}
+
+    # --- Construction ---
+
+    @classmethod
+    def from_columnar(cls, dates: List[str], series: Dict[str, List]) -> "Dataset":
+        """From the compact layout: {"dates": [...], "series": {name: [values]}}."""
+        names = list(series)
+        values = np.empty((len(dates), len(names)), dtype=np.float64, order="F")
+        for i, name in enumerate(names):
+            # None -> NaN through the float conversion of an object array
+            values[:, i] = np.array(series[name], dtype=object).astype(np.float64)
+        return cls(np.array(dates, dtype="datetime64[D]"), names, values)
+
+    @classmethod
+    def from_records(cls, rows: List[Dict]) -> "Dataset":
+        """From the row-oriented layout: [{"data_date": ..., name: value, ...}, ...]."""
+        names: Dict[str, None] = {}
+        for row in rows:
+            for key in row:
+                if key != DATE_KEY:
+                    names.setdefault(key)
+        return cls.from_columnar(
+            [row.get(DATE_KEY) for row in rows],
+            {name: [row.get(name) for row in rows] for name in names},
+        )
+
+    @classmethod
+    def from_parquet(cls, path: Path) -> "Dataset":
+        import pandas as pd
+
+        df = pd.read_parquet(path)
+        names = [c for c in df.columns if c != DATE_KEY]
+        return cls(pd.to_datetime(df[DATE_KEY]).to_numpy(dtype="datetime64[D]"), names,
+                   df[names].to_numpy(dtype=np.float64))
+
+    def to_parquet(self, path: Path) -> None:
+        self.to_frame().to_parquet(path, index=False)
+
+    # --- Access ---
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._positions
+
+    def __repr__(self) -> str:
+        span = f"{self.index[0]}..{self.index[-1]}" if len(self) else "empty"
+        return f"Dataset({len(self)} dates {span}, {len(self.names)} series)"
+
+    @property
+    def dates(self) -> List[str]:
+        return np.datetime_as_string(self.index, unit="D").tolist()
+
+    def column(self, name: str) -> np.ndarray:
+        """Values of one series (a view into the block, NaN where missing)."""
+        return self.values[:, self._positions[name]]
+
+    def position(self, date: DateLike) -> Optional[int]:
+        """Row of `date` (binary search on the sorted index), or None."""
+        day = _to_day(date)
+        i = int(np.searchsorted(self.index, day))
+        return i if i < len(self.index) and self.index[i] == day else None
+
+    def select(self, names: Optional[Iterable[str]] = None, start: Optional[DateLike] = None,
+               end: Optional[DateLike] = None) -> "Dataset":
+        """Sub-dataset restricted to some series and/or a date range (inclusive)."""
+        lo = 0 if start is None else int(np.searchsorted(self.index, _to_day(start), side="left"))
+        hi = len(self.index) if end is None else int(np.searchsorted(self.index, _to_day(end), side="right"))
+        if names is None:
+            names = self.names
+            block = self.values[lo:hi]
+        else:
+            names = list(names)
+            block = self.values[lo:hi, [self._positions[n] for n in names]]
+        return Dataset(self.index[lo:hi], names, block)
+
+    def tail(self, n: int) -> "Dataset":
+        return Dataset(self.index[-n:], self.names, self.values[-n:])
+
+    def row(self, i: int) -> Dict:
+        """Row `i` as the legacy dict (data_date string, None for missing values)."""
+        record = {DATE_KEY: str(self.index[i])}
+        for name, value in zip(self.names, self.values[i].tolist()):
+            record[name] = None if math.isnan(value) else value
+        return record
+
+    def at(self, date: DateLike) -> Optional[Dict]:
+        i = self.position(date)
+        return None if i is None else self.row(i)
+
+    def to_records(self) -> List[Dict]:
+        return [self.row(i) for i in range(len(self))]
+
+    def to_frame(self):
+        import pandas as pd
+
+        df = pd.DataFrame(self.values, columns=self.names)
+        df.insert(0, DATE_KEY, self.index.astype("datetime64[ns]"))
+        return df
+
+
+class Indicator:
+    """The views of one indicator, each parsed on first access."""
+
+    def __init__(self, name: str, compact_dir: Path = COMPACT_DIR, data_dir: Path = DATA_DIR,
+                 data: Optional[Dict] = None):
+        self.name = name
+        self.compact_dir = Path(compact_dir) / name
+        self.full_file = Path(data_dir) / f"{name}.json"
+        self._full = data
+        self._views: Dict[str, Dataset] = {}
+        self._metadata = data.get("metadata") if data is not None else None
+
+    def _full_data(self) -> Dict:
+        if self._full is None:
+            with open(self.full_file, "r", encoding="utf-8") as f:
+                self._full = json.load(f)
+        return self._full
+
+    def _load_view(self, view: str) -> Dataset:
+        if self._full is None:
+            parquet_file = self.compact_dir / f"{view}.parquet"
+            if parquet_file.exists():
+                return Dataset.from_parquet(parquet_file)
+            json_file = self.compact_dir / f"{view}.json"
+            if json_file.exists():
+                with open(json_file, "r", encoding="utf-8") as f:
+                    columnar = json.load(f)
+                return Dataset.from_columnar(columnar["dates"], columnar["series"])
+        rows = self._full_data().get(view)
+        if not isinstance(rows, list):
+            raise KeyError(f"{self.name} has no view '{view}'")
+        return Dataset.from_records(rows)
+
+    def __getitem__(self, view: str) -> Dataset:
+        if view not in self._views:
+            self._views[view] = self._load_view(view)
+        return self._views[view]
+
+    def __contains__(self, view: str) -> bool:
+        return view in self.views
+
+    @property
+    def views(self) -> List[str]:
+        if self._full is None:
+            files = {p.stem for p in self.compact_dir.glob("*.json")} | {p.stem for p in self.compact_dir.glob("*.parquet")}
+            if files:
+                return sorted(files)
+        return [k for k, v in self._full_data().items() if isinstance(v, list)]
+
+    @property
+    def metadata(self) -> Dict:
+        if self._metadata is None:
+            manifest = COMPACT_DIR / "manifest.json"
+            if self._full is None and manifest.exists():
+                with open(manifest, "r", encoding="utf-8") as f:
+                    section = json.load(f).get("indicators", {}).get(self.name)
+                if section is not None:
+                    self._metadata = section.get("metadata", {})
+                    return self._metadata
+            self._metadata = self._full_data().get("metadata", {})
+        return self._metadata
+
+
+def load(name: str) -> Indicator:
+    """An indicator from the exported data files (views loaded lazily)."""
+    return Indicator(name)
+
+
+def read_json(path: Path) -> Indicator:
+    """An indicator from any row-oriented file (full history or *_latest.json)."""
+    path = Path(path)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return Indicator(path.stem.replace("_latest", ""), data=data)
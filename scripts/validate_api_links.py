@@ -1,7 +1,13 @@
-import polars as pl
+import sys
 from pathlib import Path
 import requests
 
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.catalog_index import CatalogIndex
+
 # --- Configuration ---
 MASTER_CATALOG_FILE = Path(__file__).parent.parent / "data" / "processed" / "master_series_catalog.parquet"
 NUM_LINKS_TO_TEST = 5
@@ -18,14 +24,11 @@ def validate_links():
             print(f"Error: Master catalog not found at {MASTER_CATALOG_FILE}")
             return
             
-        df = pl.read_parquet(MASTER_CATALOG_FILE)
-        print(f"Loaded {df.shape[0]} series from the master catalog.")
+        index = CatalogIndex.open(MASTER_CATALOG_FILE)
+        print(f"Opened the index of {index.rows} series from the master catalog.")
 
-        # 2. Filter for CNT series that have an API URL
-        cnt_df = df.filter(
-            (pl.col("branch") == "CNT") & 
-            (pl.col("api_url").is_not_null())
-        )
+        # 2. Look up the CNT series that have an API URL
+        cnt_df = index.query(branch="CNT", has="api_url")
         
         if cnt_df.height == 0:
             print("No CNT series with API URLs found in the catalog to test.")
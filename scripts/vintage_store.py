@@ -0,0 +1,237 @@
+"""
+Bitemporal store of the indicator releases (vintages).
+
+The R scripts and the Excel converters overwrite frontend/public/data/
+<indicator>.json on every run, so when IBGE revises a seasonally adjusted
+PIM/PMC/PMS value the previous figure is gone. Every cell of those files is
+identified here by (view, series, ref_date) and recorded per release_date:
+
+    data/vintages/<indicator>/<release_date>.parquet
+        view | series | ref_date | value | release_date
+
+Each release partition holds only the cells that are new or changed since
+the previous release (a cell that disappears is written once as a null), so
+the store grows with the revisions, not with the size of the files. The
+state as of any release is the last value of each cell over the partitions
+up to that date.
+
+    store = VintageStore()
+    store.as_of("pim", "2025-06-30", view="sa_index")        # long cells
+    store.wide("pmc", "sa_index", as_of="2025-06-30")         # data_date x series
+    store.revision_history("pms", "mom", "Volume de Serviços", "2025-03-01")
+
+`python scripts/vintage_store.py` records the current JSON files (release
+date taken from their metadata.last_updated); the data update workflow runs
+it after the R scripts.
+"""
+
+import os
+import sys
+from datetime import date, datetime
+from pathlib import Path
+from typing import List, Optional, Union
+
+import numpy as np
+import polars as pl
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts import timeseries
+
+# --- Configuration ---
+VINTAGE_DIR = PROJECT_ROOT / "data" / "vintages"
+DATA_DIR = timeseries.DATA_DIR
+INDICATORS = timeseries.INDICATORS
+
+KEY_COLUMNS = ["view", "series", "ref_date"]
+SCHEMA = {
+    "view": pl.String,
+    "series": pl.String,
+    "ref_date": pl.Date,
+    "value": pl.Float64,
+    "release_date": pl.Date,
+}
+
+DateLike = Union[str, date]
+
+
+def _to_date(value: DateLike) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def indicator_cells(indicator: timeseries.Indicator) -> pl.DataFrame:
+    """Every non-missing cell of an indicator as (view, series, ref_date, value)."""
+    frames = []
+    for view in indicator.views:
+        dataset = indicator[view]
+        n_dates, n_series = dataset.values.shape
+        # The block is column-major, so ravel("F") walks one series at a time
+        frames.append(pl.DataFrame({
+            "view": np.full(n_dates * n_series, view, dtype=object),
+            "series": np.repeat(np.array(dataset.names, dtype=object), n_dates),
+            "ref_date": np.tile(dataset.index, n_series),
+            "value": dataset.values.ravel(order="F"),
+        }, schema_overrides={"view": pl.String, "series": pl.String}))
+    if not frames:
+        return pl.DataFrame(schema={k: v for k, v in SCHEMA.items() if k != "release_date"})
+    cells = pl.concat(frames).with_columns(pl.col("ref_date").cast(pl.Date))
+    return cells.filter(pl.col("value").is_not_nan())
+
+
+class VintageStore:
+    """Append-only (series, reference date, release date) store, one parquet per release."""
+
+    def __init__(self, root: Path = VINTAGE_DIR):
+        self.root = Path(root)
+
+    def partition_path(self, indicator: str, release_date: date) -> Path:
+        return self.root / indicator / f"{release_date.isoformat()}.parquet"
+
+    def releases(self, indicator: str) -> List[date]:
+        folder = self.root / indicator
+        if not folder.exists():
+            return []
+        return sorted(date.fromisoformat(p.stem) for p in folder.glob("*.parquet"))
+
+    def _partitions(self, indicator: str, until: Optional[date] = None, inclusive: bool = True) -> List[Path]:
+        releases = self.releases(indicator)
+        if until is not None:
+            releases = [r for r in releases if r < until or (inclusive and r == until)]
+        return [self.partition_path(indicator, r) for r in releases]
+
+    def _scan(self, partitions: List[Path]) -> pl.LazyFrame:
+        if not partitions:
+            return pl.LazyFrame(schema=SCHEMA)
+        return pl.scan_parquet(partitions)
+
+    # --- Queries ---
+
+    def as_of(self, indicator: str, release_date: Optional[DateLike] = None, view: Optional[str] = None,
+              series: Optional[List[str]] = None, inclusive: bool = True) -> pl.DataFrame:
+        """
+        Cells as published on `release_date` (default: latest), with the
+        release each value comes from. Cells removed by then are left out.
+        """
+        until = None if release_date is None else _to_date(release_date)
+        cells = self._scan(self._partitions(indicator, until, inclusive))
+        if view is not None:
+            cells = cells.filter(pl.col("view") == view)
+        if series is not None:
+            cells = cells.filter(pl.col("series").is_in(series))
+        return (
+            cells.sort("release_date")
+            .group_by(KEY_COLUMNS, maintain_order=True).last()
+            .filter(pl.col("value").is_not_null())
+            .sort(KEY_COLUMNS)
+            .collect()
+        )
+
+    def wide(self, indicator: str, view: str, as_of: Optional[DateLike] = None) -> pl.DataFrame:
+        """One view as of a release, in the layout of the JSON files (data_date + a column per series)."""
+        cells = self.as_of(indicator, as_of, view=view)
+        if cells.is_empty():
+            return pl.DataFrame(schema={timeseries.DATE_KEY: pl.Date})
+        return (
+            cells.pivot("series", index="ref_date", values="value", maintain_order=True)
+            .rename({"ref_date": timeseries.DATE_KEY})
+            .sort(timeseries.DATE_KEY)
+        )
+
+    def revision_history(self, indicator: str, view: str, series: str, ref_date: DateLike) -> pl.DataFrame:
+        """Every published value of one point: release_date, value and the change from the previous release."""
+        return (
+            self._scan(self._partitions(indicator))
+            .filter((pl.col("view") == view) & (pl.col("series") == series)
+                    & (pl.col("ref_date") == _to_date(ref_date)))
+            .select("release_date", "value")
+            .sort("release_date")
+            .with_columns(pl.col("value").diff().alias("revision"))
+            .collect()
+        )
+
+    def history(self, indicator: str, view: Optional[str] = None, series: Optional[List[str]] = None) -> pl.DataFrame:
+        """Every stored record (nulls included), sorted by key and release_date, for as-of joins."""
+        cells = self._scan(self._partitions(indicator))
+        if view is not None:
+            cells = cells.filter(pl.col("view") == view)
+        if series is not None:
+            cells = cells.filter(pl.col("series").is_in(series))
+        return cells.sort(KEY_COLUMNS + ["release_date"]).collect()
+
+    # --- Recording ---
+
+    def record(self, indicator: str, cells: pl.DataFrame, release_date: DateLike) -> int:
+        """
+        Stores the cells that changed since the previous release; returns how
+        many. Re-recording the latest release replaces it; releases older
+        than the latest are refused (the store is append-only).
+        """
+        release_date = _to_date(release_date)
+        releases = self.releases(indicator)
+        if releases and release_date < releases[-1]:
+            raise ValueError(f"{indicator}: release {release_date} is older than the latest stored "
+                             f"release {releases[-1]}")
+
+        previous = self.as_of(indicator, release_date, inclusive=False).select(KEY_COLUMNS + ["value"])
+        current = cells.select(KEY_COLUMNS + ["value"])
+        joined = current.join(previous, on=KEY_COLUMNS, how="full", coalesce=True, suffix="_previous")
+        changed = joined.filter(
+            pl.col("value_previous").is_null()
+            | pl.col("value").is_null()
+            | (pl.col("value") != pl.col("value_previous"))
+        ).filter(pl.col("value").is_not_null() | pl.col("value_previous").is_not_null())
+        changed = (
+            changed.select(KEY_COLUMNS + ["value"])
+            .with_columns(pl.lit(release_date).alias("release_date"))
+            .cast(SCHEMA)
+            .sort(KEY_COLUMNS)
+        )
+
+        path = self.partition_path(indicator, release_date)
+        if changed.is_empty():
+            if path.exists():
+                path.unlink()
+            return 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        # Sorted by key, so the dictionary/RLE pages and min/max statistics stay tight
+        changed.write_parquet(tmp_path, compression="zstd", compression_level=9, statistics=True)
+        os.replace(tmp_path, path)
+        return changed.height
+
+
+def record_indicator(name: str, store: Optional[VintageStore] = None, data_dir: Path = DATA_DIR) -> Optional[int]:
+    """Records the current <name>.json as the release of its metadata.last_updated date."""
+    path = Path(data_dir) / f"{name}.json"
+    if not path.exists():
+        print(f"  [WARN] {path.name} not found, skipping")
+        return None
+    indicator = timeseries.read_json(path)
+    last_updated = indicator.metadata.get("last_updated")
+    release_date = _to_date(last_updated) if last_updated else date.today()
+    store = store or VintageStore()
+    changed = store.record(name, indicator_cells(indicator), release_date)
+    print(f"  {name}: release {release_date}, {changed} cells new or revised")
+    return changed
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Record the indicator JSON files as a new vintage.")
+    parser.add_argument("indicators", nargs="*", default=INDICATORS, help="Indicators to record (default: all)")
+    args = parser.parse_args()
+
+    print("Recording indicator vintages...")
+    store = VintageStore()
+    for name in args.indicators:
+        record_indicator(name, store)
+
+
+if __name__ == "__main__":
+    main()
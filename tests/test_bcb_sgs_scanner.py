@@ -0,0 +1,152 @@
+import asyncio
+from collections import Counter
+
+import aiohttp
+from aiohttp import web
+
+import scripts.bcb_sgs_scanner as bcb_sgs_scanner
+from scripts.bcb_sgs_scanner import MAX_RETRIES, AIMDController, SGSScanner, valid_series
+
+DAILY_ERROR = "O sistema aceita uma janela de consulta de, no máximo, 10 anos em séries de periodicidade diária"
+
+
+def _app(hits: Counter) -> web.Application:
+    """
+    Stub SGS API: 1 standard, 2 daily, 3 missing, 4 throttled twice then fine,
+    5 always failing, 6 forbidden, 7 a 400 that is not the daily-series error.
+    """
+    async def handler(request):
+        series_id = int(request.match_info["series_id"])
+        hits[series_id] += 1
+        if series_id == 1:
+            return web.json_response([{"data": "01/01/2025", "valor": "1"}])
+        if series_id == 2:
+            return web.Response(status=400, text=DAILY_ERROR)
+        if series_id == 4 and hits[series_id] <= 2:
+            return web.Response(status=429)
+        if series_id == 4:
+            return web.json_response([])
+        if series_id == 5:
+            return web.Response(status=502)
+        if series_id == 6:
+            return web.Response(status=403)
+        if series_id == 7:
+            return web.Response(status=400, text="Requisição inválida")
+        return web.Response(status=404)
+
+    app = web.Application()
+    app.router.add_get("/bcdata.sgs.{series_id}/dados/ultimos/1", handler)
+    return app
+
+
+async def _scan(tmp_path, series_ids, hits, controller=None):
+    runner = web.AppRunner(_app(hits))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        scanner = SGSScanner(tmp_path / "scan.log", controller,
+                             base_url=f"http://127.0.0.1:{port}/bcdata.sgs.{{}}/dados")
+        return scanner, await scanner.scan(series_ids)
+    finally:
+        await runner.cleanup()
+
+
+def _record_sleeps(monkeypatch):
+    sleeps = []
+    original = asyncio.sleep
+
+    async def sleep(delay, *args, **kwargs):
+        if delay:
+            sleeps.append(delay)
+        return await original(0, *args, **kwargs)
+
+    monkeypatch.setattr(bcb_sgs_scanner.asyncio, "sleep", sleep)
+    return sleeps
+
+
+def test_scan_retries_throttled_ids_and_resumes(tmp_path, monkeypatch):
+    _record_sleeps(monkeypatch)
+    hits = Counter()
+    _, results = asyncio.run(_scan(tmp_path, [1, 2, 3, 4, 5], hits))
+
+    assert results == {1: "standard", 2: "daily", 3: "not_found", 4: "standard", 5: "error_502"}
+    assert hits[4] == 3
+    assert valid_series(results) == [{"id": 1, "type": "standard"}, {"id": 2, "type": "daily"},
+                                     {"id": 4, "type": "standard"}]
+
+    # Settled IDs come from the log; only the failing one is pinged again
+    hits.clear()
+    _, results = asyncio.run(_scan(tmp_path, [1, 2, 3, 4, 5], hits))
+    assert set(hits) == {5}
+    assert results[1] == "standard" and results[5] == "error_502"
+
+
+def test_no_backoff_after_the_last_attempt(tmp_path, monkeypatch):
+    sleeps = _record_sleeps(monkeypatch)
+    hits = Counter()
+    asyncio.run(_scan(tmp_path, [5], hits))
+
+    assert hits[5] == MAX_RETRIES + 1
+    assert len(sleeps) == MAX_RETRIES
+
+
+def test_server_errors_halve_the_concurrency(tmp_path, monkeypatch):
+    _record_sleeps(monkeypatch)
+    controller = AIMDController(initial=16, minimum=2)
+    asyncio.run(_scan(tmp_path, [5], Counter(), controller))
+    assert controller.concurrency == 8
+
+
+def test_probe_counts_every_5xx_as_throttling():
+    async def probe(status):
+        controller = AIMDController(initial=16)
+        scanner = SGSScanner(None, controller, base_url="http://stub/{}")
+
+        class Response:
+            def __init__(self):
+                self.status = status
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+        class Session:
+            def get(self, url, timeout):
+                return Response()
+
+        result = await scanner._probe(Session(), 7)
+        return result, controller.concurrency
+
+    for status in (500, 502, 504):
+        assert asyncio.run(probe(status)) == ((f"error_{status}", status), 8)
+    assert asyncio.run(probe(404)) == (("not_found", 404), 16)
+
+
+def test_client_errors_count_as_throttling(tmp_path, monkeypatch):
+    _record_sleeps(monkeypatch)
+    controller = AIMDController(initial=16)
+    scanner = SGSScanner(tmp_path / "scan.log", controller, base_url="http://127.0.0.1:9/{}")
+
+    async def probe():
+        async with aiohttp.ClientSession() as session:
+            return await scanner._probe(session, 1)
+
+    assert asyncio.run(probe()) == ("error_timeout", None)
+    assert controller.concurrency == 8
+
+
+def test_only_404_settles_an_id_as_missing(tmp_path, monkeypatch):
+    _record_sleeps(monkeypatch)
+    hits = Counter()
+    _, results = asyncio.run(_scan(tmp_path, [3, 6, 7], hits))
+
+    assert results == {3: "not_found", 6: "error_403", 7: "error_400"}
+    assert hits == {3: 1, 6: MAX_RETRIES + 1, 7: MAX_RETRIES + 1}
+    # Unsettled IDs are checked again on the next run
+    hits.clear()
+    asyncio.run(_scan(tmp_path, [3, 6, 7], hits))
+    assert set(hits) == {6, 7}
@@ -0,0 +1,52 @@
+import sys
+
+from scripts.etl_manifest import local_sources, step_fingerprint
+
+
+def _package(tmp_path, monkeypatch):
+    # A throwaway "scripts" namespace package: step -> helper -> deep
+    package = tmp_path / "scripts"
+    package.mkdir()
+    (package / "fp_step.py").write_text(
+        "import json\nfrom scripts import fp_helper\n\nRULES = {'a': 1}\n\ndef run():\n    return fp_helper.VALUE\n")
+    (package / "fp_helper.py").write_text("from scripts.fp_deep import VALUE\n")
+    (package / "fp_deep.py").write_text("VALUE = 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "scripts", raising=False)
+    for name in ("fp_step", "fp_helper", "fp_deep"):
+        monkeypatch.delitem(sys.modules, f"scripts.{name}", raising=False)
+    return package
+
+
+def test_local_imports_are_followed_transitively(tmp_path, monkeypatch):
+    _package(tmp_path, monkeypatch)
+    assert sorted(local_sources("scripts.fp_step")) == ["scripts.fp_deep", "scripts.fp_helper", "scripts.fp_step"]
+
+
+def test_editing_an_imported_module_changes_the_fingerprint(tmp_path, monkeypatch):
+    package = _package(tmp_path, monkeypatch)
+    data = tmp_path / "input.csv"
+    data.write_text("x\n1\n")
+    before = step_fingerprint("scripts.fp_step:run", [data], ["RULES"])
+    assert step_fingerprint("scripts.fp_step:run", [data], ["RULES"]) == before
+
+    (package / "fp_deep.py").write_text("VALUE = 2\n")
+    assert step_fingerprint("scripts.fp_step:run", [data], ["RULES"]) != before
+
+
+def test_missing_input_gives_no_fingerprint(tmp_path, monkeypatch):
+    _package(tmp_path, monkeypatch)
+    assert step_fingerprint("scripts.fp_step:run", [tmp_path / "missing.csv"]) is None
+
+
+def test_inputs_with_the_same_name_are_both_hashed(tmp_path, monkeypatch):
+    _package(tmp_path, monkeypatch)
+    first, second = tmp_path / "a" / "data.csv", tmp_path / "b" / "data.csv"
+    for path in (first, second):
+        path.parent.mkdir()
+        path.write_text("x\n1\n")
+    before = step_fingerprint("scripts.fp_step:run", [first, second])
+
+    # Only the first of the two same-named files changes
+    first.write_text("x\n2\n")
+    assert step_fingerprint("scripts.fp_step:run", [first, second]) != before
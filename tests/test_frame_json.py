@@ -0,0 +1,50 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from scripts.frame_json import frame_to_json, sanitize_frame, write_indicator_json
+
+
+def test_sanitize_frame_only_touches_float_columns():
+    df = pd.DataFrame({"data_date": ["2025-01-01", "2025-02-01"], "value": [1.5, np.inf], "count": [1, 2]})
+    clean = sanitize_frame(df)
+
+    assert clean["count"].dtype == np.int64
+    assert clean["value"].isna().tolist() == [False, True]
+    assert df["value"].iloc[1] == np.inf  # the input is left alone
+
+
+def test_frame_to_json_keeps_precision_and_slashes():
+    df = pd.DataFrame({"data_date": ["2025/01/01"], "value": [0.1 + 0.2], "count": [3], "note": ["a/b"]})
+    text = frame_to_json(sanitize_frame(df))
+
+    assert "\\/" not in text
+    assert json.loads(text) == [{"data_date": "2025/01/01", "value": 0.1 + 0.2, "count": 3, "note": "a/b"}]
+    assert '"count":3,' in text
+
+
+def test_write_indicator_json(tmp_path):
+    path = tmp_path / "ind.json"
+    views = {"mom": pd.DataFrame({"data_date": ["2025-01-01"], "IPCA": [np.nan]})}
+    write_indicator_json(path, views, {"indicator": "IPCA"})
+
+    assert json.loads(path.read_text(encoding="utf-8")) == {
+        "mom": [{"data_date": "2025-01-01", "IPCA": None}],
+        "metadata": {"indicator": "IPCA"},
+    }
+
+
+def test_non_finite_cells_of_mixed_columns_become_null():
+    df = pd.DataFrame({"data_date": ["2025-01-01", "2025-02-01", "2025-03-01"],
+                       "mixed": pd.Series([1.5, "n/d, revisado", float("-inf")], dtype=object),
+                       "flag": [True, False, True]})
+    text = frame_to_json(sanitize_frame(df))
+
+    assert json.loads(text) == [
+        {"data_date": "2025-01-01", "mixed": 1.5, "flag": True},
+        {"data_date": "2025-02-01", "mixed": "n/d, revisado", "flag": False},
+        {"data_date": "2025-03-01", "mixed": None, "flag": True},
+    ]
+    # Same text as encoding the records in one go
+    assert text == json.dumps(json.loads(text), ensure_ascii=False, separators=(",", ":"))
@@ -0,0 +1,175 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import scripts.generate_flash_report as flash
+from scripts import timeseries
+
+PMC = next(spec for spec in flash.FLASH_REPORTS if spec["indicator"] == "PMC")
+LLM_TEXT = {"headline": "Varejo sobe 0,5% em setembro", "analysis": "Alta puxada por supermercados."}
+
+
+def _pmc(mom=0.5):
+    return timeseries.Indicator("pmc", data={
+        "metadata": {},
+        "mom": [{"data_date": "2025-08-01", "PMC SA": -0.2, "PMCA SA": 0.1},
+                {"data_date": "2025-09-01", "PMC SA": mom, "PMCA SA": 0.3}],
+        "yoy": [{"data_date": "2025-09-01", "PMC NSA": 2.1}],
+    })
+
+
+class ChatHandler(BaseHTTPRequestHandler):
+    """Chat-completions stub: answers server.reply after server.delay seconds, or server.status."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.requests.append((dict(self.headers), body))
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(server.delay)
+            if server.status != 200:
+                payload = b'{"error": "stub"}'
+            else:
+                content = json.dumps(server.reply, ensure_ascii=False)
+                payload = json.dumps({"choices": [{"message": {"content": content}}]}).encode("utf-8")
+            self.send_response(server.status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up (timeout test)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+@pytest.fixture
+def llm(monkeypatch, tmp_path):
+    """A local chat-completions server the script is pointed at through GROQ_API_URL."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ChatHandler)
+    httpd.daemon_threads = True
+    httpd.lock = threading.Lock()
+    httpd.requests = []
+    httpd.reply = LLM_TEXT
+    httpd.delay = 0
+    httpd.status = 200
+    httpd.in_flight = httpd.max_in_flight = 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(flash, "GROQ_API_URL", f"http://127.0.0.1:{httpd.server_address[1]}/openai/v1/chat/completions")
+    monkeypatch.setattr(flash, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(flash, "LLM_CACHE_PATH", str(tmp_path / "flash_llm_cache.json"))
+    monkeypatch.setattr(flash, "_llm_cache", None)
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_cache_miss_calls_the_llm_and_caches_the_answer(llm):
+    report = flash.generate_report(PMC, _pmc())
+
+    assert len(llm.requests) == 1
+    headers, body = llm.requests[0]
+    assert headers["Authorization"] == "Bearer test-key"
+    assert body["model"] == flash.GROQ_MODEL
+    assert body["messages"][0] == {"role": "system", "content": flash.LLM_SYSTEM_PROMPT}
+    assert '"monthly_restricted": 0.5' in body["messages"][1]["content"]
+    assert report["headline"] == LLM_TEXT["headline"] and report["llm"] is True
+    assert report["metrics"] == {"mom": 0.5, "mom_ampliado": 0.3, "yoy": 2.1}
+    assert flash.load_llm_cache() == {report["llm_cache_key"]: LLM_TEXT}
+
+
+def test_cache_hit_skips_the_llm(llm):
+    first = flash.generate_report(PMC, _pmc())
+    flash.save_llm_cache()
+    # A new run reads the cache back from disk
+    flash._llm_cache = None
+    second = flash.generate_report(PMC, _pmc())
+
+    assert len(llm.requests) == 1
+    assert second["analysis"] == LLM_TEXT["analysis"]
+    assert second["llm_cache_key"] == first["llm_cache_key"]
+
+
+def test_timeout_falls_back_to_the_template(llm, monkeypatch):
+    monkeypatch.setattr(flash, "LLM_TIMEOUT", 0.2)
+    llm.delay = 1
+    report = flash.generate_report(PMC, _pmc())
+
+    assert len(llm.requests) == 1
+    assert report["llm"] is False
+    assert report["headline"] == "Varejo (PMC) variou 0,50% em setembro de 2025"
+    assert report["analysis"].startswith("O volume de vendas do varejo variou 0,50%")
+    assert flash.load_llm_cache() == {}
+
+
+def test_prune_keeps_only_keys_in_use(llm):
+    old = flash.generate_report(PMC, _pmc(mom=0.5))
+    new = flash.generate_report(PMC, _pmc(mom=0.7))
+    assert len(flash.load_llm_cache()) == 2
+
+    flash.prune_llm_cache({new["llm_cache_key"]})
+    assert list(flash.load_llm_cache()) == [new["llm_cache_key"]]
+    assert old["llm_cache_key"] != new["llm_cache_key"]
+
+
+def _sources(monkeypatch, tmp_path, names=("pmc",)):
+    """Writes <name>_latest.json files built from _pmc() and points the script at tmp_path."""
+    monkeypatch.setattr(flash, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(flash, "LATEST_DIR", str(tmp_path))
+    monkeypatch.setattr(flash, "FLASH_REPORT_PATH", str(tmp_path / "flash_reports.json"))
+    indicator = _pmc()
+    data = {"metadata": {}, "mom": indicator["mom"].to_records(), "yoy": indicator["yoy"].to_records()}
+    for name in names:
+        (tmp_path / f"{name}_latest.json").write_text(json.dumps(data), encoding="utf-8")
+
+
+def _reports(tmp_path):
+    with open(tmp_path / "flash_reports.json", encoding="utf-8") as f:
+        return {r["indicator"]: r for r in json.load(f)["reports"]}
+
+
+def test_template_fallback_is_retried_on_the_next_run(llm, monkeypatch, tmp_path):
+    _sources(monkeypatch, tmp_path)
+    llm.status = 500
+    flash.update_flash_reports()
+    assert _reports(tmp_path)["PMC"]["llm"] is False
+
+    # Same source, but the LLM text is still missing: the report is rebuilt
+    llm.status = 200
+    flash.update_flash_reports()
+    report = _reports(tmp_path)["PMC"]
+    assert report["llm"] is True and report["headline"] == LLM_TEXT["headline"]
+
+    # Now it is complete and the unchanged source is skipped
+    calls = len(llm.requests)
+    flash.update_flash_reports()
+    assert len(llm.requests) == calls
+
+
+def test_pending_indicators_are_generated_concurrently(llm, monkeypatch, tmp_path):
+    names = ("ipca", "pmc", "pms", "pim")
+    _sources(monkeypatch, tmp_path, names)
+    llm.delay = 0.3
+    started = time.perf_counter()
+    flash.update_flash_reports()
+    elapsed = time.perf_counter() - started
+
+    reports = _reports(tmp_path)
+    assert len(llm.requests) == len(names)
+    assert all(report["llm"] and report["headline"] == LLM_TEXT["headline"] for report in reports.values())
+    assert {report["indicator"] for report in reports.values()} == {"IPCA", "PMC", "PMS", "PIM"}
+    # The four calls overlapped instead of taking 4 x 0.3 s
+    assert llm.max_in_flight > 1
+    assert elapsed < len(names) * llm.delay
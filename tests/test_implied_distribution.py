@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from scripts.implied_distribution import build_distribution
+
+
+def _history(event, floors, caps, prices):
+    return pd.DataFrame({
+        "event_ticker": event,
+        "date": "2025-01-01",
+        "floor_strike": floors,
+        "cap_strike": caps,
+        "close_price": prices,
+    })
+
+
+def test_ladder_with_untraded_strike_is_interpolated():
+    # "above 0" has not traded: P(> 0) is taken between the tail anchor (1) and P(> 0.5) = 0.8
+    dist = build_distribution(_history("L", [0, 0.5, 1, 1.5], np.nan, [None, 80, 40, 10]))
+    np.testing.assert_allclose(dist.prob[0, 0], [0.1, 0.1, 0.4, 0.3, 0.1])
+    frame = dist.to_frame()
+    assert frame["p_below_0"].iloc[0] < 0.5
+    np.testing.assert_allclose(frame["mean"].iloc[0], 0.85)
+
+
+def test_ladder_fully_priced():
+    dist = build_distribution(_history("L", [0, 0.5, 1], np.nan, [90, 50, 20]))
+    np.testing.assert_allclose(dist.prob[0, 0], [0.1, 0.4, 0.3, 0.2])
+
+
+def test_untraded_bucket_gets_neighbour_density():
+    dist = build_distribution(_history("B", [np.nan, 0, 0.5, 1], [0, 0.5, 1, np.nan], [10, None, 40, 30]))
+    prob = dist.prob[0, 0]
+    assert prob[1] > 0
+    np.testing.assert_allclose(prob.sum(), 1.0)
+    assert np.isnan(dist.overround[0, 0])
+
+
+def test_bucket_overround_is_removed():
+    dist = build_distribution(_history("B", [np.nan, 0, 1], [0, 1, np.nan], [22, 55, 33]))
+    np.testing.assert_allclose(dist.prob[0, 0], np.array([22, 55, 33]) / 110)
+    np.testing.assert_allclose(dist.overround[0, 0], 0.10)
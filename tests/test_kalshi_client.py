@@ -0,0 +1,138 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import scripts.kalshi_client as kalshi_client
+from scripts.kalshi_client import KalshiClient
+
+TRADES = [{"trade_id": str(i), "yes_price": 40 + i} for i in range(5)]
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Kalshi-like fixture: /markets/<ticker>/trades pages by 2 with a cursor."""
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=None, headers=None):
+        payload = json.dumps(body or {}).encode("utf-8")
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        with server.lock:
+            server.requests.append((url.path, query, self.client_address[1]))
+            throttle = server.throttle.get(url.path, 0)
+            if throttle:
+                server.throttle[url.path] = throttle - 1
+        if throttle:
+            return self._send(429, headers={"Retry-After": "0"})
+
+        parts = url.path.strip("/").split("/")
+        if parts[:1] == ["markets"] and parts[-1] == "trades":
+            if query.get("cursor") == "broken":
+                return self._send(500)
+            start = int(query.get("cursor", 0))
+            page = TRADES[start:start + 2]
+            cursor = str(start + 2) if start + 2 < len(TRADES) else ""
+            if parts[1] == "BROKEN" and start == 2:
+                cursor = "broken"
+            return self._send(200, {"trades": page, "cursor": cursor})
+        if parts[:1] == ["markets"] and parts[-1] == "candlesticks":
+            if parts[1] == "MISSING":
+                return self._send(404)
+            if parts[1] == "GARBLED":
+                payload = b"<html>upstream error</html>"
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+            return self._send(200, {"candlesticks": [{"end_period_ts": int(query.get("start_ts", 0)) + 86400}]})
+        return self._send(404)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(kalshi_client, "RETRY_BACKOFF", 0)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    httpd.lock = threading.Lock()
+    httpd.requests = []
+    httpd.throttle = {}
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _client(server, **kwargs):
+    return KalshiClient(f"http://127.0.0.1:{server.server_address[1]}", rate_per_second=1000, burst=100, **kwargs)
+
+
+def test_paginate_follows_the_cursor_over_one_pooled_connection(server):
+    with _client(server) as client:
+        trades = client.paginate("/markets/T1/trades", "trades", {"limit": 2})
+
+    assert trades == TRADES
+    assert [query.get("cursor") for _, query, _ in server.requests] == [None, "2", "4"]
+    assert all(query["limit"] == "2" for _, query, _ in server.requests)
+    # Every page went over the same kept-alive connection
+    assert len({port for _, _, port in server.requests}) == 1
+
+
+def test_strict_pagination_raises_on_a_failed_page(server):
+    with _client(server) as client:
+        assert client.paginate("/markets/BROKEN/trades", "trades") == TRADES[:4]
+        with pytest.raises(RuntimeError):
+            list(client.iter_pages("/markets/BROKEN/trades", "trades", strict=True))
+
+
+def test_get_json_retries_throttled_requests(server):
+    server.throttle["/markets/T1/trades"] = 2
+    with _client(server) as client:
+        data = client.get_json("/markets/T1/trades")
+
+    assert data["trades"] == TRADES[:2]
+    assert len(server.requests) == 3
+
+
+def test_get_json_gives_up_after_max_retries(server, monkeypatch):
+    monkeypatch.setattr(kalshi_client, "MAX_RETRIES", 2)
+    server.throttle["/markets/T1/trades"] = 10
+    with _client(server) as client:
+        assert client.get_json("/markets/T1/trades") is None
+    assert len(server.requests) == 3
+
+
+def test_fetch_candlesticks_many(server):
+    server.throttle["/markets/T2/candlesticks"] = 1
+    with _client(server) as client:
+        candles = client.fetch_candlesticks_many(["T1", "T2", "MISSING"], start_ts={"T1": 100})
+
+    assert candles == {
+        "T1": [{"end_period_ts": 86500}],
+        "T2": [{"end_period_ts": 86400}],
+        "MISSING": None,
+    }
+    starts = {path.split("/")[2]: query.get("start_ts") for path, query, _ in server.requests}
+    assert starts == {"T1": "100", "T2": None, "MISSING": None}
+
+
+def test_unparseable_candles_fail_only_their_market(server):
+    with _client(server) as client:
+        candles = client.fetch_candlesticks_many(["T1", "GARBLED"])
+
+    assert candles == {"T1": [{"end_period_ts": 86400}], "GARBLED": None}
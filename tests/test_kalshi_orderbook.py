@@ -0,0 +1,52 @@
+import numpy as np
+
+import scripts.kalshi_orderbook as kalshi_orderbook
+from scripts.kalshi_orderbook import KEYFRAME_SECONDS, OrderbookPoller, OrderbookStore, book_metrics
+
+BOOKS = {
+    "EV-A": {"yes": [[40, 100], [41, 50]], "no": [[55, 200]]},
+    "EV-B": {"yes": [[30, 10], [35, 20]], "no": [[60, 30]]},
+}
+
+
+def _poller(monkeypatch, tmp_path, failing):
+    monkeypatch.setattr(kalshi_orderbook, "fetch_markets_for_event",
+                        lambda event: [{"ticker": ticker, "status": "active"} for ticker in BOOKS])
+    monkeypatch.setattr(kalshi_orderbook, "fetch_orderbook",
+                        lambda ticker: None if ticker in failing else BOOKS[ticker])
+    return OrderbookPoller(["EV"], OrderbookStore(tmp_path), workers=2)
+
+
+def test_failed_keyframe_fetch_keeps_the_book(monkeypatch, tmp_path):
+    failing = set()
+    poller = _poller(monkeypatch, tmp_path, failing)
+    poller.poll(1_000)
+    # B fails exactly when the next keyframe is due, then comes back unchanged
+    failing.add("EV-B")
+    poller.poll(1_000 + KEYFRAME_SECONDS)
+    failing.clear()
+    poller.poll(1_060 + KEYFRAME_SECONDS)
+    poller.flush()
+
+    metrics = book_metrics(poller.store.load("EV"))
+    latest = metrics.sort_values("ts").groupby("market_ticker").last()
+    assert latest.loc["EV-B", "best_bid"] == 35
+    assert latest.loc["EV-B", "best_ask"] == 40
+    assert latest.loc["EV-B", "bid_depth"] == 30
+    assert latest.loc["EV-A", "best_bid"] == 41
+
+
+def test_keyframe_clears_removed_levels(monkeypatch, tmp_path):
+    poller = _poller(monkeypatch, tmp_path, set())
+    poller.poll(1_000)
+    original = dict(BOOKS)
+    try:
+        BOOKS["EV-A"] = {"yes": [], "no": []}
+        poller.poll(1_000 + KEYFRAME_SECONDS)
+    finally:
+        BOOKS.update(original)
+    poller.flush()
+
+    metrics = book_metrics(poller.store.load("EV"))
+    last_a = metrics[metrics["market_ticker"] == "EV-A"].iloc[-1]
+    assert np.isnan(last_a["best_bid"]) and last_a["bid_depth"] == 0